@@ -3,7 +3,22 @@ Django admin configuration for attendance app.
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .counters import record_transition
+from .export import stream_csv
 from .models import User, Faculty, Student, AttendanceRequest
+from .pagination import EstimatedCountPaginator
+from .rollups import record_rollup_transition
+from .search import apply_search
+from .transitions import apply_status_change, delete_requests, lock_requests
+
+# Requests moved per transaction by the status actions
+ADMIN_ACTION_BATCH_SIZE = 1000
+
+ADMIN_DECLINE_REASON = 'Declined by an administrator'
 
 
 @admin.register(User)
@@ -14,6 +29,8 @@ class UserAdmin(BaseUserAdmin):
     list_filter = ['role', 'is_staff', 'is_active']
     search_fields = ['email', 'username', 'first_name', 'last_name']
     ordering = ['email']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         (None, {'fields': ('email', 'username', 'password')}),
@@ -38,6 +55,7 @@ class FacultyAdmin(admin.ModelAdmin):
     list_filter = ['department', 'is_hod']
     search_fields = ['user__email', 'user__first_name', 'user__last_name', 'title', 'department']
     raw_id_fields = ['user']
+    list_select_related = ['user']
 
 
 @admin.register(Student)
@@ -48,17 +66,35 @@ class StudentAdmin(admin.ModelAdmin):
     list_filter = ['department', 'year', 'section']
     search_fields = ['user__email', 'user__first_name', 'user__last_name', 'student_id']
     raw_id_fields = ['user', 'mentor']
+    list_select_related = ['user', 'mentor__user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(AttendanceRequest)
 class AttendanceRequestAdmin(admin.ModelAdmin):
-    """Attendance Request admin."""
+    """
+    Attendance Request admin.
+    
+    Holds up on tables of millions of rows: the listed users are joined into
+    the changelist query, page counts are planner estimates, the search box
+    matches the indexed search document and the actions are set-based.
     
-    list_display = ['id', 'student', 'date', 'status', 'created_at']
+    Status and reason are read-only here: they change through the status
+    actions. Saves and deletes keep the counters, rollups and tombstones in
+    step like the API does.
+    """
+    
+    list_display = ['id', 'student', 'event_coordinator_faculty', 'date', 'status', 'created_at']
+    list_select_related = ['student', 'event_coordinator_faculty']
     list_filter = ['status', 'date', 'created_at']
-    search_fields = ['student__email', 'student__first_name', 'student__last_name', 'purpose']
+    search_fields = ['search_document']
+    date_hierarchy = 'date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     raw_id_fields = ['student']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['status', 'reason', 'created_at', 'updated_at']
+    actions = ['forward_to_hod', 'approve', 'decline', 'export_csv']
     
     fieldsets = (
         ('Request Info', {
@@ -74,3 +110,74 @@ class AttendanceRequestAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Search the indexed search document instead of icontains over joined columns."""
+        if not search_term.strip():
+            return queryset, False
+        return apply_search(queryset, search_term), False
+    
+    def save_model(self, request, obj, form, change):
+        """Save, moving the request's counter and rollup contributions to its new values."""
+        with transaction.atomic():
+            if change:
+                previous = AttendanceRequest.objects.select_for_update().get(pk=obj.pk)
+                record_transition(previous, previous.status, None)
+                record_rollup_transition([obj.pk], previous.status, None)
+            super().save_model(request, obj, form, change)
+            record_transition(obj, None, obj.status)
+            record_rollup_transition([obj.pk], None, obj.status)
+    
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, AttendanceRequest.objects.filter(pk=obj.pk))
+    
+    def delete_queryset(self, request, queryset):
+        """Delete in batches of ADMIN_ACTION_BATCH_SIZE through delete_requests, one transaction each."""
+        candidates = queryset.order_by().values_list('id', flat=True)
+        while True:
+            with transaction.atomic():
+                ids = list(candidates[:ADMIN_ACTION_BATCH_SIZE])
+                if not ids:
+                    return
+                delete_requests(AttendanceRequest.objects.filter(id__in=ids))
+    
+    def change_status(self, request, queryset, source_status, new_status, reason=''):
+        """
+        Move the selected requests still in source_status to new_status in
+        batches of ADMIN_ACTION_BATCH_SIZE, one transaction each, keeping
+        counters, events and notifications in step. Returns how many moved.
+        """
+        candidates = queryset.filter(status=source_status).order_by().values_list('id', flat=True)
+        moved = 0
+        while True:
+            with transaction.atomic():
+                ids = list(candidates[:ADMIN_ACTION_BATCH_SIZE])
+                if not ids:
+                    return moved
+                rows = lock_requests(AttendanceRequest.objects.filter(id__in=ids), source_status)
+                moved += len(apply_status_change(rows, source_status, new_status, request.user, reason))
+    
+    @admin.action(description='Approve selected requests pending mentor (forward to HOD)', permissions=['change'])
+    def forward_to_hod(self, request, queryset):
+        moved = self.change_status(request, queryset, 'PENDING_MENTOR', 'PENDING_HOD')
+        self.message_user(request, f'Forwarded {moved} requests to the HOD')
+    
+    @admin.action(description='Approve selected requests pending HOD', permissions=['change'])
+    def approve(self, request, queryset):
+        moved = self.change_status(request, queryset, 'PENDING_HOD', 'APPROVED')
+        self.message_user(request, f'Approved {moved} requests')
+    
+    @admin.action(description='Decline selected pending requests', permissions=['change'])
+    def decline(self, request, queryset):
+        moved = sum(
+            self.change_status(request, queryset, source_status, 'DECLINED', ADMIN_DECLINE_REASON)
+            for source_status in ('PENDING_MENTOR', 'PENDING_HOD')
+        )
+        self.message_user(request, f'Declined {moved} requests')
+    
+    @admin.action(description='Export selected requests as CSV', permissions=['view'])
+    def export_csv(self, request, queryset):
+        response = StreamingHttpResponse(stream_csv(queryset), content_type='text/csv; charset=utf-8')
+        filename = f"attendance-requests-{timezone.localdate().isoformat()}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        return response
@@ -0,0 +1,433 @@
+"""
+Archive of closed attendance requests from past terms.
+
+``archive_requests`` moves APPROVED and DECLINED requests dated before a
+cutoff out of attendance_requests into append-only segments under
+ATTENDANCE_ARCHIVE_DIR. A segment is a pair of files written once:
+
+- ``<name>.jsonl.gz``: the requests in their API JSON shape, one per line,
+  compressed as independent gzip members of ARCHIVE_BLOCK_SIZE lines (the
+  file as a whole is still an ordinary gzip stream).
+- ``<name>.idx``: one fixed-size record per request, sorted by date, holding
+  its id, date, created_at, student, coordinator, status flags and the
+  location of its block. The index is memory-mapped, so date ranges are
+  found by binary search and ownership filters run without decompressing.
+- ``<name>.members``: sorted (student or register number, index position)
+  pairs, one per request creator and one per register number listed in a
+  bulk request. A student's lookups binary-search it and read only their
+  own index records; bulk requests are never decompressed to check
+  membership. Segments written before the member index fall back to
+  scanning the date range.
+
+History listings and exports whose ``dateFrom`` reaches back to archived
+dates merge the matching archived records with live rows.
+"""
+import bisect
+import gzip
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import struct
+import threading
+import uuid
+import zlib
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+
+from .serializers import ATTENDANCE_REQUEST_ROW_FIELDS, serialize_request_rows
+
+# Requests per independently compressed block of a segment
+ARCHIVE_BLOCK_SIZE = 256
+
+INDEX_MAGIC = b'ATTIDX1\n'
+
+# id, student, coordinator, date ordinal, created_at (µs since epoch),
+# block offset, block length, flags
+INDEX_RECORD = struct.Struct('<16s16s16siqQIB')
+
+MEMBERS_MAGIC = b'ATTMEM1\n'
+
+# kind, student id or register number digest, index position. Big-endian,
+# so the packed bytes sort the same way as the values.
+MEMBER_RECORD = struct.Struct('>B16sI')
+
+MEMBER_STUDENT = 0
+MEMBER_REGISTER_NUMBER = 1
+
+FLAG_BULK = 1
+FLAG_DECLINED = 2
+
+NO_USER = bytes(16)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def to_micros(value):
+    """Microseconds since the epoch for an aware datetime."""
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _uuid_bytes(value):
+    if value is None:
+        return NO_USER
+    return uuid.UUID(str(value)).bytes
+
+
+def member_key(register_number):
+    """Fixed-size member index key of a register number."""
+    return hashlib.blake2b(register_number.encode(), digest_size=16).digest()
+
+
+class Segment:
+    """One archived segment: its memory-mapped index and compressed data file."""
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self.data_path = index_path[:-len('.idx')] + '.jsonl.gz'
+        self.name = os.path.basename(index_path)[:-len('.idx')]
+        with open(index_path, 'rb') as handle:
+            self.index = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.index[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError(f'{index_path} is not an attendance archive index')
+        self.size = (len(self.index) - len(INDEX_MAGIC)) // INDEX_RECORD.size
+
+        self.members = None
+        members_path = index_path[:-len('.idx')] + '.members'
+        if os.path.exists(members_path):
+            with open(members_path, 'rb') as handle:
+                self.members = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.members[:len(MEMBERS_MAGIC)] != MEMBERS_MAGIC:
+                raise ValueError(f'{members_path} is not an attendance archive member index')
+            self.members_size = (len(self.members) - len(MEMBERS_MAGIC)) // MEMBER_RECORD.size
+
+    def record(self, position):
+        return INDEX_RECORD.unpack_from(self.index, len(INDEX_MAGIC) + position * INDEX_RECORD.size)
+
+    def date_ordinal(self, position):
+        return self.record(position)[3]
+
+    def date_range(self, date_from=None, date_to=None):
+        """Positions [start, stop) of the records dated within the range."""
+        dates = _DateColumn(self)
+        start = bisect.bisect_left(dates, date_from.toordinal()) if date_from else 0
+        stop = bisect.bisect_right(dates, date_to.toordinal()) if date_to else self.size
+        return start, stop
+
+    def member_positions(self, kind, key, start, stop):
+        """Index positions in [start, stop) of the requests listing a member."""
+        prefix = MEMBER_RECORD.pack(kind, key, 0)[:-4]
+        entries = _MemberColumn(self)
+        positions = set()
+        for entry in range(bisect.bisect_left(entries, prefix), self.members_size):
+            if entries[entry] != prefix:
+                break
+            position = MEMBER_RECORD.unpack_from(
+                self.members, len(MEMBERS_MAGIC) + entry * MEMBER_RECORD.size
+            )[2]
+            if start <= position < stop:
+                positions.add(position)
+        return positions
+
+    @property
+    def last_date(self):
+        return date.fromordinal(self.date_ordinal(self.size - 1))
+
+    def ids(self):
+        """Raw ids of every archived request in the segment."""
+        return {self.record(position)[0] for position in range(self.size)}
+
+    def read_block(self, offset, length):
+        """Decode one block into {request id: record}."""
+        with open(self.data_path, 'rb') as handle:
+            handle.seek(offset)
+            raw = zlib.decompress(handle.read(length), 16 + zlib.MAX_WBITS)
+        records = (json.loads(line) for line in raw.splitlines() if line)
+        return {record['id']: record for record in records}
+
+
+class _DateColumn:
+    """Sequence view of a segment's date ordinals, for bisect."""
+
+    def __init__(self, segment):
+        self.segment = segment
+
+    def __len__(self):
+        return self.segment.size
+
+    def __getitem__(self, position):
+        return self.segment.date_ordinal(position)
+
+
+class _MemberColumn:
+    """Sequence view of a member index's (kind, key) prefixes, for bisect."""
+
+    def __init__(self, segment):
+        self.segment = segment
+
+    def __len__(self):
+        return self.segment.members_size
+
+    def __getitem__(self, entry):
+        offset = len(MEMBERS_MAGIC) + entry * MEMBER_RECORD.size
+        return self.segment.members[offset:offset + MEMBER_RECORD.size - 4]
+
+
+class ArchivedRef:
+    """A matching archived request: where it lives and when it was created."""
+
+    __slots__ = ('created_at', 'request_id', 'segment', 'offset', 'length')
+
+    def __init__(self, segment, record):
+        request_id, _, _, _, self.created_at, self.offset, self.length, _ = record
+        self.request_id = str(uuid.UUID(bytes=request_id))
+        self.segment = segment
+
+
+_segments = {}
+_segments_lock = threading.Lock()
+
+
+def archive_dir():
+    return str(settings.ATTENDANCE_ARCHIVE_DIR)
+
+
+def segments():
+    """Complete segments in the archive directory, opened once per process."""
+    directory = archive_dir()
+    if not os.path.isdir(directory):
+        return []
+    # A segment is complete once its index exists; data is renamed into place first
+    names = sorted(name for name in os.listdir(directory) if name.endswith('.idx'))
+    with _segments_lock:
+        for name in names:
+            if name not in _segments:
+                _segments[name] = Segment(os.path.join(directory, name))
+        return [_segments[name] for name in names]
+
+
+def archived_through():
+    """Latest archived request date, or None while the archive is empty."""
+    return max((segment.last_date for segment in segments()), default=None)
+
+
+def archive_version():
+    """Changes whenever a segment is added, for ETags of archive-backed responses."""
+    names = [segment.name for segment in segments()]
+    return f'{len(names)}:{names[-1] if names else ""}'
+
+
+def reaches_archive(date_from):
+    """True when a listing starting at ``date_from`` needs archived records."""
+    latest = archived_through()
+    return date_from is not None and latest is not None and date_from <= latest
+
+
+def find_archived(date_from=None, date_to=None, status=None, student_id=None,
+                  visible_to_student=None, visible_register_number=None,
+                  coordinator_id=None, register_number=None):
+    """
+    Archived requests matching the filters, newest first.
+
+    ``visible_to_student``/``visible_register_number`` limit the result to
+    requests a student can see (their own, or bulk requests listing their
+    register number); ``coordinator_id`` to a mentor's requests. Student
+    and register number filters are looked up in the member index, so only
+    the matching index records are read; bulk records are decompressed only
+    for segments without one.
+    """
+    try:
+        student = _uuid_bytes(student_id) if student_id else None
+        viewer = _uuid_bytes(visible_to_student) if visible_to_student else None
+        coordinator = _uuid_bytes(coordinator_id) if coordinator_id else None
+    except ValueError:
+        return []
+    declined = {'APPROVED': False, 'DECLINED': True}.get(status) if status else None
+    if status and declined is None:
+        return []
+
+    matches, bulk_checks = [], []
+    for segment in segments():
+        start, stop = segment.date_range(date_from, date_to)
+        indexed = segment.members is not None
+        positions, visible = range(start, stop), set()
+        if indexed:
+            if viewer is not None and visible_register_number:
+                visible = segment.member_positions(
+                    MEMBER_REGISTER_NUMBER, member_key(visible_register_number), start, stop
+                )
+            if register_number:
+                positions = segment.member_positions(MEMBER_REGISTER_NUMBER, member_key(register_number), start, stop)
+            elif student is not None:
+                positions = segment.member_positions(MEMBER_STUDENT, student, start, stop)
+            elif viewer is not None:
+                positions = segment.member_positions(MEMBER_STUDENT, viewer, start, stop) | visible
+
+        for position in positions:
+            record = segment.record(position)
+            _, record_student, record_coordinator, _, _, _, _, flags = record
+            if student is not None and record_student != student:
+                continue
+            if coordinator is not None and record_coordinator != coordinator:
+                continue
+            if declined is not None and bool(flags & FLAG_DECLINED) != declined:
+                continue
+
+            is_bulk = bool(flags & FLAG_BULK)
+            if register_number and not is_bulk:
+                continue
+            own = viewer is None or record_student == viewer
+            if not own and not (is_bulk and visible_register_number):
+                continue
+
+            ref = ArchivedRef(segment, record)
+            if indexed:
+                # Register number matches come from the member index already
+                if own or position in visible:
+                    matches.append(ref)
+            elif register_number or not own:
+                bulk_checks.append((ref, own))
+            else:
+                matches.append(ref)
+
+    if bulk_checks:
+        records = load_archived([ref for ref, _ in bulk_checks])
+        for (ref, own), record in zip(bulk_checks, records):
+            listed = {str(member.get('registerNumber', '')).strip() for member in record['bulkStudents'] or []}
+            if register_number and register_number not in listed:
+                continue
+            if not own and visible_register_number not in listed:
+                continue
+            matches.append(ref)
+
+    matches.sort(key=lambda ref: ref.created_at, reverse=True)
+    return matches
+
+
+def load_archived(refs):
+    """The archived records of ``refs``, in order, decompressing each block once."""
+    blocks = {}
+    for ref in refs:
+        key = (ref.segment.name, ref.offset)
+        if key not in blocks:
+            blocks[key] = ref.segment.read_block(ref.offset, ref.length)
+    return [blocks[(ref.segment.name, ref.offset)][ref.request_id] for ref in refs]
+
+
+class MergedListing:
+    """
+    Live requests and archived records as one sequence ordered newest first,
+    sliceable by Django's Paginator. Only the rows of the requested page are
+    fetched and serialized.
+    """
+
+    def __init__(self, queryset, archived):
+        self.queryset = queryset.order_by('-created_at', 'id')
+        self.archived = archived
+
+    def count(self):
+        return self.queryset.count() + len(self.archived)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+
+        live = (
+            (to_micros(created_at), str(request_id), None)
+            for created_at, request_id in self.queryset.values_list('created_at', 'id')[:stop].iterator()
+        )
+        archived = ((ref.created_at, ref.request_id, ref) for ref in self.archived[:stop])
+        picked = list(islice(heapq.merge(live, archived, key=lambda item: item[0], reverse=True), start, stop))
+
+        live_ids = [request_id for _, request_id, ref in picked if ref is None]
+        rows = {
+            row['id']: row
+            for row in serialize_request_rows(
+                self.queryset.filter(id__in=live_ids).values(*ATTENDANCE_REQUEST_ROW_FIELDS)
+            )
+        } if live_ids else {}
+        archived_refs = [ref for _, _, ref in picked if ref is not None]
+        rows.update({ref.request_id: record for ref, record in zip(archived_refs, load_archived(archived_refs))})
+        return [rows[request_id] for _, request_id, _ in picked]
+
+
+def write_segment(name, rows):
+    """
+    Write ``rows`` (ATTENDANCE_REQUEST_ROW_FIELDS dicts sorted by date, then
+    created_at) as segment ``name``. The data and member files are moved into
+    place before the index, so readers never see a segment without them.
+    Returns the number of archived requests.
+    """
+    directory = archive_dir()
+    os.makedirs(directory, exist_ok=True)
+    data_path = os.path.join(directory, f'{name}.jsonl.gz')
+    index_path = os.path.join(directory, f'{name}.idx')
+    members_path = os.path.join(directory, f'{name}.members')
+    if os.path.exists(data_path) or os.path.exists(index_path):
+        raise FileExistsError(f'Archive segment {name} already exists')
+
+    count = 0
+    members = []
+    with open(data_path + '.tmp', 'wb') as data, open(index_path + '.tmp', 'wb') as index:
+        index.write(INDEX_MAGIC)
+        block = []
+
+        def flush():
+            payload = gzip.compress(b''.join(json.dumps(record).encode() + b'\n' for _, record in block))
+            offset = data.tell()
+            data.write(payload)
+            for row, record in block:
+                position = (index.tell() - len(INDEX_MAGIC)) // INDEX_RECORD.size
+                if row['student_id'] is not None:
+                    members.append(MEMBER_RECORD.pack(MEMBER_STUDENT, _uuid_bytes(row['student_id']), position))
+                listed = {str(member.get('registerNumber', '')).strip() for member in record['bulkStudents'] or []}
+                for register_number in listed - {''}:
+                    members.append(MEMBER_RECORD.pack(MEMBER_REGISTER_NUMBER, member_key(register_number), position))
+                flags = (FLAG_BULK if row['is_bulk_request'] else 0) | (FLAG_DECLINED if row['status'] == 'DECLINED' else 0)
+                index.write(INDEX_RECORD.pack(
+                    row['id'].bytes,
+                    _uuid_bytes(row['student_id']),
+                    _uuid_bytes(row['event_coordinator_faculty_id']),
+                    row['date'].toordinal(),
+                    to_micros(row['created_at']),
+                    offset,
+                    len(payload),
+                    flags,
+                ))
+            block.clear()
+
+        for row in rows:
+            block.append((row, serialize_request_rows([row])[0]))
+            count += 1
+            if len(block) >= ARCHIVE_BLOCK_SIZE:
+                flush()
+        if block:
+            flush()
+
+        for handle in (data, index):
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    if not count:
+        os.remove(data_path + '.tmp')
+        os.remove(index_path + '.tmp')
+        return 0
+
+    members.sort()
+    with open(members_path + '.tmp', 'wb') as handle:
+        handle.write(MEMBERS_MAGIC)
+        handle.writelines(members)
+        handle.flush()
+        os.fsync(handle.fileno())
+
+    os.replace(data_path + '.tmp', data_path)
+    os.replace(members_path + '.tmp', members_path)
+    os.replace(index_path + '.tmp', index_path)
+    return count
@@ -0,0 +1,93 @@
+"""
+JWT tokens and authentication carrying the user's role in their claims.
+
+Access tokens embed role, isHOD, department, name and email, so read-only
+requests are served from a principal built out of the token instead of
+loading the user and faculty profile rows. Writes still load the user from
+the database. Claims are refreshed from the database whenever a token is
+issued or refreshed, so a role change takes effect within one access token
+lifetime.
+"""
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Faculty, User
+
+# Claims copied from the user; tokens without them (issued before this
+# change) are authenticated against the database as before
+ROLE_CLAIM = 'role'
+USER_CLAIMS = ('role', 'email', 'username', 'first_name', 'last_name')
+
+
+class AttendanceRefreshToken(RefreshToken):
+    """Refresh token whose claims (and access tokens) describe the user's role."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.set_user_claims(user)
+        return token
+
+    def set_user_claims(self, user):
+        """Stamp the current role, HOD flag and department onto the token."""
+        for claim in USER_CLAIMS:
+            self[claim] = getattr(user, claim)
+
+        faculty = Faculty.objects.filter(user=user).only('is_hod', 'department').first()
+        self['is_hod'] = faculty.is_hod if faculty else None
+        self['department'] = faculty.department if faculty else None
+
+
+def principal_from_token(validated_token):
+    """
+    Build an unsaved User from token claims, with faculty_profile cached
+    (or cached as missing) so role checks never query the database.
+    """
+    user_id_field = User._meta.get_field(api_settings.USER_ID_FIELD)
+    user = User(
+        **{user_id_field.attname: user_id_field.to_python(validated_token[api_settings.USER_ID_CLAIM])},
+        **{claim: validated_token.get(claim) or '' for claim in USER_CLAIMS},
+        is_active=True,
+    )
+    user._state.adding = False
+    user._state.db = 'default'
+
+    if validated_token.get('is_hod') is not None:
+        user.faculty_profile = Faculty(
+            user=user,
+            is_hod=validated_token['is_hod'],
+            department=validated_token.get('department') or '',
+        )
+    else:
+        # Cache the missing profile so hasattr(user, 'faculty_profile') is False without a query
+        User.faculty_profile.related.set_cached_value(user, None)
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the token's role claims on safe
+    (read-only) requests and loads the user from the database for writes.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if request.method in SAFE_METHODS:
+            return self.get_principal(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
+
+    def get_principal(self, validated_token):
+        """Return a token-built principal, or the database user for old tokens."""
+        if ROLE_CLAIM not in validated_token:
+            return self.get_user(validated_token)
+        return principal_from_token(validated_token)
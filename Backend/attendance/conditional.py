@@ -0,0 +1,60 @@
+"""
+Conditional GET helpers (ETag / If-None-Match).
+
+Validators are derived from a per-scope version: the newest ``updated_at``
+and the row count of the queryset the user is allowed to see. Both come from
+one aggregate query, so an unchanged dashboard costs a single indexed lookup
+and an empty 304 response instead of a full serialization.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(request, *parts):
+    """Build a quoted ETag scoped to the user and the full request path."""
+    raw = '|'.join([str(request.user.pk), request.get_full_path(), *(str(part) for part in parts)])
+    return '"%s"' % hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def queryset_etag(request, queryset, *parts):
+    """
+    Build an ETag from the version (max updated_at, row count) of a queryset,
+    plus any extra version ``parts`` the response also depends on.
+    """
+    version = queryset.order_by().aggregate(
+        last_updated=Max('updated_at'),
+        total=Count('pk'),
+    )
+    return make_etag(request, version['last_updated'], version['total'], *parts)
+
+
+def _strip_weak(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def etag_matches(request, etag):
+    """Return True when the client's If-None-Match already covers ``etag``."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    client_etags = parse_etags(header)
+    if '*' in client_etags:
+        return True
+    # Weak comparison, as required for If-None-Match
+    return _strip_weak(etag) in {_strip_weak(value) for value in client_etags}
+
+
+def set_validators(response, etag):
+    """Attach the ETag and force clients to revalidate before reusing a copy."""
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def not_modified(etag):
+    """Return an empty 304 response carrying the current validators."""
+    return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
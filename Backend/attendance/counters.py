@@ -0,0 +1,136 @@
+"""
+Maintained request counters backing the statistics endpoint.
+
+Every write path (create, status change, delete) applies its deltas inside
+the same transaction as the row change, so reading a user's statistics is a
+single aggregate over a handful of counter rows. ``expected_counters`` is
+the source of truth used by the ``recount_statistics`` command.
+"""
+from collections import Counter
+
+from django.db import connection
+from django.db.models import Count, Q, Sum
+
+from .models import AttendanceRequest, RequestStatusCounter
+
+ALL_SCOPE = 'all'
+STATUSES = [choice for choice, _ in AttendanceRequest.STATUS_CHOICES]
+
+
+def student_scope(user_id):
+    return f'student:{user_id}'
+
+
+def coordinator_scope(user_id):
+    return f'coordinator:{user_id}'
+
+
+def scopes_for(student_id, coordinator_id):
+    """
+    Every counter scope a request with these owners contributes to. Bulk
+    members are not owners: student scopes count only requests the student
+    created.
+    """
+    scopes = [ALL_SCOPE]
+    if student_id:
+        scopes.append(student_scope(student_id))
+    if coordinator_id:
+        scopes.append(coordinator_scope(coordinator_id))
+    return scopes
+
+
+def increment_counts(model, key_fields, deltas):
+    """
+    Add a mapping of key tuple -> delta to ``model.count``, creating missing
+    rows, with one INSERT ... ON CONFLICT DO UPDATE per batch. ``key_fields``
+    must match a unique constraint of ``model``. Keys are written in sorted
+    order so concurrent batches lock shared rows in the same order.
+    """
+    items = sorted((key, delta) for key, delta in deltas.items() if delta)
+    if not items:
+        return
+
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    fields = [model._meta.get_field(name) for name in (*key_fields, 'count')]
+    columns = ', '.join(quote(field.column) for field in fields)
+    conflict = ', '.join(quote(field.column) for field in fields[:-1])
+    count = quote(fields[-1].column)
+    row = '(%s)' % ', '.join(['%s'] * len(fields))
+
+    batch_size = connection.ops.bulk_batch_size(fields, items)
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            params = [
+                field.get_db_prep_save(value, connection)
+                for key, delta in batch
+                for field, value in zip(fields, (*key, delta))
+            ]
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) VALUES {", ".join([row] * len(batch))} '
+                f'ON CONFLICT ({conflict}) DO UPDATE SET {count} = {table}.{count} + EXCLUDED.{count}',
+                params,
+            )
+
+
+def apply_deltas(deltas):
+    """
+    Apply a mapping of (scope, status) -> delta to the counter table.
+    Must run inside the transaction that made the matching row changes.
+    """
+    increment_counts(RequestStatusCounter, ('scope', 'status'), deltas)
+
+
+def transition_deltas(rows, old_status, new_status):
+    """
+    Build counter deltas for rows moving from ``old_status`` to ``new_status``.
+    ``rows`` are (student_id, event_coordinator_faculty_id) pairs; either
+    status may be None for creates and deletes.
+    """
+    deltas = Counter()
+    for student_id, coordinator_id in rows:
+        for scope in scopes_for(student_id, coordinator_id):
+            if old_status:
+                deltas[(scope, old_status)] -= 1
+            if new_status:
+                deltas[(scope, new_status)] += 1
+    return deltas
+
+
+def record_transition(instance, old_status, new_status):
+    """Update counters for one request created, moved or deleted."""
+    apply_deltas(transition_deltas(
+        [(instance.student_id, instance.event_coordinator_faculty_id)],
+        old_status,
+        new_status,
+    ))
+
+
+def scope_counts(scope):
+    """Return {status: count} for a scope in one conditional-aggregation query."""
+    totals = RequestStatusCounter.objects.filter(scope=scope).aggregate(**{
+        status: Sum('count', filter=Q(status=status)) for status in STATUSES
+    })
+    return {status: totals[status] or 0 for status in STATUSES}
+
+
+def expected_counters():
+    """Recompute every counter from attendance_requests."""
+    expected = Counter()
+    requests = AttendanceRequest.objects.order_by()
+
+    for row in requests.values('status').annotate(n=Count('pk')):
+        expected[(ALL_SCOPE, row['status'])] = row['n']
+
+    for row in requests.filter(student__isnull=False).values('student_id', 'status').annotate(n=Count('pk')):
+        expected[(student_scope(row['student_id']), row['status'])] = row['n']
+
+    for row in (
+        requests.filter(event_coordinator_faculty__isnull=False)
+        .values('event_coordinator_faculty_id', 'status')
+        .annotate(n=Count('pk'))
+    ):
+        expected[(coordinator_scope(row['event_coordinator_faculty_id']), row['status'])] = row['n']
+
+    return expected
@@ -0,0 +1,55 @@
+"""
+Cached faculty directory snapshot.
+
+The request form needs every faculty member to fill the coordinator and
+period-faculty pickers. The whole directory is built with one query, grouped
+by department, stored in the cache together with a strong ETag (a hash of
+the payload) and rebuilt only after signals.py invalidates it.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Faculty
+from .serializers import FacultySerializer
+
+DIRECTORY_CACHE_KEY = 'attendance:faculty-directory'
+
+
+def build_directory():
+    """Build the (etag, payload) snapshot from the database."""
+    faculty = (
+        Faculty.objects.select_related('user')
+        .filter(user__is_active=True)
+        .order_by('department', 'user__first_name', 'user__last_name')
+    )
+    
+    departments = {}
+    for member in FacultySerializer(faculty, many=True).data:
+        departments.setdefault(member['department'], []).append(member)
+    
+    payload = {
+        'count': sum(len(members) for members in departments.values()),
+        'departments': [
+            {'department': department, 'faculty': members}
+            for department, members in departments.items()
+        ],
+    }
+    digest = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return '"%s"' % digest, payload
+
+
+def get_directory():
+    """Return the cached (etag, payload) snapshot, building it on a miss."""
+    snapshot = cache.get(DIRECTORY_CACHE_KEY)
+    if snapshot is None:
+        snapshot = build_directory()
+        cache.set(DIRECTORY_CACHE_KEY, snapshot, settings.ATTENDANCE_DIRECTORY_CACHE_SECONDS)
+    return snapshot
+
+
+def invalidate_directory():
+    """Drop the cached snapshot; the next request rebuilds it."""
+    cache.delete(DIRECTORY_CACHE_KEY)
@@ -0,0 +1,178 @@
+"""
+Live attendance request events for faculty dashboards.
+
+create(), update_status() and bulk status updates publish compact events
+after their transaction commits. On PostgreSQL the event goes out through NOTIFY, and every worker
+process runs one LISTEN thread that fans events out to its own Server-Sent
+Events subscribers, so a change made on one worker reaches streams held by
+any other. On other databases events are dispatched in-process only, which
+is enough for a single development server.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL NOTIFY channel shared by all workers
+CHANNEL = 'attendance_request_events'
+
+# Events buffered per stream before new ones are dropped for a slow client
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Seconds the listener waits on the socket before checking it is still wanted
+LISTEN_POLL_SECONDS = 30
+
+# Seconds to wait before reconnecting after the listener loses its connection
+LISTEN_RETRY_SECONDS = 5
+
+
+def build_event(request_id, status, coordinator_id, updated_at, event_type, previous_status=None):
+    """Build the compact event payload for an attendance request."""
+    return {
+        'type': event_type,
+        'id': str(request_id),
+        'status': status,
+        'previousStatus': previous_status,
+        'eventCoordinatorFacultyId': str(coordinator_id) if coordinator_id else None,
+        'updatedAt': updated_at.isoformat() if updated_at else None,
+    }
+
+
+def publish_events(events):
+    """Publish a batch of events once the current transaction commits."""
+    if events:
+        transaction.on_commit(lambda: broker.publish(events))
+
+
+def publish_request_event(instance, event_type, previous_status=None):
+    """Publish an event for ``instance`` once the current transaction commits."""
+    publish_events([build_event(
+        instance.id,
+        instance.status,
+        instance.event_coordinator_faculty_id,
+        instance.updated_at,
+        event_type,
+        previous_status=previous_status,
+    )])
+
+
+class Subscription:
+    """A single stream's event queue, bound to the event loop that reads it."""
+
+    def __init__(self, predicate):
+        self.predicate = predicate
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def offer(self, event):
+        """Queue an event; called on the subscriber's own event loop."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # The client is too slow; it will catch up on its next refetch
+            pass
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class EventBroker:
+    """Per-process fan-out of request events to SSE subscribers."""
+
+    def __init__(self, using='default'):
+        self.using = using
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._listener = None
+
+    @property
+    def uses_notify(self):
+        return connections[self.using].vendor == 'postgresql'
+
+    def subscribe(self, predicate):
+        """Register a stream; must be called from inside its event loop."""
+        subscription = Subscription(predicate)
+        with self._lock:
+            self._subscribers.add(subscription)
+        if self.uses_notify:
+            self._ensure_listener()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, events):
+        """Send events to every worker (NOTIFY) or to this process only."""
+        if not self.uses_notify:
+            for event in events:
+                self.dispatch(event)
+            return
+        try:
+            with connections[self.using].cursor() as cursor:
+                # One round trip for the whole batch
+                cursor.execute(
+                    'SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload',
+                    [CHANNEL, [json.dumps(event) for event in events]],
+                )
+        except Exception:
+            logger.exception('Failed to publish attendance request events')
+
+    def dispatch(self, event):
+        """Hand an event to every local subscriber whose scope matches."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.predicate(event):
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen,
+                    name='attendance-event-listener',
+                    daemon=True,
+                )
+                self._listener.start()
+
+    def _listen(self):
+        """LISTEN loop run in a daemon thread with its own database connection."""
+        wrapper = connections[self.using]
+        while True:
+            connection = None
+            try:
+                connection = wrapper.get_new_connection(wrapper.get_connection_params())
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+
+                while True:
+                    readable, _, _ = select.select([connection], [], [], LISTEN_POLL_SECONDS)
+                    if not readable:
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notification = connection.notifies.pop(0)
+                        try:
+                            self.dispatch(json.loads(notification.payload))
+                        except ValueError:
+                            logger.warning('Ignoring malformed attendance request event')
+            except Exception:
+                logger.exception('Attendance event listener lost its connection, retrying')
+                time.sleep(LISTEN_RETRY_SECONDS)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+
+broker = EventBroker()
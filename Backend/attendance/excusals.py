@@ -0,0 +1,51 @@
+"""
+Period excusals for approved attendance requests.
+
+When the HOD approves a request, its period_faculty_mapping is copied into
+period_excusals rows (one per period) in the same transaction, so period
+faculty can look up who is excused from their class without decoding JSON.
+"""
+import uuid
+
+from .models import PeriodExcusal, User
+
+
+def build_excusals(request_instance, faculty_ids):
+    """
+    Build (unsaved) excusal rows for one request. Periods whose faculty is
+    not in ``faculty_ids`` (unknown or malformed IDs) are skipped.
+    """
+    excusals = []
+    for period, faculty_id in (request_instance.period_faculty_mapping or {}).items():
+        try:
+            period = int(period)
+            faculty_id = uuid.UUID(str(faculty_id))
+        except (TypeError, ValueError):
+            continue
+        if faculty_id in faculty_ids and period in request_instance.periods:
+            excusals.append(PeriodExcusal(
+                attendance_request_id=request_instance.id,
+                faculty_id=faculty_id,
+                date=request_instance.date,
+                period=period,
+            ))
+    return excusals
+
+
+def record_excusals(request_instances):
+    """Write excusal rows for a batch of approved requests with two queries."""
+    candidate_ids = set()
+    for request_instance in request_instances:
+        for faculty_id in (request_instance.period_faculty_mapping or {}).values():
+            try:
+                candidate_ids.add(uuid.UUID(str(faculty_id)))
+            except ValueError:
+                pass
+    
+    faculty_ids = set(
+        User.objects.filter(id__in=candidate_ids, role='Faculty').values_list('id', flat=True)
+    )
+    excusals = []
+    for request_instance in request_instances:
+        excusals.extend(build_excusals(request_instance, faculty_ids))
+    return PeriodExcusal.objects.bulk_create(excusals, ignore_conflicts=True)
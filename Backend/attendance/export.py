@@ -0,0 +1,159 @@
+"""
+Streaming exports of attendance history.
+
+Rows are read with ``.values()`` over a chunked iterator (a server-side
+cursor on PostgreSQL) and written out one at a time, so memory stays flat
+however many requests are exported. Archived requests, when the export
+reaches back to them, follow the live rows. CSV is streamed as it is produced; XLSX
+needs the optional ``openpyxl`` package and is spooled to a temporary file
+because the format is a zip archive that cannot be written incrementally.
+"""
+import csv
+import tempfile
+
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .archive import load_archived
+
+# Rows fetched per round trip while streaming
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = (
+    'id', 'date', 'status', 'is_bulk_request', 'bulk_students',
+    'student__first_name', 'student__last_name', 'student__email',
+    'periods', 'event_coordinator', 'proof_faculty', 'purpose', 'reason',
+    'created_at', 'updated_at',
+)
+
+EXPORT_HEADER = (
+    'Request ID', 'Date', 'Status', 'Bulk Request', 'Student Name', 'Register Number',
+    'Student Email', 'Periods', 'Event Coordinator', 'Proof Faculty', 'Purpose',
+    'Reason', 'Created At', 'Updated At',
+)
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Lets DRF negotiate ``?format=csv``. The export itself is streamed by the
+    view; anything rendered here is an error payload, written as JSON.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data)
+
+
+class XLSXRenderer(CSVRenderer):
+    """Lets DRF negotiate ``?format=xlsx``."""
+    media_type = XLSX_CONTENT_TYPE
+    format = 'xlsx'
+    charset = None
+
+
+def _safe(value):
+    """Neutralize spreadsheet formulas in user-supplied text."""
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        return "'" + value
+    return value
+
+
+def export_rows(queryset, archived=()):
+    """
+    Yield one tuple per exported student: single requests give one row,
+    bulk requests one row per listed member. ``archived`` refs (from
+    find_archived) are exported after the live rows.
+    """
+    rows = queryset.order_by('-date', '-created_at').values(*EXPORT_FIELDS)
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield from _row_tuples(row)
+
+    for start in range(0, len(archived), EXPORT_CHUNK_SIZE):
+        for record in load_archived(archived[start:start + EXPORT_CHUNK_SIZE]):
+            yield from _row_tuples(_archived_row(record))
+
+
+def _archived_row(record):
+    """An archived record (API JSON shape) as an EXPORT_FIELDS row."""
+    return {
+        'id': record['id'],
+        'date': parse_date(record['date']),
+        'status': record['status'],
+        'is_bulk_request': record['isBulkRequest'],
+        'bulk_students': record['bulkStudents'],
+        'student__first_name': record['studentName'],
+        'student__last_name': '',
+        'student__email': record['studentEmail'],
+        'periods': record['periods'],
+        'event_coordinator': record['eventCoordinator'],
+        'proof_faculty': record['proofFaculty'],
+        'purpose': record['purpose'],
+        'reason': record['reason'],
+        'created_at': parse_datetime(record['createdAt']),
+        'updated_at': parse_datetime(record['updatedAt']),
+    }
+
+
+def _row_tuples(row):
+    """The export tuples of one request row."""
+    common = (
+        ', '.join(str(period) for period in row['periods'] or []),
+        _safe(row['event_coordinator']),
+        _safe(row['proof_faculty']),
+        _safe(row['purpose']),
+        _safe(row['reason'] or ''),
+        row['created_at'].isoformat() if row['created_at'] else '',
+        row['updated_at'].isoformat() if row['updated_at'] else '',
+    )
+    head = (str(row['id']), row['date'].isoformat(), row['status'], 'Yes' if row['is_bulk_request'] else 'No')
+
+    if row['is_bulk_request'] and row['bulk_students']:
+        for member in row['bulk_students']:
+            if not isinstance(member, dict):
+                continue
+            yield head + (
+                _safe(member.get('name', '')),
+                _safe(member.get('registerNumber', '')),
+                '',
+            ) + common
+    else:
+        name = f"{row['student__first_name'] or ''} {row['student__last_name'] or ''}".strip()
+        yield head + (_safe(name), '', row['student__email'] or '') + common
+
+
+class _Echo:
+    """File-like object whose write() hands back the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, archived=()):
+    """Yield the CSV export line by line, header first."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for row in export_rows(queryset, archived):
+        yield writer.writerow(row)
+
+
+def build_xlsx(queryset, archived=()):
+    """
+    Write the export to a spooled temporary XLSX file and return it rewound.
+    Raises ImportError when openpyxl is not installed.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Attendance Requests')
+    sheet.append(EXPORT_HEADER)
+    for row in export_rows(queryset, archived):
+        sheet.append(row)
+
+    output = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -0,0 +1,216 @@
+"""
+Per-request instrumentation: SQL query count, DB time, view time and
+serialization time.
+
+Every database connection gets an execute wrapper that counts queries into
+the timings of the request being handled (a context variable, so queries run
+through ``sync_to_async`` count too). ``RequestInstrumentationMiddleware``
+runs in sync or async mode without thread hops and reports the figures as a
+``Server-Timing`` header (readable in the browser's network panel) and as one
+structured ``attendance.instrumentation`` log line, and feeds the latency and
+query histograms exported on ``/metrics``. Requests that run more
+queries than ``ATTENDANCE_QUERY_BUDGET`` are logged as warnings, which is how
+N+1 patterns show up before they reach production data sizes.
+
+Serializers whose ``data`` should be counted as serialization time use
+``TimedSerializerMixin`` and ``TimedListSerializer``.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from rest_framework import serializers
+
+from .metrics import observe_request
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('attendance_request_timings', default=None)
+
+
+class RequestTimings:
+    """Accumulated figures for the request being handled."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.durations = {}
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper counting every query and its duration."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - started
+
+
+def _count_query(execute, sql, params, many, context):
+    """Execute wrapper counting into the current request's timings, if any."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def install_query_counter(connection):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+@receiver(connection_created)
+def _connection_created(sender, connection, **kwargs):
+    install_query_counter(connection)
+
+
+@contextmanager
+def timed(name):
+    """Add the duration of the block to the current request's ``name`` timing."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    """List serializer that counts building ``data`` as serialization time."""
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Count building ``data`` as serialization time. Pair it with
+    ``list_serializer_class = TimedListSerializer`` in ``Meta`` so
+    ``many=True`` use is timed too.
+    """
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Measure queries, DB time, view time and serialization time per request.
+
+    The view is timed from ``process_view`` until it returns its (unrendered)
+    response; rendering DRF responses to JSON is counted as serialization
+    together with the serializers' ``data``. Under ASGI the middleware and
+    its hooks are coroutines, so async views such as the event stream are
+    not pushed through ``sync_to_async``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Connections opened before this module was imported missed connection_created
+        for alias in connections:
+            install_query_counter(connections[alias])
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            self.process_view = _as_coroutine(self.process_view)
+            self.process_template_response = _as_coroutine(self.process_template_response)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.report(request, response, timings, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.report(request, response, timings, time.perf_counter() - started)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._instrumentation_view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        timings = _current.get()
+        view_started = getattr(request, '_instrumentation_view_started', None)
+        if timings is not None and view_started is not None:
+            timings.add('view', time.perf_counter() - view_started)
+            request._instrumentation_view_started = None
+
+            render_started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timings.add('serialize', time.perf_counter() - render_started)
+            )
+        return response
+
+    def report(self, request, response, timings, total):
+        """Attach the Server-Timing header and log the request's figures."""
+        view_started = getattr(request, '_instrumentation_view_started', None)
+        if view_started is not None:
+            # Plain responses are not rendered afterwards, the view ran until now
+            timings.add('view', time.perf_counter() - view_started)
+
+        metrics = [('db', timings.db, f'{timings.queries} queries')]
+        metrics += [(name, timings.durations[name], None) for name in ('view', 'serialize') if name in timings.durations]
+        metrics.append(('total', total, None))
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={seconds * 1000:.1f}' + (f';desc="{description}"' if description else '')
+            for name, seconds, description in metrics
+        )
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': resolver_match.view_name if resolver_match else None,
+            'status': response.status_code,
+            'queries': timings.queries,
+            **{f'{name}Ms': round(seconds * 1000, 1) for name, seconds, _ in metrics},
+        }
+        observe_request(
+            resolver_match.url_name if resolver_match else None,
+            request.method, response.status_code, total, timings.queries,
+        )
+        budget = settings.ATTENDANCE_QUERY_BUDGET
+        if budget and timings.queries > budget:
+            logger.warning('Query budget of %s exceeded: %s', budget, json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+
+
+def _as_coroutine(method):
+    """Wrap a non-blocking hook so the ASGI handler awaits it instead of running it in a thread."""
+    async def hook(*args):
+        return method(*args)
+    return hook
@@ -0,0 +1,107 @@
+"""
+Management command to archive closed attendance requests of past terms.
+
+Usage:
+    python manage.py archive_requests --before 2025-06-01            # archive and delete
+    python manage.py archive_requests --before 2025-06-01 --dry-run  # only count
+
+APPROVED and DECLINED requests dated before --before are written to a new
+segment under ATTENDANCE_ARCHIVE_DIR (see attendance/archive.py) and then
+deleted from attendance_requests in chunks, with their bulk members and
+period excusals. Archived requests leave the statistics counters, the same
+as deleted ones. If a run is interrupted after its segment was written,
+the next run deletes the already archived rows instead of archiving them
+again.
+"""
+from collections import Counter
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from attendance.archive import segments, write_segment
+from attendance.counters import apply_deltas, transition_deltas
+from attendance.models import AttendanceRequest
+from attendance.serializers import ATTENDANCE_REQUEST_ROW_FIELDS
+
+CLOSED_STATUSES = ('APPROVED', 'DECLINED')
+
+
+class Command(BaseCommand):
+    help = 'Moves closed requests dated before a cutoff into compressed archive segments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', required=True, help='Archive requests dated before this day (YYYY-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many requests would be archived')
+
+    def handle(self, *args, **options):
+        try:
+            before = datetime.strptime(options['before'], '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError('--before must be in YYYY-MM-DD format')
+        if before > timezone.localdate():
+            raise CommandError('--before cannot be in the future')
+
+        closed = AttendanceRequest.objects.filter(status__in=CLOSED_STATUSES, date__lt=before)
+        archived_ids = set()
+        for segment in segments():
+            archived_ids |= segment.ids()
+
+        # Rows of an interrupted earlier run are archived already and only need deleting
+        leftover = [
+            request_id for request_id in closed.values_list('id', flat=True).iterator()
+            if request_id.bytes in archived_ids
+        ]
+        pending = closed.count() - len(leftover)
+
+        if options['dry_run']:
+            self.stdout.write(f'Would archive {pending} requests dated before {before}')
+            if leftover:
+                self.stdout.write(f'Would delete {len(leftover)} already archived requests')
+            return
+
+        if leftover:
+            self.delete(leftover, options['batch_size'])
+            self.stdout.write(f'Deleted {len(leftover)} requests archived by an earlier run')
+
+        rows = (
+            row for row in closed.order_by('date', 'created_at')
+            .values(*ATTENDANCE_REQUEST_ROW_FIELDS)
+            .iterator(chunk_size=options['batch_size'])
+            if row['id'].bytes not in archived_ids
+        )
+        name = f'requests-before-{before.isoformat()}-{timezone.now():%Y%m%d%H%M%S%f}'
+        ids = []
+
+        def collect(rows):
+            for row in rows:
+                ids.append(row['id'])
+                yield row
+
+        count = write_segment(name, collect(rows))
+        if not count:
+            self.stdout.write(f'No closed requests dated before {before} to archive')
+            return
+        self.stdout.write(f'Wrote {count} requests to archive segment {name}')
+
+        self.delete(ids, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Archived {count} requests dated before {before}'))
+
+    def delete(self, ids, batch_size):
+        """Delete archived rows in chunks, taking them out of the statistics counters."""
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            with transaction.atomic():
+                rows = list(
+                    AttendanceRequest.objects.select_for_update()
+                    .filter(id__in=chunk, status__in=CLOSED_STATUSES)
+                    .values_list('id', 'student_id', 'event_coordinator_faculty_id', 'status')
+                )
+                deltas = Counter()
+                for _, student_id, coordinator_id, status in rows:
+                    deltas.update(transition_deltas([(student_id, coordinator_id)], status, None))
+                apply_deltas(deltas)
+                AttendanceRequest.objects.filter(id__in=[row[0] for row in rows]).delete()
+            self.stdout.write(f'Deleted {min(start + batch_size, len(ids))}/{len(ids)} archived requests')
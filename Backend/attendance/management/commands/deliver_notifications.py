@@ -0,0 +1,51 @@
+"""
+Management command that delivers queued notification emails.
+
+Usage:
+    python manage.py deliver_notifications            # run as a worker
+    python manage.py deliver_notifications --once     # drain due rows and exit
+
+Several workers can run side by side; each claims rows with
+SELECT ... FOR UPDATE SKIP LOCKED. For local testing point EMAIL_BACKEND at
+the SMTP backend and EMAIL_HOST/EMAIL_PORT at a sink such as
+``python -m aiosmtpd -n -l localhost:1025``.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from attendance.notifications import deliver_pending
+
+
+class Command(BaseCommand):
+    help = 'Delivers pending notification emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Rows claimed per SMTP connection')
+        parser.add_argument('--max-attempts', type=int, default=5, help='Attempts before a row is marked FAILED')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once no due rows are left')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+
+        try:
+            while True:
+                sent, failed = deliver_pending(
+                    batch_size=options['batch_size'],
+                    max_attempts=options['max_attempts'],
+                    log=self.stdout.write,
+                )
+                total_sent += sent
+                total_failed += failed
+
+                if sent + failed == 0:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Delivered {total_sent} notification(s), {total_failed} failed attempt(s)'
+        ))
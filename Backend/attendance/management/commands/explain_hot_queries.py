@@ -0,0 +1,129 @@
+"""
+Management command to check the query plans of the hot listing queries.
+
+Usage:
+    python manage.py generate_load_data --requests 1000000   # plans need a large table
+    python manage.py explain_hot_queries                     # EXPLAIN every shape
+    python manage.py explain_hot_queries --analyze --verbose # run them and print full plans
+
+Each shape is built by AttendanceRequestViewSet.get_queryset() for a real
+user, exactly as the list endpoint pages it, so the plans follow any change
+to the filters. The command fails when a shape reads attendance_requests
+with a sequential scan, which means the index it relies on is missing or
+no longer matches the query. Needs PostgreSQL.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import RequestFactory
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from attendance.models import AttendanceRequest, Faculty
+from attendance.serializers import ATTENDANCE_REQUEST_ROW_FIELDS
+from attendance.views import AttendanceRequestViewSet
+
+# Below this many requests the planner rightly prefers sequential scans
+MIN_REPRESENTATIVE_ROWS = 10000
+
+
+def listing_queryset(user, query=''):
+    """The queryset the list endpoint pages for ``user`` with the given query string."""
+    request = Request(RequestFactory().get(f'/api/attendance/requests/{query}'))
+    request.user = user
+    view = AttendanceRequestViewSet(request=request, format_kwarg=None, action='list', args=(), kwargs={})
+    return view.get_queryset()
+
+
+def plan_nodes(plan, depth=0):
+    """Yield (depth, node) for every node of a JSON EXPLAIN plan."""
+    yield depth, plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child, depth + 1)
+
+
+def describe_node(node):
+    """One-line description of a plan node, e.g. 'Index Scan using x on attendance_requests'."""
+    description = node['Node Type']
+    if node.get('Index Name'):
+        description += f" using {node['Index Name']}"
+    if node.get('Relation Name'):
+        description += f" on {node['Relation Name']}"
+    return description
+
+
+class Command(BaseCommand):
+    help = 'EXPLAINs the hot attendance request listing queries and fails on sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true', help='Run EXPLAIN ANALYZE (executes the queries)')
+        parser.add_argument('--verbose', action='store_true', help='Print every plan node')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('explain_hot_queries needs PostgreSQL')
+
+        total = AttendanceRequest.objects.count()
+        if total < MIN_REPRESENTATIVE_ROWS:
+            self.stdout.write(self.style.WARNING(
+                f'Only {total} attendance requests; plans on a table this small are not representative '
+                f'(run generate_load_data first)'
+            ))
+
+        table = AttendanceRequest._meta.db_table
+        failures = []
+        for name, queryset in self.shapes():
+            options_kwargs = {'format': 'json'}
+            if options['analyze']:
+                options_kwargs['analyze'] = True
+            plan = json.loads(queryset.explain(**options_kwargs))[0]
+
+            nodes = list(plan_nodes(plan['Plan']))
+            scans = [node for _, node in nodes if node.get('Relation Name') == table]
+            sequential = [node for node in scans if node['Node Type'] == 'Seq Scan']
+            summary = ', '.join(describe_node(node) for node in scans) or 'no scan of attendance_requests'
+            timing = f" in {plan['Execution Time']:.2f}ms" if 'Execution Time' in plan else ''
+
+            if sequential:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'✗ {name}: {summary}{timing}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {name}: {summary}{timing}'))
+            if options['verbose']:
+                for depth, node in nodes:
+                    self.stdout.write(f"    {'  ' * depth}{describe_node(node)} (rows={node.get('Plan Rows')})")
+
+        if failures:
+            raise CommandError(f'Sequential scan on {table} in: {", ".join(failures)}')
+
+    def shapes(self):
+        """(name, queryset) for each hot listing shape, for the busiest matching users."""
+        page_size = api_settings.PAGE_SIZE
+        busiest_mentor = (
+            AttendanceRequest.objects.filter(status='PENDING_MENTOR', event_coordinator_faculty__isnull=False)
+            .values('event_coordinator_faculty')
+            .annotate(n=Count('pk'))
+            .order_by('-n')
+            .first()
+        )
+        mentor = Faculty.objects.filter(is_hod=False).select_related('user')
+        if busiest_mentor:
+            mentor = mentor.filter(user_id=busiest_mentor['event_coordinator_faculty'])
+        mentor = mentor.first()
+        hod = Faculty.objects.filter(is_hod=True).select_related('user').first()
+        if mentor is None or hod is None:
+            raise CommandError('Need at least one mentor and one HOD to build the query shapes')
+
+        def page(queryset):
+            return queryset.values(*ATTENDANCE_REQUEST_ROW_FIELDS)[:page_size]
+
+        return [
+            ('mentor queue', page(listing_queryset(mentor.user))),
+            ('mentor history', page(listing_queryset(mentor.user, '?history=true'))),
+            ('mentor history (cursor)', page(listing_queryset(mentor.user, '?history=true').order_by('-created_at', 'id'))),
+            ('HOD queue', page(listing_queryset(hod.user))),
+            ('HOD queue (cursor)', page(listing_queryset(hod.user).order_by('-created_at', 'id'))),
+            ('HOD history', page(listing_queryset(hod.user, '?history=true'))),
+        ]
@@ -0,0 +1,308 @@
+"""
+Management command to generate a large synthetic dataset for load testing.
+
+Usage:
+    python manage.py generate_load_data                          # defaults below
+    python manage.py generate_load_data --requests 1000000 --students 20000
+    python manage.py generate_load_data --anchor-date 2026-06-30   # reproducible dates
+    python manage.py generate_load_data --clear                  # remove generated data only
+
+Every generated account uses the @load.test email domain and the password
+given by --password, so load tests can log in as any of them and --clear can
+remove them without touching real users. Request dates lead up to
+--anchor-date (today by default), so the same --seed and --anchor-date always
+produce the same dataset. Rows are written with bulk_create in batches, so the derived
+data normally maintained by save() and the views (periods_mask, bulk request
+members, period excusals, statistics counters) is filled in here as well.
+"""
+import io
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from attendance.directory import invalidate_directory
+from attendance.excusals import build_excusals
+from attendance.models import (
+    AttendanceRequest, BulkStudentMember, Faculty, PeriodExcusal, Student, User,
+    build_search_document, periods_to_mask,
+)
+
+LOAD_DOMAIN = 'load.test'
+
+# Share of generated requests in each status
+STATUS_WEIGHTS = {
+    'PENDING_MENTOR': 15,
+    'PENDING_HOD': 10,
+    'APPROVED': 60,
+    'DECLINED': 15,
+}
+
+PURPOSES = [
+    'Participating in the inter-college hackathon',
+    'Presenting a paper at the national conference',
+    'Representing the university at the zonal sports meet',
+    'Volunteering for the department technical symposium',
+    'Attending the industry workshop on cloud computing',
+    'Organizing the annual cultural festival',
+]
+
+DECLINE_REASONS = [
+    'Event does not clash with the requested periods',
+    'Proof of participation not provided',
+    'Internal assessment scheduled in these periods',
+]
+
+
+@contextmanager
+def explicit_timestamps(model, *field_names):
+    """Let bulk_create keep the given auto_now/auto_now_add values as set."""
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Generates a deterministic large dataset (@load.test users and their requests) for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--departments', type=int, default=5)
+        parser.add_argument(
+            '--faculty',
+            type=int,
+            default=50,
+            help='Faculty members (one HOD per department, at least one mentor besides)',
+        )
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--requests', type=int, default=10000)
+        parser.add_argument('--bulk-ratio', type=float, default=0.1, help='Share of requests that are bulk requests')
+        parser.add_argument('--max-bulk-size', type=int, default=40, help='Largest bulk_students list')
+        parser.add_argument('--days', type=int, default=180, help='Spread request dates over this many past days')
+        parser.add_argument(
+            '--anchor-date',
+            help='Generate requests in the days before this date (YYYY-MM-DD, default today)',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create statement')
+        parser.add_argument('--password', default='loadtest123', help='Password of every generated account')
+        parser.add_argument('--clear', action='store_true', help='Only delete previously generated data')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        if options['clear']:
+            self.clear()
+            self.rebuild_counters()
+            return
+
+        if options['departments'] < 1 or options['faculty'] < 2 * options['departments']:
+            raise CommandError(
+                '--faculty must be at least twice --departments: every department needs an HOD and a mentor'
+            )
+        anchor_date = timezone.localdate()
+        if options['anchor_date']:
+            try:
+                anchor_date = datetime.strptime(options['anchor_date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--anchor-date must be in YYYY-MM-DD format')
+        anchor = timezone.make_aware(datetime.combine(anchor_date, time.min))
+
+        self.clear()
+        password = make_password(options['password'])
+        departments = [f'Load Department {index + 1}' for index in range(options['departments'])]
+        faculty = self.create_faculty(options['faculty'], departments, password)
+        students = self.create_students(options['students'], departments, faculty, password)
+        self.create_requests(options, students, faculty, anchor)
+
+        self.rebuild_counters()
+        invalidate_directory()
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Generated {len(faculty)} faculty, {len(students)} students and {options["requests"]} requests '
+            f'(password: {options["password"]})'
+        ))
+
+    def uuid(self):
+        """Deterministic UUID4 drawn from the seeded generator."""
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def rebuild_counters(self):
+        """Recount the statistics counters and analytics rollups without listing every correction."""
+        call_command('recount_statistics', stdout=io.StringIO())
+        call_command('rebuild_rollups', stdout=io.StringIO())
+        self.stdout.write('Rebuilt statistics counters and analytics rollups')
+
+    def clear(self):
+        """Delete every @load.test account and the requests they created."""
+        load_users = User.objects.filter(email__endswith=f'@{LOAD_DOMAIN}')
+        requests, _ = AttendanceRequest.objects.filter(student__in=load_users).delete()
+        accounts, _ = load_users.delete()
+        if requests or accounts:
+            self.stdout.write(f'Cleared {requests + accounts} rows of earlier load data')
+
+    def create_faculty(self, count, departments, password):
+        """Faculty spread over departments; the first in each department is its HOD."""
+        users, profiles = [], []
+        for index in range(count):
+            department = departments[index % len(departments)]
+            user = User(
+                id=self.uuid(),
+                email=f'faculty{index:05d}@{LOAD_DOMAIN}',
+                username=f'load-faculty-{index:05d}',
+                first_name='Faculty',
+                last_name=f'{index:05d}',
+                role='Faculty',
+                password=password,
+            )
+            users.append(user)
+            profiles.append(Faculty(
+                id=self.uuid(),
+                user=user,
+                title='Assistant Professor',
+                department=department,
+                is_hod=index < len(departments),
+            ))
+
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=self.batch_size)
+            Faculty.objects.bulk_create(profiles, batch_size=self.batch_size)
+        self.stdout.write(f'Created {len(profiles)} faculty')
+        return profiles
+
+    def create_students(self, count, departments, faculty, password):
+        """Students with profiles and a mentor from their own department."""
+        mentors_by_department = {}
+        for profile in faculty:
+            if not profile.is_hod:
+                mentors_by_department.setdefault(profile.department, []).append(profile)
+
+        students = []
+        for start in range(0, count, self.batch_size):
+            users, profiles = [], []
+            for index in range(start, min(start + self.batch_size, count)):
+                department = departments[index % len(departments)]
+                user = User(
+                    id=self.uuid(),
+                    email=f'student{index:07d}@{LOAD_DOMAIN}',
+                    username=f'load-student-{index:07d}',
+                    first_name='Student',
+                    last_name=f'{index:07d}',
+                    role='Student',
+                    password=password,
+                )
+                mentors = mentors_by_department.get(department)
+                users.append(user)
+                profiles.append(Student(
+                    id=self.uuid(),
+                    user=user,
+                    student_id=f'LT{index:08d}',
+                    department=department,
+                    year=self.rng.randint(1, 4),
+                    section=self.rng.choice('ABC'),
+                    mentor=self.rng.choice(mentors) if mentors else None,
+                ))
+            with transaction.atomic():
+                User.objects.bulk_create(users, batch_size=self.batch_size)
+                Student.objects.bulk_create(profiles, batch_size=self.batch_size)
+            students.extend(profiles)
+        self.stdout.write(f'Created {len(students)} students')
+        return students
+
+    def create_requests(self, options, students, faculty, anchor):
+        """
+        Requests with a realistic status mix, in batches with their derived
+        rows, dated in the --days before ``anchor``. Coordinators are mentors
+        (never HODs) of the student's department.
+        """
+        faculty_by_department, mentors_by_department = {}, {}
+        for profile in faculty:
+            faculty_by_department.setdefault(profile.department, []).append(profile)
+            if not profile.is_hod:
+                mentors_by_department.setdefault(profile.department, []).append(profile)
+        faculty_ids = {profile.user_id for profile in faculty}
+        statuses = list(STATUS_WEIGHTS)
+        weights = list(STATUS_WEIGHTS.values())
+        total = options['requests']
+
+        for start in range(0, total, self.batch_size):
+            requests, members = [], []
+            for _ in range(start, min(start + self.batch_size, total)):
+                student = self.rng.choice(students)
+                department_faculty = faculty_by_department[student.department]
+                coordinator = self.rng.choice(mentors_by_department[student.department])
+                first_period = self.rng.randint(1, 8)
+                periods = list(range(first_period, min(first_period + self.rng.randint(1, 4), 9)))
+                status = self.rng.choices(statuses, weights)[0]
+                created_at = anchor - timedelta(days=self.rng.uniform(0, options['days']))
+                date = (created_at + timedelta(days=self.rng.randint(0, 7))).date()
+                updated_at = created_at if status == 'PENDING_MENTOR' else min(
+                    created_at + timedelta(hours=self.rng.uniform(1, 72)), anchor
+                )
+
+                attendance_request = AttendanceRequest(
+                    id=self.uuid(),
+                    student_id=student.user_id,
+                    created_by_id=student.user_id,
+                    date=date,
+                    periods=periods,
+                    periods_mask=periods_to_mask(periods),
+                    period_faculty_mapping={
+                        str(period): str(self.rng.choice(department_faculty).user_id) for period in periods
+                    },
+                    event_coordinator=f'Faculty {coordinator.user.last_name}',
+                    event_coordinator_faculty_id=coordinator.user_id,
+                    proof_faculty=f'Faculty {self.rng.choice(department_faculty).user.last_name}',
+                    purpose=self.rng.choice(PURPOSES),
+                    status=status,
+                    reason=self.rng.choice(DECLINE_REASONS) if status == 'DECLINED' else None,
+                    created_at=created_at,
+                    updated_at=updated_at,
+                )
+
+                if self.rng.random() < options['bulk_ratio']:
+                    team = self.rng.sample(students, min(self.rng.randint(2, options['max_bulk_size']), len(students)))
+                    attendance_request.is_bulk_request = True
+                    attendance_request.bulk_students = [
+                        {'registerNumber': member.student_id, 'name': f'Student {member.user.last_name}'}
+                        for member in team
+                    ]
+                    members.extend(
+                        BulkStudentMember(
+                            id=self.uuid(),
+                            attendance_request=attendance_request,
+                            register_number=member.student_id,
+                            name=f'Student {member.user.last_name}',
+                            user_id=member.user_id,
+                        )
+                        for member in team
+                    )
+                attendance_request.search_document = build_search_document(
+                    attendance_request.purpose, attendance_request.event_coordinator,
+                    attendance_request.proof_faculty, student.user.name, attendance_request.bulk_students,
+                )
+                requests.append(attendance_request)
+
+            excusals = [
+                excusal
+                for attendance_request in requests if attendance_request.status == 'APPROVED'
+                for excusal in build_excusals(attendance_request, faculty_ids)
+            ]
+            for excusal in excusals:
+                excusal.id = self.uuid()
+            with transaction.atomic(), explicit_timestamps(AttendanceRequest, 'created_at', 'updated_at'):
+                AttendanceRequest.objects.bulk_create(requests, batch_size=self.batch_size)
+                BulkStudentMember.objects.bulk_create(members, batch_size=self.batch_size)
+                PeriodExcusal.objects.bulk_create(excusals, batch_size=self.batch_size)
+            self.stdout.write(f'Created {start + len(requests)}/{total} requests')
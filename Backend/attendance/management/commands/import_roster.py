@@ -0,0 +1,357 @@
+"""
+Management command to import a roster of students and faculty from CSV.
+
+Usage:
+    python manage.py import_roster roster.csv
+    python manage.py import_roster roster.csv --dry-run
+    python manage.py import_roster roster.csv --default-password changeme --workers 8
+
+CSV columns (header row required, extra columns ignored):
+    role                Student or Faculty
+    email               unique key; existing users are updated in place
+    username, first_name, last_name, password (optional initial password)
+    Students:  register_number, department, year, section, mentor_email (optional)
+    Faculty:   title, department, is_hod (true/false)
+
+Initial passwords are hashed in a process pool and only set for new users
+(or for everyone with --reset-passwords). Users, faculty profiles and
+student profiles are upserted with bulk_create(update_conflicts=True) in
+batches, reusing the IDs of existing rows, and a created/updated/unchanged
+diff is reported.
+"""
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Lower
+
+from attendance.directory import invalidate_directory
+from attendance.models import BulkStudentMember, Faculty, Student, User
+
+TRUE_VALUES = ('1', 'true', 'yes', 'y')
+
+USER_FIELDS = ('username', 'first_name', 'last_name', 'role')
+STUDENT_FIELDS = ('student_id', 'department', 'year', 'section', 'mentor_id')
+FACULTY_FIELDS = ('title', 'department', 'is_hod')
+
+# Errors printed before the rest are summarized
+MAX_REPORTED_ERRORS = 20
+
+
+def _setup_worker():
+    """Process pool initializer: configure Django so password hashers load."""
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+
+def _hash_password(raw_password):
+    return make_password(raw_password)
+
+
+class Command(BaseCommand):
+    help = 'Imports students and faculty from a CSV roster with batched upserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='Path to the roster CSV file')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and report the diff without writing')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk upsert statement')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Processes used to hash passwords')
+        parser.add_argument(
+            '--default-password',
+            default=None,
+            help='Initial password for new users without a password column (default: unusable password)',
+        )
+        parser.add_argument(
+            '--reset-passwords',
+            action='store_true',
+            help='Also overwrite the passwords of existing users',
+        )
+
+    def handle(self, *args, **options):
+        self.errors = []
+        rows = self.read_roster(options['csv_path'])
+        if not rows:
+            self.report_errors()
+            raise CommandError('No valid rows to import')
+
+        # Roster emails are lowercase; match stored emails regardless of case
+        existing_users = {
+            user['email'].lower(): user
+            for user in User.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in=rows.keys())
+            .values('id', 'email', 'password', *USER_FIELDS)
+        }
+        self.check_unique_usernames(rows)
+        self.check_unique_register_numbers(rows)
+
+        users = self.build_users(rows, existing_users)
+        user_ids = {email: user.id for email, user in zip(rows, users)}
+        faculty = self.build_faculty(rows, user_ids)
+
+        # Mentors may be imported in the same file or already exist
+        faculty_ids = {email: faculty[user_id].id for email, user_id in user_ids.items() if user_id in faculty}
+        mentor_emails = {row['mentor_email'] for row in rows.values() if row.get('mentor_email')}
+        faculty_ids.update(
+            Faculty.objects.annotate(email_lower=Lower('user__email'))
+            .filter(email_lower__in=mentor_emails - faculty_ids.keys())
+            .values_list('email_lower', 'id')
+        )
+        students = self.build_students(rows, user_ids, faculty_ids)
+
+        diff = {
+            'Users': self.diff(
+                User, users, USER_FIELDS, key='email',
+                existing={user['email']: user for user in existing_users.values()},
+            ),
+            'Faculty': self.diff(Faculty, list(faculty.values()), FACULTY_FIELDS, key='user_id'),
+            'Students': self.diff(Student, list(students.values()), STUDENT_FIELDS, key='user_id'),
+        }
+        self.report_errors()
+        for label, (created, updated, unchanged) in diff.items():
+            self.stdout.write(f'  {label}: {created} created, {updated} updated, {unchanged} unchanged')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run, nothing was written'))
+            return
+
+        self.set_passwords(users, rows, existing_users, options)
+
+        batch_size = options['batch_size']
+        user_update_fields = list(USER_FIELDS) + (['password'] if options['reset_passwords'] else [])
+        with transaction.atomic():
+            User.objects.bulk_create(
+                users,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['email'],
+                update_fields=user_update_fields,
+            )
+            Faculty.objects.bulk_create(
+                list(faculty.values()),
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['user'],
+                update_fields=[*FACULTY_FIELDS, 'updated_at'],
+            )
+            Student.objects.bulk_create(
+                list(students.values()),
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['user'],
+                update_fields=[*STUDENT_FIELDS, 'updated_at'],
+            )
+            # Link team requests that already list the newly imported register numbers
+            BulkStudentMember.objects.filter(
+                user__isnull=True,
+                register_number__in=[student.student_id for student in students.values()],
+            ).update(user_id=Subquery(
+                Student.objects.filter(student_id=OuterRef('register_number')).values('user_id')[:1]
+            ))
+            # bulk_create sends no signals, so drop the directory snapshot ourselves
+            transaction.on_commit(invalidate_directory)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Imported {len(users)} users ({len(faculty)} faculty, {len(students)} students)'
+        ))
+
+    # ------------------------------------------------------------------
+    # Parsing and validation
+    # ------------------------------------------------------------------
+
+    def error(self, line, message):
+        self.errors.append(f'line {line}: {message}')
+
+    def read_roster(self, csv_path):
+        """Read and validate the CSV, keyed by lowercase email (last row wins)."""
+        try:
+            handle = open(csv_path, newline='', encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(f'Cannot read {csv_path}: {e}')
+
+        rows = {}
+        with handle:
+            reader = csv.DictReader(handle)
+            for row in reader:
+                line = reader.line_num
+                row = {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+                row['line'] = line
+
+                email = row.get('email', '').lower()
+                role = row.get('role', '').capitalize()
+                if not email or '@' not in email:
+                    self.error(line, 'missing or invalid email')
+                    continue
+                if role not in ('Student', 'Faculty'):
+                    self.error(line, f'role must be Student or Faculty, got "{row.get("role", "")}"')
+                    continue
+                row['email'], row['role'] = email, role
+                row['username'] = row.get('username') or email.split('@')[0]
+
+                if role == 'Student':
+                    if not row.get('register_number'):
+                        self.error(line, 'students need a register_number')
+                        continue
+                    try:
+                        row['year'] = int(row.get('year') or 0)
+                    except ValueError:
+                        self.error(line, f'year must be a number, got "{row["year"]}"')
+                        continue
+                    row['mentor_email'] = row.get('mentor_email', '').lower()
+                else:
+                    row['is_hod'] = row.get('is_hod', '').lower() in TRUE_VALUES
+
+                if email in rows:
+                    self.error(line, f'duplicate email {email}, overrides line {rows[email]["line"]}')
+                rows[email] = row
+        return rows
+
+    def check_unique_usernames(self, rows):
+        """Drop rows whose username already belongs to a different account."""
+        seen = {}
+        for email, row in list(rows.items()):
+            other = seen.setdefault(row['username'], email)
+            if other != email:
+                self.error(row['line'], f'username {row["username"]} is also used by {other}')
+                del rows[email]
+
+        taken = dict(
+            User.objects.filter(username__in=[row['username'] for row in rows.values()])
+            .values_list('username', 'email')
+        )
+        for email, row in list(rows.items()):
+            owner = taken.get(row['username'])
+            if owner is not None and owner.lower() != email:
+                self.error(row['line'], f'username {row["username"]} already belongs to {owner}')
+                del rows[email]
+
+    def check_unique_register_numbers(self, rows):
+        """Drop student rows whose register number belongs to a different student."""
+        student_rows = {}
+        for email, row in list(rows.items()):
+            if row['role'] != 'Student':
+                continue
+            other = student_rows.setdefault(row['register_number'], email)
+            if other != email:
+                self.error(row['line'], f'register number {row["register_number"]} is also used by {other}')
+                del rows[email]
+
+        taken = dict(
+            Student.objects.filter(student_id__in=student_rows.keys()).values_list('student_id', 'user__email')
+        )
+        for register_number, email in student_rows.items():
+            owner = taken.get(register_number)
+            if owner is not None and owner.lower() != email:
+                self.error(rows[email]['line'], f'register number {register_number} already belongs to {owner}')
+                del rows[email]
+
+    def report_errors(self):
+        for message in self.errors[:MAX_REPORTED_ERRORS]:
+            self.stdout.write(self.style.ERROR(f'✗ {message}'))
+        if len(self.errors) > MAX_REPORTED_ERRORS:
+            self.stdout.write(self.style.ERROR(f'✗ ... and {len(self.errors) - MAX_REPORTED_ERRORS} more'))
+
+    # ------------------------------------------------------------------
+    # Building rows
+    # ------------------------------------------------------------------
+
+    def build_users(self, rows, existing_users):
+        """Unsaved User rows in ``rows`` order; existing users keep their ID and stored email."""
+        users = []
+        for email, row in rows.items():
+            user = User(
+                email=email,
+                username=row['username'],
+                first_name=row.get('first_name', ''),
+                last_name=row.get('last_name', ''),
+                role=row['role'],
+            )
+            if email in existing_users:
+                user.id = existing_users[email]['id']
+                user.email = existing_users[email]['email']
+                user.password = existing_users[email]['password']
+            users.append(user)
+        return users
+
+    def build_faculty(self, rows, user_ids):
+        """Unsaved Faculty rows keyed by user ID; existing profiles keep their ID."""
+        existing = dict(Faculty.objects.filter(user_id__in=user_ids.values()).values_list('user_id', 'id'))
+        faculty = {}
+        for email, row in rows.items():
+            if row['role'] != 'Faculty':
+                continue
+            user_id = user_ids[email]
+            profile = Faculty(
+                user_id=user_id,
+                title=row.get('title', ''),
+                department=row.get('department', ''),
+                is_hod=row['is_hod'],
+            )
+            if user_id in existing:
+                profile.id = existing[user_id]
+            faculty[user_id] = profile
+        return faculty
+
+    def build_students(self, rows, user_ids, faculty_ids):
+        """Unsaved Student rows keyed by user ID; existing profiles keep their ID."""
+        existing = dict(Student.objects.filter(user_id__in=user_ids.values()).values_list('user_id', 'id'))
+        students = {}
+        for email, row in rows.items():
+            if row['role'] != 'Student':
+                continue
+            mentor_email = row.get('mentor_email')
+            if mentor_email and mentor_email not in faculty_ids:
+                self.error(row['line'], f'mentor {mentor_email} is not a faculty member, mentor left empty')
+            user_id = user_ids[email]
+            profile = Student(
+                user_id=user_id,
+                student_id=row['register_number'],
+                department=row.get('department', ''),
+                year=row['year'],
+                section=row.get('section', ''),
+                mentor_id=faculty_ids.get(mentor_email) if mentor_email else None,
+            )
+            if user_id in existing:
+                profile.id = existing[user_id]
+            students[user_id] = profile
+        return students
+
+    def diff(self, model, objects, fields, key, existing=None):
+        """Count (created, updated, unchanged) objects against the database."""
+        if existing is None:
+            values = model.objects.filter(**{f'{key}__in': [getattr(obj, key) for obj in objects]})
+            existing = {row[key]: row for row in values.values(key, *fields)}
+
+        created = updated = 0
+        for obj in objects:
+            current = existing.get(getattr(obj, key))
+            if current is None:
+                created += 1
+            elif any(current[field] != getattr(obj, field) for field in fields):
+                updated += 1
+        return created, updated, len(objects) - created - updated
+
+    def set_passwords(self, users, rows, existing_users, options):
+        """Hash initial passwords for new users (all users with --reset-passwords)."""
+        targets = [
+            user for user in users
+            if options['reset_passwords'] or user.email.lower() not in existing_users
+        ]
+        raw_passwords = [rows[user.email.lower()].get('password') or options['default_password'] for user in targets]
+
+        to_hash = [(user, raw) for user, raw in zip(targets, raw_passwords) if raw]
+        for user, raw in zip(targets, raw_passwords):
+            if not raw:
+                user.set_unusable_password()
+
+        if not to_hash:
+            return
+        self.stdout.write(f'Hashing {len(to_hash)} password(s) with {options["workers"]} worker(s)...')
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_setup_worker) as pool:
+            hashes = pool.map(_hash_password, [raw for _, raw in to_hash], chunksize=64)
+            for (user, _), hashed in zip(to_hash, hashes):
+                user.password = hashed
@@ -0,0 +1,403 @@
+"""
+Management command to load test the API end to end over HTTP.
+
+Usage:
+    python manage.py generate_load_data                          # accounts to log in as
+    python manage.py load_test                                   # local runserver, 60s, 20 clients
+    python manage.py load_test --url http://127.0.0.1:8000 --concurrency 50 --duration 300
+    python manage.py load_test --output baseline.json            # save the results
+    python manage.py load_test --compare baseline.json           # fail on p50/p95/p99 regressions
+
+Without --url a `runserver` process is started on --port for the run. Pass
+--url to measure a server you started yourself (gunicorn, uvicorn) against
+the same database. Simulated users are @load.test accounts created by
+generate_load_data; each logs in through /api/auth/login/ and then the
+clients replay a weighted mix of creating requests, listing, statistics,
+mentor approvals and HOD approvals until the time or request budget is
+spent. Latencies are reported per endpoint as percentiles and histogram
+buckets, together with throughput and error rates.
+"""
+import json
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from attendance.models import Faculty, Student
+
+from .generate_load_data import LOAD_DOMAIN, PURPOSES
+
+# Share of operations of each kind in the replayed mix
+OPERATION_WEIGHTS = {
+    'create': 20,
+    'list': 35,
+    'statistics': 20,
+    'mentor_approve': 15,
+    'hod_approve': 10,
+}
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+HISTOGRAM_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+PERCENTILES = [50, 90, 95, 99]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(samples, elapsed):
+    """Latency, throughput and error figures for one endpoint's samples."""
+    latencies = sorted(sample[0] for sample in samples)
+    errors = [sample for sample in samples if sample[1] >= 400]
+    histogram = {f'<={bound}ms': 0 for bound in HISTOGRAM_BUCKETS}
+    histogram[f'>{HISTOGRAM_BUCKETS[-1]}ms'] = 0
+    for latency in latencies:
+        for bound in HISTOGRAM_BUCKETS:
+            if latency <= bound:
+                histogram[f'<={bound}ms'] += 1
+                break
+        else:
+            histogram[f'>{HISTOGRAM_BUCKETS[-1]}ms'] += 1
+
+    statuses = {}
+    for _, status_code in samples:
+        statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+
+    return {
+        'count': len(samples),
+        'errors': len(errors),
+        'errorRate': round(len(errors) / len(samples), 4) if samples else 0,
+        'throughput': round(len(samples) / elapsed, 2) if elapsed else 0,
+        'meanMs': round(sum(latencies) / len(latencies), 2) if latencies else None,
+        'minMs': round(latencies[0], 2) if latencies else None,
+        'maxMs': round(latencies[-1], 2) if latencies else None,
+        **{f'p{pct}Ms': round(percentile(latencies, pct), 2) if latencies else None for pct in PERCENTILES},
+        'statuses': statuses,
+        'histogram': histogram,
+    }
+
+
+class Client:
+    """Minimal JSON client that times every request under an endpoint label."""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def call(self, label, method, path, token=None, body=None):
+        """Send one request and record its latency; returns (status, payload)."""
+        headers = {'Accept': 'application/json'}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        request = urllib.request.Request(f'{self.base_url}{path}', data=data, headers=headers, method=method)
+
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                status_code, raw = response.status, response.read()
+        except urllib.error.HTTPError as error:
+            status_code, raw = error.code, error.read()
+        except (urllib.error.URLError, OSError):
+            # Connection failures and timeouts count as errors with status 599
+            status_code, raw = 599, b''
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with self.lock:
+            self.samples.setdefault(label, []).append((elapsed_ms, status_code))
+        try:
+            return status_code, json.loads(raw) if raw else None
+        except ValueError:
+            return status_code, None
+
+
+class Command(BaseCommand):
+    help = 'Replays a realistic API workload over HTTP and reports per-endpoint latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of a running server; by default runserver is started')
+        parser.add_argument('--port', type=int, default=8765, help='Port for the runserver started without --url')
+        parser.add_argument('--students', type=int, default=50, help='Simulated students to log in')
+        parser.add_argument('--faculty', type=int, default=10, help='Simulated mentors to log in (plus their HODs)')
+        parser.add_argument('--password', default='loadtest123', help='Password of the @load.test accounts')
+        parser.add_argument('--concurrency', type=int, default=20, help='Concurrent client threads')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to run the mix for')
+        parser.add_argument('--requests', type=int, help='Stop after this many operations instead')
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+        parser.add_argument('--seed', type=int, help='Random seed for the operation mix')
+        parser.add_argument('--output', help='Write the results as a JSON baseline to this file')
+        parser.add_argument('--compare', help='Compare with a JSON baseline and fail on regressions')
+        parser.add_argument(
+            '--tolerance', type=float, default=20,
+            help='Allowed p50/p95/p99 increase over the baseline, in percent',
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        students, mentors, hods = self.pick_accounts(options['students'], options['faculty'])
+
+        server = None
+        base_url = options['url']
+        if not base_url:
+            base_url = f'http://127.0.0.1:{options["port"]}'
+            server = self.start_server(options['port'])
+        try:
+            client = Client(base_url, options['timeout'])
+            self.log_in(client, students + mentors + hods, options['password'])
+            # Logins are reported, but the mix's throughput is measured on its own
+            login_samples = client.samples.pop('login', [])
+            self.stdout.write(f'Logged in {len(students)} students, {len(mentors)} mentors and {len(hods)} HODs')
+
+            elapsed = self.run_mix(client, students, mentors, hods, options)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+        results = self.build_results(client.samples, login_samples, elapsed, options)
+        self.report(results)
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(f'Saved results to {options["output"]}')
+
+        if options['compare']:
+            self.compare(results, options['compare'], options['tolerance'])
+
+    def pick_accounts(self, student_count, mentor_count):
+        """Choose generated students, mentors of their departments and those departments' HODs."""
+        students = list(
+            Student.objects.filter(user__email__endswith=f'@{LOAD_DOMAIN}', user__is_active=True)
+            .select_related('user')
+            .order_by('user__email')[:student_count]
+        )
+        if not students:
+            raise CommandError('No @load.test students found, run generate_load_data first')
+
+        departments = {student.department for student in students}
+        faculty = (
+            Faculty.objects.filter(
+                user__email__endswith=f'@{LOAD_DOMAIN}', user__is_active=True, department__in=departments
+            )
+            .select_related('user')
+            .order_by('user__email')
+        )
+        mentors = [profile for profile in faculty if not profile.is_hod][:mentor_count]
+        hods = [profile for profile in faculty if profile.is_hod]
+        if not mentors or not hods:
+            raise CommandError('The load test needs @load.test mentors and HODs in the students\' departments')
+
+        return (
+            [{'email': s.user.email, 'role': 'Student', 'department': s.department} for s in students],
+            [{'email': f.user.email, 'role': 'Faculty', 'department': f.department, 'id': str(f.user_id)}
+             for f in mentors],
+            [{'email': f.user.email, 'role': 'Faculty', 'department': f.department} for f in hods],
+        )
+
+    def start_server(self, port):
+        """Start runserver on the port and wait until it accepts connections."""
+        process = subprocess.Popen(
+            [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{port}', '--noreload'],
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f'runserver exited with status {process.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                self.stdout.write(f'Started runserver on port {port}')
+                return process
+            except OSError:
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError(f'runserver did not start listening on port {port}')
+
+    def log_in(self, client, accounts, password):
+        """Log every account in through the login endpoint and keep its access token."""
+        def log_in_one(account):
+            status_code, payload = client.call('login', 'POST', '/api/auth/login/', body={
+                'email': account['email'], 'password': password, 'role': account['role'],
+            })
+            if status_code != 200:
+                raise CommandError(f'Login failed for {account["email"]} with status {status_code}')
+            account['token'] = payload['token']
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(log_in_one, accounts))
+
+    def run_mix(self, client, students, mentors, hods, options):
+        """Replay the weighted operation mix from the client threads; returns the elapsed seconds."""
+        mentors_by_department = {}
+        for mentor in mentors:
+            mentors_by_department.setdefault(mentor['department'], []).append(mentor)
+        for student in students:
+            # Slots far in the future, one period each, so creates don't overlap earlier data
+            student['mentors'] = mentors_by_department.get(student['department']) or mentors
+            student['slot'] = self.rng.randrange(0, 8 * 3650, 8)
+        first_date = timezone.localdate() + timedelta(days=30)
+
+        operations = list(OPERATION_WEIGHTS)
+        weights = list(OPERATION_WEIGHTS.values())
+        budget = {'remaining': options['requests']}
+        budget_lock = threading.Lock()
+        slot_lock = threading.Lock()
+        everyone = students + mentors + hods
+        deadline = time.monotonic() + options['duration']
+
+        def next_operation(rng):
+            if options['requests'] is not None:
+                with budget_lock:
+                    if budget['remaining'] <= 0:
+                        return None
+                    budget['remaining'] -= 1
+            elif time.monotonic() >= deadline:
+                return None
+            return rng.choices(operations, weights)[0]
+
+        def create(rng, student):
+            with slot_lock:
+                slot = student['slot']
+                student['slot'] += 1
+            mentor = rng.choice(student['mentors'])
+            client.call('create', 'POST', '/api/attendance/requests/', student['token'], {
+                'date': (first_date + timedelta(days=slot // 8)).isoformat(),
+                'periods': [slot % 8 + 1],
+                'periodFacultyMapping': {str(slot % 8 + 1): mentor['id']},
+                'eventCoordinator': mentor['email'],
+                'eventCoordinatorFacultyId': mentor['id'],
+                'proofFaculty': mentor['email'],
+                'purpose': PURPOSES[slot % len(PURPOSES)],
+            })
+
+        def approve(rng, reviewer, label, new_status):
+            status_code, payload = client.call(f'{label}_queue', 'GET', '/api/attendance/requests/', reviewer['token'])
+            queue = (payload or {}).get('results') or []
+            if status_code == 200 and queue:
+                # Pick at random so reviewers sharing a queue rarely race for the same row
+                request_id = rng.choice(queue)['id']
+                client.call(label, 'PATCH', f'/api/attendance/requests/{request_id}/status/', reviewer['token'],
+                            {'status': new_status})
+
+        def worker(seed):
+            rng = random.Random(seed)
+            while True:
+                operation = next_operation(rng)
+                if operation is None:
+                    return
+                if operation == 'create':
+                    create(rng, rng.choice(students))
+                elif operation == 'list':
+                    user = rng.choice(everyone)
+                    query = '?history=true' if user['role'] == 'Faculty' else ''
+                    client.call('list', 'GET', f'/api/attendance/requests/{query}', user['token'])
+                elif operation == 'statistics':
+                    client.call('statistics', 'GET', '/api/attendance/statistics/', rng.choice(everyone)['token'])
+                elif operation == 'mentor_approve':
+                    approve(rng, rng.choice(mentors), 'mentor_approve', 'PENDING_HOD')
+                else:
+                    approve(rng, rng.choice(hods), 'hod_approve', 'APPROVED')
+
+        self.stdout.write(f'Running the mix with {options["concurrency"]} clients...')
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            seeds = [self.rng.getrandbits(64) for _ in range(options['concurrency'])]
+            for future in [pool.submit(worker, seed) for seed in seeds]:
+                future.result()
+        return time.perf_counter() - started
+
+    def build_results(self, samples, login_samples, elapsed, options):
+        """Assemble the JSON document that is printed, saved and compared."""
+        everything = [sample for endpoint_samples in samples.values() for sample in endpoint_samples]
+        endpoints = {label: summarize(endpoint_samples, elapsed) for label, endpoint_samples in sorted(samples.items())}
+        endpoints['login'] = summarize(login_samples, None)
+        return {
+            'createdAt': timezone.now().isoformat(),
+            'commit': self.current_commit(),
+            'settings': {
+                key: options[key] for key in ('url', 'students', 'faculty', 'concurrency', 'duration', 'requests', 'seed')
+            },
+            'elapsedSeconds': round(elapsed, 2),
+            'total': summarize(everything, elapsed),
+            'endpoints': endpoints,
+        }
+
+    def current_commit(self):
+        """The git commit being measured, when the code runs from a checkout."""
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def report(self, results):
+        """Print one line per endpoint and the overall totals."""
+        header = f'{"endpoint":<22}{"count":>8}{"err%":>7}{"req/s":>9}' + ''.join(
+            f'{f"p{pct}":>9}' for pct in PERCENTILES
+        ) + f'{"max":>9}'
+        self.stdout.write(header)
+        rows = list(results['endpoints'].items()) + [('TOTAL', results['total'])]
+        for label, summary in rows:
+            if not summary['count']:
+                continue
+            self.stdout.write(
+                f'{label:<22}{summary["count"]:>8}{summary["errorRate"] * 100:>6.1f}%{summary["throughput"]:>9}'
+                + ''.join(f'{summary[f"p{pct}Ms"]:>9.1f}' for pct in PERCENTILES)
+                + f'{summary["maxMs"]:>9.1f}'
+            )
+        self.stdout.write(f'Latencies in ms over {results["elapsedSeconds"]}s')
+
+    def compare(self, results, baseline_path, tolerance):
+        """Compare percentiles with a saved baseline; raise when any exceeds the tolerance."""
+        try:
+            with open(baseline_path) as handle:
+                baseline = json.load(handle)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Cannot read baseline {baseline_path}: {error}')
+
+        regressions = []
+        for label, summary in results['endpoints'].items():
+            previous = baseline.get('endpoints', {}).get(label)
+            if not previous or not summary['count'] or not previous.get('count'):
+                continue
+            for pct in (50, 95, 99):
+                before, after = previous[f'p{pct}Ms'], summary[f'p{pct}Ms']
+                change = (after - before) / before * 100 if before else 0
+                line = f'{label} p{pct}: {before:.1f}ms -> {after:.1f}ms ({change:+.1f}%)'
+                if change > tolerance:
+                    regressions.append(line)
+                    self.stdout.write(self.style.ERROR(line))
+                else:
+                    self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} percentile(s) regressed more than {tolerance}% against '
+                f'{baseline_path} (commit {baseline.get("commit")})'
+            )
+        self.stdout.write(self.style.SUCCESS(f'✓ No regressions against {baseline_path}'))
@@ -0,0 +1,88 @@
+"""
+Management command to rebuild and verify the daily analytics rollups.
+
+Usage:
+    python manage.py rebuild_rollups                     # rebuild every date after the archive
+    python manage.py rebuild_rollups --since 2026-09-01  # only dates from this day on
+    python manage.py rebuild_rollups --verify            # only report drift
+
+Run it nightly (e.g. from cron) to reconcile the incrementally maintained
+rollups with attendance_requests. Dates up to the end of the archive are
+skipped: their archived requests are only counted in the rollups.
+"""
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from attendance.archive import archived_through
+from attendance.models import PeriodDailyRollup, RequestDailyRollup
+from attendance.rollups import DAILY_KEY, PERIOD_KEY, expected_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily analytics rollups from attendance_requests and verifies them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only rebuild dates from this day on (YYYY-MM-DD)')
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare rollups with a fresh count; exit with an error on drift',
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--since must be in YYYY-MM-DD format')
+        latest_archived = archived_through()
+        if latest_archived is not None and (since is None or since <= latest_archived):
+            since = latest_archived + timedelta(days=1)
+            self.stdout.write(f'Skipping archived dates before {since}')
+
+        tables = ((RequestDailyRollup, DAILY_KEY), (PeriodDailyRollup, PERIOD_KEY))
+        with transaction.atomic():
+            if connection.vendor == 'postgresql' and not options['verify']:
+                # Writers queue behind these locks, then apply their deltas on top of the rebuilt rows
+                with connection.cursor() as cursor:
+                    for model, _ in tables:
+                        cursor.execute(f'LOCK TABLE {model._meta.db_table} IN EXCLUSIVE MODE')
+
+            drift_total = 0
+            rebuilt = []
+            for (model, key_fields), expected in zip(tables, expected_rollups(since)):
+                rows = model.objects.all()
+                if since:
+                    rows = rows.filter(date__gte=since)
+                stored = {tuple(row[:-1]): row[-1] for row in rows.values_list(*key_fields, 'count')}
+
+                drift = sorted(
+                    (key, stored.get(key, 0), expected.get(key, 0))
+                    for key in set(stored) | set(expected)
+                    if stored.get(key, 0) != expected.get(key, 0)
+                )
+                for key, stored_count, expected_count in drift:
+                    label = ' '.join(str(part) for part in key)
+                    self.stdout.write(f'  {model._meta.db_table} {label}: stored {stored_count}, expected {expected_count}')
+                drift_total += len(drift)
+
+                if not options['verify']:
+                    rows.delete()
+                    model.objects.bulk_create(
+                        [model(count=count, **dict(zip(key_fields, key))) for key, count in expected.items() if count],
+                        batch_size=1000,
+                    )
+                rebuilt.append(len(expected))
+
+            if options['verify']:
+                if drift_total:
+                    raise CommandError(f'{drift_total} rollup row(s) out of date, run rebuild_rollups to rebuild')
+                self.stdout.write(self.style.SUCCESS(f'✓ {sum(rebuilt)} rollup rows verified'))
+                return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Rebuilt {rebuilt[0]} daily and {rebuilt[1]} period rollup rows ({drift_total} corrected)'
+        ))
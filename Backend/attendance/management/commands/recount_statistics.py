@@ -0,0 +1,64 @@
+"""
+Management command to rebuild and verify the maintained statistics counters.
+
+Usage:
+    python manage.py recount_statistics           # rebuild counters
+    python manage.py recount_statistics --verify  # only report drift
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from attendance.counters import expected_counters
+from attendance.models import RequestStatusCounter
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the request status counters from attendance_requests and verifies them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare counters with a fresh count; exit with an error on drift',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql' and not options['verify']:
+                # Writers queue behind this lock, then apply their deltas on top of the rebuilt counts
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LOCK TABLE {RequestStatusCounter._meta.db_table} IN EXCLUSIVE MODE')
+
+            expected = expected_counters()
+            stored = {
+                (counter.scope, counter.status): counter.count
+                for counter in RequestStatusCounter.objects.all()
+            }
+
+            drift = sorted(
+                (key, stored.get(key, 0), expected.get(key, 0))
+                for key in set(stored) | set(expected)
+                if stored.get(key, 0) != expected.get(key, 0)
+            )
+            for (scope, status), stored_count, expected_count in drift:
+                self.stdout.write(f'  {scope} {status}: stored {stored_count}, expected {expected_count}')
+
+            if options['verify']:
+                if drift:
+                    raise CommandError(f'{len(drift)} counter(s) out of date, run recount_statistics to rebuild')
+                self.stdout.write(self.style.SUCCESS(f'✓ {len(stored)} counters verified'))
+                return
+
+            RequestStatusCounter.objects.all().delete()
+            RequestStatusCounter.objects.bulk_create(
+                [
+                    RequestStatusCounter(scope=scope, status=status, count=count)
+                    for (scope, status), count in expected.items()
+                    if count
+                ],
+                batch_size=1000,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Rebuilt {len(expected)} counters ({len(drift)} corrected)'
+        ))
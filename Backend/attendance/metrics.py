@@ -0,0 +1,107 @@
+"""
+Prometheus metrics for API and workflow health.
+
+Counters and histograms are updated in-process by the request
+instrumentation middleware, the status-change views and the notification
+worker. Under gunicorn, set ``PROMETHEUS_MULTIPROC_DIR`` to a
+directory shared by the workers (and the ``deliver_notifications`` worker);
+prometheus_client then keeps each process's values in memory-mapped files
+and ``/metrics`` merges them, so every worker reports the same totals.
+
+Queue depths are not tracked in-process: they are read at scrape time from
+the maintained statistics counters, one indexed query per scrape.
+"""
+import os
+
+from django.db import transaction
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from .counters import ALL_SCOPE, scope_counts
+from .models import NotificationOutbox
+
+REQUEST_LATENCY = Histogram(
+    'attendance_http_request_duration_seconds',
+    'API request latency by URL name',
+    ['view', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+REQUEST_QUERIES = Histogram(
+    'attendance_http_request_db_queries',
+    'SQL queries run per API request by URL name',
+    ['view'],
+    buckets=(1, 2, 3, 5, 8, 13, 20, 50, 100),
+)
+
+STATUS_TRANSITIONS = Counter(
+    'attendance_request_transitions_total',
+    'Attendance request status changes applied by mentors and HODs',
+    ['from_status', 'to_status'],
+)
+
+NOTIFICATION_EMAILS = Counter(
+    'attendance_notification_emails_total',
+    'Approval notification emails by delivery outcome',
+    ['outcome'],
+)
+
+QUEUE_STATUSES = ('PENDING_MENTOR', 'PENDING_HOD')
+
+
+def observe_request(view, method, status_code, seconds, queries):
+    """Record one handled request; ``view`` is its URL name."""
+    view = view or 'unmatched'
+    REQUEST_LATENCY.labels(view, method, str(status_code)).observe(seconds)
+    REQUEST_QUERIES.labels(view).observe(queries)
+
+
+def record_status_transitions(from_status, to_status, count=1):
+    """Count status changes once the surrounding transaction commits."""
+    if count:
+        transaction.on_commit(lambda: STATUS_TRANSITIONS.labels(from_status, to_status).inc(count))
+
+
+def record_email_deliveries(sent, failed):
+    """Count emails the notification worker sent and failed to send."""
+    if sent:
+        NOTIFICATION_EMAILS.labels('sent').inc(sent)
+    if failed:
+        NOTIFICATION_EMAILS.labels('failed').inc(failed)
+
+
+class WorkflowCollector:
+    """Queue depth gauges read from the database at scrape time."""
+
+    def collect(self):
+        counts = scope_counts(ALL_SCOPE)
+        queue = GaugeMetricFamily(
+            'attendance_requests_queue_depth',
+            'Attendance requests waiting for review, by status',
+            labels=['status'],
+        )
+        for status in QUEUE_STATUSES:
+            queue.add_metric([status], counts[status])
+        yield queue
+
+        yield GaugeMetricFamily(
+            'attendance_notification_outbox_pending',
+            'Notification emails waiting in the outbox',
+            value=NotificationOutbox.objects.filter(status='PENDING').count(),
+        )
+
+
+def render_metrics():
+    """Return (body, content type) for a scrape, merging worker files in multiprocess mode."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    workflow = CollectorRegistry(auto_describe=False)
+    workflow.register(WorkflowCollector())
+    return generate_latest(registry) + generate_latest(workflow), CONTENT_TYPE_LATEST
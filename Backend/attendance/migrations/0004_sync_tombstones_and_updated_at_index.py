@@ -0,0 +1,70 @@
+# Generated by Django 4.2.30 on 2026-10-16 20:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('attendance', '0003_auto_20251025_1306'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRequestTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('request_id', models.UUIDField(help_text='ID of the deleted attendance request')),
+                ('student_id', models.UUIDField(blank=True, null=True)),
+                ('event_coordinator_faculty_id', models.UUIDField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Attendance Request Tombstone',
+                'verbose_name_plural': 'Attendance Request Tombstones',
+                'db_table': 'attendance_request_tombstones',
+            },
+        ),
+        migrations.AddField(
+            model_name='attendancerequest',
+            name='bulk_students',
+            field=models.JSONField(blank=True, default=list, help_text='Array of student objects with registerNumber and name for bulk requests'),
+        ),
+        migrations.AddField(
+            model_name='attendancerequest',
+            name='created_by',
+            field=models.ForeignKey(blank=True, help_text='Faculty who created the bulk request', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_bulk_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='attendancerequest',
+            name='is_bulk_request',
+            field=models.BooleanField(default=False, help_text='True if this is a bulk request for multiple students'),
+        ),
+        migrations.AlterField(
+            model_name='attendancerequest',
+            name='period_faculty_mapping',
+            field=models.JSONField(default=dict, help_text="Mapping of period to faculty ID e.g., {'1': 'faculty-id-1', '2': 'faculty-id-2'}"),
+        ),
+        migrations.AlterField(
+            model_name='attendancerequest',
+            name='student',
+            field=models.ForeignKey(blank=True, help_text='For single student requests only', limit_choices_to={'role': 'Student'}, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attendance_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='groups',
+            field=models.ManyToManyField(blank=True, related_name='custom_user_set', related_query_name='custom_user', to='auth.group'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='user_permissions',
+            field=models.ManyToManyField(blank=True, related_name='custom_user_set', related_query_name='custom_user', to='auth.permission'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerequest',
+            index=models.Index(fields=['updated_at'], name='attendance__updated_54b8e7_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.30 on 2026-10-16 20:58
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    """Seed counters from the existing attendance requests."""
+    AttendanceRequest = apps.get_model('attendance', 'AttendanceRequest')
+    RequestStatusCounter = apps.get_model('attendance', 'RequestStatusCounter')
+    requests = AttendanceRequest.objects.order_by()
+    
+    counters = [
+        RequestStatusCounter(scope='all', status=row['status'], count=row['n'])
+        for row in requests.values('status').annotate(n=Count('pk'))
+    ]
+    counters += [
+        RequestStatusCounter(scope=f"student:{row['student_id']}", status=row['status'], count=row['n'])
+        for row in requests.filter(student__isnull=False).values('student_id', 'status').annotate(n=Count('pk'))
+    ]
+    counters += [
+        RequestStatusCounter(scope=f"coordinator:{row['event_coordinator_faculty_id']}", status=row['status'], count=row['n'])
+        for row in requests.filter(event_coordinator_faculty__isnull=False)
+        .values('event_coordinator_faculty_id', 'status').annotate(n=Count('pk'))
+    ]
+    RequestStatusCounter.objects.bulk_create(counters, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_sync_tombstones_and_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestStatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('PENDING_MENTOR', 'Pending (Mentor)'), ('PENDING_HOD', 'Pending (HOD)'), ('APPROVED', 'Approved'), ('DECLINED', 'Declined')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Request Status Counter',
+                'verbose_name_plural': 'Request Status Counters',
+                'db_table': 'request_status_counters',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='requeststatuscounter',
+            constraint=models.UniqueConstraint(fields=('scope', 'status'), name='unique_request_status_counter'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-16 21:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='context',
+            field=models.JSONField(blank=True, default=dict, help_text='Extra data used to render digests'),
+        ),
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='digest_key',
+            field=models.CharField(blank=True, db_index=True, help_text="Digest items sharing a key ('<faculty id>:<date>') are sent as one email", max_length=100, null=True),
+        ),
+    ]
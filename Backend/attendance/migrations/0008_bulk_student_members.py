@@ -0,0 +1,59 @@
+# Generated by Django 4.2.30 on 2026-10-16 21:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def backfill_members(apps, schema_editor):
+    """Copy bulk_students of existing bulk requests into member rows."""
+    AttendanceRequest = apps.get_model('attendance', 'AttendanceRequest')
+    BulkStudentMember = apps.get_model('attendance', 'BulkStudentMember')
+    Student = apps.get_model('attendance', 'Student')
+    users_by_register_number = dict(Student.objects.values_list('student_id', 'user_id'))
+    
+    members = []
+    bulk_requests = AttendanceRequest.objects.filter(is_bulk_request=True).only('id', 'bulk_students')
+    for attendance_request in bulk_requests.iterator(chunk_size=1000):
+        if not isinstance(attendance_request.bulk_students, list):
+            continue
+        for entry in attendance_request.bulk_students:
+            if not isinstance(entry, dict):
+                continue
+            register_number = str(entry.get('registerNumber', '')).strip()
+            if not register_number:
+                continue
+            members.append(BulkStudentMember(
+                attendance_request_id=attendance_request.id,
+                register_number=register_number,
+                name=str(entry.get('name', ''))[:255],
+                user_id=users_by_register_number.get(register_number),
+            ))
+    BulkStudentMember.objects.bulk_create(members, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_notification_digests'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkStudentMember',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('register_number', models.CharField(db_index=True, max_length=50)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('attendance_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='attendance.attendancerequest')),
+                ('user', models.ForeignKey(blank=True, help_text='Student account with this register number, if registered', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bulk_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Bulk Student Member',
+                'verbose_name_plural': 'Bulk Student Members',
+                'db_table': 'bulk_student_members',
+            },
+        ),
+        migrations.RunPython(backfill_members, migrations.RunPython.noop),
+    ]
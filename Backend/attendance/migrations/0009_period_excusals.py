@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-16 21:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def backfill_excusals(apps, schema_editor):
+    """Create excusals for requests that were approved before this table existed."""
+    AttendanceRequest = apps.get_model('attendance', 'AttendanceRequest')
+    PeriodExcusal = apps.get_model('attendance', 'PeriodExcusal')
+    User = apps.get_model('attendance', 'User')
+    faculty_ids = set(User.objects.filter(role='Faculty').values_list('id', flat=True))
+    
+    excusals = []
+    approved = AttendanceRequest.objects.filter(status='APPROVED').only('id', 'date', 'periods', 'period_faculty_mapping')
+    for attendance_request in approved.iterator(chunk_size=1000):
+        for period, faculty_id in (attendance_request.period_faculty_mapping or {}).items():
+            try:
+                period = int(period)
+                faculty_id = uuid.UUID(str(faculty_id))
+            except (TypeError, ValueError):
+                continue
+            if faculty_id in faculty_ids and period in (attendance_request.periods or []):
+                excusals.append(PeriodExcusal(
+                    attendance_request_id=attendance_request.id,
+                    faculty_id=faculty_id,
+                    date=attendance_request.date,
+                    period=period,
+                ))
+    PeriodExcusal.objects.bulk_create(excusals, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_bulk_student_members'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodExcusal',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('period', models.PositiveSmallIntegerField(help_text='Period number 1-8')),
+                ('attendance_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='excusals', to='attendance.attendancerequest')),
+                ('faculty', models.ForeignKey(help_text='Faculty teaching the period', limit_choices_to={'role': 'Faculty'}, on_delete=django.db.models.deletion.CASCADE, related_name='period_excusals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Period Excusal',
+                'verbose_name_plural': 'Period Excusals',
+                'db_table': 'period_excusals',
+                'indexes': [models.Index(fields=['faculty', 'date'], name='period_excu_faculty_cdcb70_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='periodexcusal',
+            constraint=models.UniqueConstraint(fields=('attendance_request', 'period'), name='unique_period_excusal'),
+        ),
+        migrations.RunPython(backfill_excusals, migrations.RunPython.noop),
+    ]
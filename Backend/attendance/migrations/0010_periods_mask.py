@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-16 21:05
+
+from django.db import migrations, models
+
+
+def backfill_periods_mask(apps, schema_editor):
+    """Compute periods_mask for existing requests."""
+    AttendanceRequest = apps.get_model('attendance', 'AttendanceRequest')
+    batch = []
+    for attendance_request in AttendanceRequest.objects.only('id', 'periods').iterator(chunk_size=1000):
+        mask = 0
+        for period in attendance_request.periods or []:
+            if isinstance(period, int) and 1 <= period <= 8:
+                mask |= 1 << (period - 1)
+        attendance_request.periods_mask = mask
+        batch.append(attendance_request)
+        if len(batch) >= 1000:
+            AttendanceRequest.objects.bulk_update(batch, ['periods_mask'])
+            batch = []
+    AttendanceRequest.objects.bulk_update(batch, ['periods_mask'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0009_period_excusals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancerequest',
+            name='periods_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Bitmask of periods (bit 0 = period 1), kept in sync with periods on save'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerequest',
+            index=models.Index(fields=['student', 'date'], name='attendance__student_17f1a8_idx'),
+        ),
+        migrations.RunPython(backfill_periods_mask, migrations.RunPython.noop),
+    ]
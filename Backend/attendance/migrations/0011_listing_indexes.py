@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-16 21:20
+
+from django.db import migrations, models
+
+from attendance.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; building the
+    # indexes this way keeps attendance_requests writable during the migration
+    atomic = False
+
+    dependencies = [
+        ('attendance', '0010_periods_mask'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='attendancerequest',
+            index=models.Index(condition=models.Q(('status', 'PENDING_MENTOR')), fields=['event_coordinator_faculty', '-created_at', 'id'], name='attreq_mentor_queue_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='attendancerequest',
+            index=models.Index(fields=['event_coordinator_faculty', '-created_at', 'id'], name='attreq_coordinator_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='attendancerequest',
+            index=models.Index(condition=models.Q(('status', 'PENDING_HOD')), fields=['-created_at', 'id'], name='attreq_hod_queue_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='attendancerequest',
+            index=models.Index(fields=['student', '-created_at', 'id'], name='attreq_student_recent_idx'),
+        ),
+    ]
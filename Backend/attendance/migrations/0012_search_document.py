@@ -0,0 +1,73 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:10
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+
+def backfill_search_document(apps, schema_editor):
+    """Build search_document for existing requests."""
+    AttendanceRequest = apps.get_model('attendance', 'AttendanceRequest')
+    batch = []
+    requests = AttendanceRequest.objects.select_related('student').only(
+        'id', 'purpose', 'event_coordinator', 'proof_faculty', 'bulk_students',
+        'student__first_name', 'student__last_name', 'student__username',
+    )
+    for attendance_request in requests.iterator(chunk_size=1000):
+        student = attendance_request.student
+        parts = [
+            attendance_request.purpose,
+            attendance_request.event_coordinator,
+            attendance_request.proof_faculty,
+            (f'{student.first_name} {student.last_name}'.strip() or student.username) if student else '',
+        ]
+        bulk_students = attendance_request.bulk_students
+        for entry in bulk_students if isinstance(bulk_students, list) else []:
+            if isinstance(entry, dict):
+                parts += [entry.get('name', ''), entry.get('registerNumber', '')]
+        attendance_request.search_document = ' '.join(str(part).strip() for part in parts if part).lower()
+        batch.append(attendance_request)
+        if len(batch) >= 1000:
+            AttendanceRequest.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    AttendanceRequest.objects.bulk_update(batch, ['search_document'])
+
+
+def search_index():
+    # Must match attendance.search.search_vector() for the planner to use it
+    return GinIndex(SearchVector('search_document', config='simple'), name='attreq_search_idx')
+
+
+def add_search_index(apps, schema_editor):
+    """GIN index over the search tsvector; PostgreSQL only, SQLite searches with LIKE."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    AttendanceRequest = apps.get_model('attendance', 'AttendanceRequest')
+    schema_editor.add_index(AttendanceRequest, search_index(), concurrently=True)
+
+
+def remove_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    AttendanceRequest = apps.get_model('attendance', 'AttendanceRequest')
+    schema_editor.remove_index(AttendanceRequest, search_index(), concurrently=True)
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('attendance', '0011_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancerequest',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Searchable text of the request (see build_search_document), kept in sync on save'),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(add_search_index, remove_search_index),
+    ]
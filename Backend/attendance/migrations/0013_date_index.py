@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+from attendance.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('attendance', '0012_search_document'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='attendancerequest',
+            index=models.Index(fields=['date'], name='attreq_date_idx'),
+        ),
+    ]
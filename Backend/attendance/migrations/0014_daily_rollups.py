@@ -0,0 +1,95 @@
+# Generated by Django 4.2.30 on 2026-10-16 22:36
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def backfill_rollups(apps, schema_editor):
+    """Seed the daily and period rollups from the existing attendance requests."""
+    AttendanceRequest = apps.get_model('attendance', 'AttendanceRequest')
+    RequestDailyRollup = apps.get_model('attendance', 'RequestDailyRollup')
+    PeriodDailyRollup = apps.get_model('attendance', 'PeriodDailyRollup')
+    requests = AttendanceRequest.objects.order_by()
+    department = F('student__student_profile__department')
+    
+    daily = {}
+    rows = requests.values('date', 'event_coordinator_faculty_id', 'status', department=department)
+    for row in rows.annotate(n=Count('pk')):
+        key = (row['date'], row['department'] or '', row['event_coordinator_faculty_id'], row['status'])
+        daily[key] = daily.get(key, 0) + row['n']
+    RequestDailyRollup.objects.bulk_create(
+        [
+            RequestDailyRollup(date=date, department=dept, coordinator_id=coordinator_id, status=status, count=count)
+            for (date, dept, coordinator_id, status), count in daily.items()
+        ],
+        batch_size=1000,
+    )
+    
+    periods = {}
+    for period in range(1, 9):
+        bit = 1 << (period - 1)
+        rows = (
+            requests.annotate(bit=F('periods_mask').bitand(bit)).filter(bit=bit)
+            .values('date', 'status', department=department)
+        )
+        for row in rows.annotate(n=Count('pk')):
+            key = (row['date'], row['department'] or '', period, row['status'])
+            periods[key] = periods.get(key, 0) + row['n']
+    PeriodDailyRollup.objects.bulk_create(
+        [
+            PeriodDailyRollup(date=date, department=dept, period=period, status=status, count=count)
+            for (date, dept, period, status), count in periods.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0013_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('department', models.CharField(blank=True, max_length=255)),
+                ('period', models.PositiveSmallIntegerField()),
+                ('status', models.CharField(choices=[('PENDING_MENTOR', 'Pending (Mentor)'), ('PENDING_HOD', 'Pending (HOD)'), ('APPROVED', 'Approved'), ('DECLINED', 'Declined')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Period Daily Rollup',
+                'verbose_name_plural': 'Period Daily Rollups',
+                'db_table': 'period_daily_rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='RequestDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('department', models.CharField(blank=True, max_length=255)),
+                ('coordinator_id', models.UUIDField(blank=True, help_text='Event coordinator faculty user ID', null=True)),
+                ('status', models.CharField(choices=[('PENDING_MENTOR', 'Pending (Mentor)'), ('PENDING_HOD', 'Pending (HOD)'), ('APPROVED', 'Approved'), ('DECLINED', 'Declined')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Request Daily Rollup',
+                'verbose_name_plural': 'Request Daily Rollups',
+                'db_table': 'request_daily_rollups',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='requestdailyrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'department', 'coordinator_id', 'status'), name='unique_request_daily_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='perioddailyrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'department', 'period', 'status'), name='unique_period_daily_rollup'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
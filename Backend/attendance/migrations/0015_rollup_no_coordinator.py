@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-17 09:12
+
+import uuid
+
+from django.db import migrations, models
+
+
+def merge_null_coordinators(apps, schema_editor):
+    """Fold rows without a coordinator (possibly duplicated) into one NO_COORDINATOR row per key."""
+    RequestDailyRollup = apps.get_model('attendance', 'RequestDailyRollup')
+    rows = RequestDailyRollup.objects.filter(coordinator_id__isnull=True)
+    merged = {}
+    for date, department, status, count in rows.values_list('date', 'department', 'status', 'count'):
+        key = (date, department, status)
+        merged[key] = merged.get(key, 0) + count
+    rows.delete()
+    RequestDailyRollup.objects.bulk_create(
+        [
+            RequestDailyRollup(date=date, department=department, coordinator_id=uuid.UUID(int=0), status=status, count=count)
+            for (date, department, status), count in merged.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0014_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_null_coordinators, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='requestdailyrollup',
+            name='coordinator_id',
+            field=models.UUIDField(default=uuid.UUID('00000000-0000-0000-0000-000000000000'), help_text='Event coordinator faculty user ID (NO_COORDINATOR without one)'),
+        ),
+    ]
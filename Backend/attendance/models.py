@@ -5,6 +5,7 @@ Based on requirements from BACKEND_INTEGRATION.md
 """
 import uuid
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinLengthValidator
 
@@ -128,6 +129,37 @@ class Student(models.Model):
         return f"{self.user.name} ({self.student_id})"
 
 
+def periods_to_mask(periods):
+    """Pack a list of period numbers (1-8) into a bitmask, bit 0 = period 1."""
+    mask = 0
+    for period in periods or []:
+        if isinstance(period, int) and 1 <= period <= 8:
+            mask |= 1 << (period - 1)
+    return mask
+
+
+def mask_to_periods(mask):
+    """Unpack a period bitmask into a sorted list of period numbers."""
+    return [period for period in range(1, 9) if mask & (1 << (period - 1))]
+
+
+# Fields the search document is built from; saving any of them rebuilds it
+SEARCH_SOURCE_FIELDS = {'purpose', 'event_coordinator', 'proof_faculty', 'student', 'bulk_students'}
+
+
+def build_search_document(purpose, event_coordinator, proof_faculty, student_name='', bulk_students=None):
+    """
+    Flatten the searchable text of a request into one lower-cased document:
+    purpose, coordinator and proof faculty names, the student's name and the
+    names and register numbers of bulk members.
+    """
+    parts = [purpose, event_coordinator, proof_faculty, student_name]
+    for entry in bulk_students if isinstance(bulk_students, list) else []:
+        if isinstance(entry, dict):
+            parts += [entry.get('name', ''), entry.get('registerNumber', '')]
+    return ' '.join(str(part).strip() for part in parts if part).lower()
+
+
 class AttendanceRequest(models.Model):
     """
     Attendance Request model for two-tier approval workflow.
@@ -186,6 +218,11 @@ class AttendanceRequest(models.Model):
         default=list,
         help_text="Array of period numbers [1-8] e.g., [1, 2, 3, 4]"
     )
+    periods_mask = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        help_text="Bitmask of periods (bit 0 = period 1), kept in sync with periods on save"
+    )
     period_faculty_mapping = models.JSONField(
         default=dict,
         help_text="Mapping of period to faculty ID e.g., {'1': 'faculty-id-1', '2': 'faculty-id-2'}"
@@ -226,6 +263,12 @@ class AttendanceRequest(models.Model):
         blank=True,
         help_text="URL to uploaded proof document (future feature)"
     )
+    search_document = models.TextField(
+        default='',
+        blank=True,
+        editable=False,
+        help_text="Searchable text of the request (see build_search_document), kept in sync on save"
+    )
     
     # Tracking fields
     created_at = models.DateTimeField(auto_now_add=True)
@@ -240,6 +283,27 @@ class AttendanceRequest(models.Model):
             models.Index(fields=['student', 'status']),
             models.Index(fields=['status', 'date']),
             models.Index(fields=['-created_at']),
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['student', 'date']),
+            # Listing shapes, newest first with the cursor pagination tiebreak
+            # (checked by the explain_hot_queries command)
+            models.Index(
+                fields=['event_coordinator_faculty', '-created_at', 'id'],
+                condition=models.Q(status='PENDING_MENTOR'),
+                name='attreq_mentor_queue_idx',
+            ),
+            models.Index(
+                fields=['event_coordinator_faculty', '-created_at', 'id'],
+                name='attreq_coordinator_recent_idx',
+            ),
+            models.Index(
+                fields=['-created_at', 'id'],
+                condition=models.Q(status='PENDING_HOD'),
+                name='attreq_hod_queue_idx',
+            ),
+            models.Index(fields=['student', '-created_at', 'id'], name='attreq_student_recent_idx'),
+            # Admin date hierarchy: min/max and per-year/month drill-down ranges
+            models.Index(fields=['date'], name='attreq_date_idx'),
         ]
     
     def __str__(self):
@@ -292,4 +356,288 @@ class AttendanceRequest(models.Model):
             from django.core.exceptions import ValidationError
             raise ValidationError("Reason is required when status is DECLINED")
         
+        self.periods_mask = periods_to_mask(self.periods)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'periods' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'periods_mask'}
+        
+        if update_fields is None or SEARCH_SOURCE_FIELDS & set(update_fields):
+            self.search_document = build_search_document(
+                self.purpose, self.event_coordinator, self.proof_faculty,
+                self.student.name if self.student_id else '', self.bulk_students,
+            )
+            if update_fields is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'search_document'}
+        
         super().save(*args, **kwargs)
+    
+    def build_members(self):
+        """
+        Build (unsaved) BulkStudentMember rows from bulk_students, linking
+        each register number to the matching student's user when one exists.
+        """
+        if not self.is_bulk_request or not isinstance(self.bulk_students, list):
+            return []
+        
+        entries = [
+            entry for entry in self.bulk_students
+            if isinstance(entry, dict) and str(entry.get('registerNumber', '')).strip()
+        ]
+        register_numbers = {str(entry['registerNumber']).strip() for entry in entries}
+        users_by_register_number = dict(
+            Student.objects.filter(student_id__in=register_numbers).values_list('student_id', 'user_id')
+        )
+        
+        return [
+            BulkStudentMember(
+                attendance_request=self,
+                register_number=str(entry['registerNumber']).strip(),
+                name=str(entry.get('name', ''))[:255],
+                user_id=users_by_register_number.get(str(entry['registerNumber']).strip()),
+            )
+            for entry in entries
+        ]
+    
+    def sync_members(self):
+        """Rebuild the member rows for this request from bulk_students."""
+        self.members.all().delete()
+        return BulkStudentMember.objects.bulk_create(self.build_members())
+
+
+class BulkStudentMember(models.Model):
+    """
+    One student listed on a bulk (team) request.
+    
+    Mirrors AttendanceRequest.bulk_students so requests can be found by
+    register number with an index seek, and so team members other than the
+    creator can see the requests they are part of.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    attendance_request = models.ForeignKey(
+        AttendanceRequest,
+        on_delete=models.CASCADE,
+        related_name='members'
+    )
+    register_number = models.CharField(max_length=50, db_index=True)
+    name = models.CharField(max_length=255, blank=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bulk_memberships',
+        help_text="Student account with this register number, if registered"
+    )
+    
+    class Meta:
+        db_table = 'bulk_student_members'
+        verbose_name = 'Bulk Student Member'
+        verbose_name_plural = 'Bulk Student Members'
+    
+    def __str__(self):
+        return f"{self.register_number} - {self.name}"
+
+
+class PeriodExcusal(models.Model):
+    """
+    One period of an approved request, normalized from period_faculty_mapping.
+    
+    Lets a period faculty member list the students excused from their class
+    on a date with one seek on the (faculty, date) index.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    attendance_request = models.ForeignKey(
+        AttendanceRequest,
+        on_delete=models.CASCADE,
+        related_name='excusals'
+    )
+    faculty = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='period_excusals',
+        limit_choices_to={'role': 'Faculty'},
+        help_text="Faculty teaching the period"
+    )
+    date = models.DateField()
+    period = models.PositiveSmallIntegerField(help_text="Period number 1-8")
+    
+    class Meta:
+        db_table = 'period_excusals'
+        verbose_name = 'Period Excusal'
+        verbose_name_plural = 'Period Excusals'
+        indexes = [
+            models.Index(fields=['faculty', 'date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['attendance_request', 'period'], name='unique_period_excusal'),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} period {self.period} - {self.faculty_id}"
+
+
+class AttendanceRequestTombstone(models.Model):
+    """
+    Deletion log for attendance requests.
+    
+    Lets delta-sync clients learn about requests removed through the API.
+    Rows only need to outlive the sync token retention window.
+    """
+    request_id = models.UUIDField(help_text="ID of the deleted attendance request")
+    student_id = models.UUIDField(null=True, blank=True)
+    event_coordinator_faculty_id = models.UUIDField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        db_table = 'attendance_request_tombstones'
+        verbose_name = 'Attendance Request Tombstone'
+        verbose_name_plural = 'Attendance Request Tombstones'
+    
+    def __str__(self):
+        return f"{self.request_id} deleted at {self.deleted_at}"
+
+
+class RequestStatusCounter(models.Model):
+    """
+    Maintained attendance request counts per (scope, status).
+    
+    Scopes are 'all' (HOD), 'student:<user id>' and 'coordinator:<user id>'
+    (mentor). Kept in step with every create, status change and delete so
+    dashboard statistics never have to count attendance_requests.
+    """
+    scope = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=AttendanceRequest.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'request_status_counters'
+        verbose_name = 'Request Status Counter'
+        verbose_name_plural = 'Request Status Counters'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'status'], name='unique_request_status_counter'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope} {self.status}: {self.count}"
+
+
+# Rollup coordinator for requests without one. Unique constraints treat NULLs
+# as distinct, so a nullable key would let concurrent writers insert duplicates.
+NO_COORDINATOR = uuid.UUID(int=0)
+
+
+class RequestDailyRollup(models.Model):
+    """
+    Attendance request counts per (date, department, coordinator, status).
+    
+    ``date`` is the attendance date and ``department`` the requesting
+    student's. Maintained with every create, status change and delete (see
+    attendance/rollups.py) so analytics dashboards aggregate a few hundred
+    rows instead of scanning attendance_requests. Archived requests stay
+    counted.
+    """
+    date = models.DateField()
+    department = models.CharField(max_length=255, blank=True)
+    coordinator_id = models.UUIDField(
+        default=NO_COORDINATOR,
+        help_text="Event coordinator faculty user ID (NO_COORDINATOR without one)"
+    )
+    status = models.CharField(max_length=20, choices=AttendanceRequest.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'request_daily_rollups'
+        verbose_name = 'Request Daily Rollup'
+        verbose_name_plural = 'Request Daily Rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'department', 'coordinator_id', 'status'],
+                name='unique_request_daily_rollup',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.department} {self.coordinator_id} {self.status}: {self.count}"
+
+
+class PeriodDailyRollup(models.Model):
+    """
+    Requested periods per (date, department, period, status): a request for
+    periods 1-3 counts once for each of the three periods.
+    """
+    date = models.DateField()
+    department = models.CharField(max_length=255, blank=True)
+    period = models.PositiveSmallIntegerField()
+    status = models.CharField(max_length=20, choices=AttendanceRequest.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'period_daily_rollups'
+        verbose_name = 'Period Daily Rollup'
+        verbose_name_plural = 'Period Daily Rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'department', 'period', 'status'],
+                name='unique_period_daily_rollup',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.department} period {self.period} {self.status}: {self.count}"
+
+
+class NotificationOutbox(models.Model):
+    """
+    Transactional outbox for notification emails.
+    
+    Rows are written in the same transaction as the status change that
+    triggers them and delivered later by the deliver_notifications worker.
+    Rows with a digest_key are digest items: body holds one request's
+    section and the worker merges all items sharing the key into one email.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    attendance_request = models.ForeignKey(
+        AttendanceRequest,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notifications',
+        help_text="Request that triggered the notification"
+    )
+    recipient = models.EmailField()
+    from_email = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Earliest time the next delivery attempt may run"
+    )
+    last_error = models.TextField(blank=True, default='')
+    digest_key = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="Digest items sharing a key ('<faculty id>:<date>') are sent as one email"
+    )
+    context = models.JSONField(default=dict, blank=True, help_text="Extra data used to render digests")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'notification_outbox'
+        verbose_name = 'Notification'
+        verbose_name_plural = 'Notification Outbox'
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.recipient} - {self.subject} ({self.status})"
@@ -0,0 +1,321 @@
+"""
+Email notifications for approved attendance requests.
+
+Approvals only write rows to the notification outbox, inside the same
+transaction as the status change, so the HOD never waits on SMTP. The
+deliver_notifications worker claims due rows with SELECT ... FOR UPDATE
+SKIP LOCKED, sends a batch over one SMTP connection and retries failures
+with exponential backoff.
+
+With ATTENDANCE_NOTIFICATION_DIGEST set, approvals are queued as digest
+items instead: items for the same faculty member and attendance date are
+held until the digest window closes and then sent as one consolidated email.
+"""
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .metrics import record_email_deliveries
+from .models import NotificationOutbox, User
+
+logger = logging.getLogger(__name__)
+
+# Backoff between delivery attempts: 30s, 1m, 2m, 4m ... capped at one hour
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+RULE = "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+
+
+def digest_window_end(now=None):
+    """
+    Return when the current digest window closes, or None when digests are off.
+    
+    ATTENDANCE_NOTIFICATION_DIGEST is a window length in minutes (windows are
+    aligned to the clock, e.g. 10 -> :00, :10, :20 ...) or 'eod' for one
+    digest per day sent at local midnight; config/settings.py validates it.
+    """
+    mode = settings.ATTENDANCE_NOTIFICATION_DIGEST
+    if not mode:
+        return None
+    
+    now = now or timezone.now()
+    if mode == 'eod':
+        tomorrow = timezone.localtime(now).date() + timedelta(days=1)
+        return timezone.make_aware(datetime.combine(tomorrow, time.min))
+    
+    window = mode * 60
+    return datetime.fromtimestamp((int(now.timestamp()) // window + 1) * window, tz=now.tzinfo)
+
+
+def enqueue_approval_notifications(request_instances, hod_user):
+    """
+    Write one outbox row per period faculty member of each approved request.
+    Call inside the transaction that approves the requests.
+    """
+    request_instances = list(request_instances)
+    
+    # Load every period faculty member for the batch in one query
+    faculty_ids = set()
+    for request_instance in request_instances:
+        for faculty_id in (request_instance.period_faculty_mapping or {}).values():
+            try:
+                faculty_ids.add(uuid.UUID(str(faculty_id)))
+            except ValueError:
+                logger.warning('Invalid faculty id %r in period mapping of request %s', faculty_id, request_instance.id)
+    faculty_users = {
+        str(faculty_id): faculty_user
+        for faculty_id, faculty_user in User.objects.filter(id__in=faculty_ids, role='Faculty').in_bulk().items()
+    }
+    
+    window_end = digest_window_end()
+    notifications = []
+    for request_instance in request_instances:
+        notifications.extend(build_approval_notifications(request_instance, hod_user, faculty_users, window_end))
+    NotificationOutbox.objects.bulk_create(notifications)
+    return notifications
+
+
+def build_approval_notifications(request_instance, hod_user, faculty_users, window_end=None):
+    """
+    Build (unsaved) outbox rows for one approved request, one per period
+    faculty member. With a digest ``window_end`` the rows are digest items.
+    """
+    period_faculty_mapping = request_instance.period_faculty_mapping
+    if not period_faculty_mapping:
+        return []
+    
+    # Get HOD's name and email
+    hod_name = hod_user.get_full_name()
+    hod_email = hod_user.email
+    hod_faculty_profile = hod_user.faculty_profile if hasattr(hod_user, 'faculty_profile') else None
+    hod_title = hod_faculty_profile.title if hod_faculty_profile else "HOD"
+    
+    # Determine if bulk request
+    is_bulk = request_instance.is_bulk_request
+    
+    # Prepare student information
+    if is_bulk:
+        student_count = len(request_instance.bulk_students)
+        students_list = "\n".join([
+            f"  - {s['registerNumber']}: {s['name']}" 
+            for s in request_instance.bulk_students
+        ])
+        student_info = f"Bulk Request ({student_count} students):\n{students_list}"
+        subject_student = f"{student_count} Students"
+    else:
+        student_info = f"Name:          {request_instance.student.get_full_name()}\nEmail:         {request_instance.student.email}"
+        subject_student = request_instance.student.get_full_name()
+    
+    notifications = []
+    
+    # Get unique faculty IDs
+    for faculty_id in set(period_faculty_mapping.values()):
+        faculty_user = faculty_users.get(str(faculty_id))
+        if faculty_user is None:
+            logger.warning('Faculty user %s not found for request %s', faculty_id, request_instance.id)
+            continue
+        
+        # Find which periods this faculty handles
+        their_periods = [period for period, fac_id in period_faculty_mapping.items() if fac_id == faculty_id]
+        periods_str = ', '.join(f"Period {p}" for p in sorted(their_periods, key=int))
+        
+        # Email content
+        subject = f'Physical Attendance Approved - {subject_student} - {request_instance.date.strftime("%d-%m-%Y")}'
+        
+        section = f"""{RULE}
+STUDENT DETAILS
+{RULE}
+{student_info}
+Date:          {request_instance.date.strftime('%B %d, %Y')} ({request_instance.date.strftime('%A')})
+Your Period(s): {periods_str}
+
+{RULE}
+EVENT DETAILS
+{RULE}
+Purpose:            {request_instance.purpose}
+Event Coordinator:  {request_instance.event_coordinator}
+
+{RULE}"""
+        signature = f"{hod_name}\n{hod_title}\n{hod_email}"
+        
+        if window_end is not None:
+            # Held until the window closes and merged with the faculty member's other approvals that day
+            notifications.append(NotificationOutbox(
+                attendance_request=request_instance,
+                recipient=faculty_user.email,
+                from_email=f"{hod_name} <{hod_email}>",
+                subject=subject[:255],
+                body=section,
+                available_at=window_end,
+                digest_key=f"{faculty_user.id}:{request_instance.date.isoformat()}",
+                context={
+                    'facultyName': faculty_user.get_full_name(),
+                    'date': request_instance.date.isoformat(),
+                    'signature': signature,
+                },
+            ))
+            continue
+        
+        body = f"""Dear {faculty_user.get_full_name()},
+
+I hope this email finds you well.
+
+This is to inform you that a physical attendance request has been approved for the following:
+
+{section}
+
+The {"students have" if is_bulk else "student has"} been granted physical attendance for the mentioned period(s) in your class. Please mark their attendance accordingly.
+
+If you have any questions or concerns regarding this approval, please feel free to contact me.
+
+Best regards,
+{signature}
+
+---
+This is an automated notification from the Attendance Management System.
+        """
+        
+        notifications.append(NotificationOutbox(
+            attendance_request=request_instance,
+            recipient=faculty_user.email,
+            from_email=f"{hod_name} <{hod_email}>",  # Send from HOD's email
+            subject=subject[:255],
+            body=body,
+        ))
+    
+    return notifications
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt after ``attempts`` failed deliveries."""
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def render_digest(items):
+    """Render one consolidated email for digest items sharing a faculty member and date."""
+    items = sorted(items, key=lambda item: (item.created_at, item.id))
+    context = items[0].context
+    date = datetime.strptime(context['date'], '%Y-%m-%d').date()
+    
+    senders = {item.from_email for item in items}
+    signatures = {item.context.get('signature') for item in items}
+    from_email = senders.pop() if len(senders) == 1 else settings.DEFAULT_FROM_EMAIL
+    signature = signatures.pop() if len(signatures) == 1 else "Head of Department"
+    
+    subject = f'Physical Attendance Approved - {len(items)} Request(s) - {date.strftime("%d-%m-%Y")}'
+    sections = "\n\n".join(item.body for item in items)
+    body = f"""Dear {context['facultyName']},
+
+I hope this email finds you well.
+
+This is to inform you that the following {len(items)} physical attendance request(s) for {date.strftime('%B %d, %Y')} ({date.strftime('%A')}) have been approved:
+
+{sections}
+
+The students listed above have been granted physical attendance for the mentioned period(s) in your class. Please mark their attendance accordingly.
+
+If you have any questions or concerns regarding these approvals, please feel free to contact me.
+
+Best regards,
+{signature}
+
+---
+This is an automated notification from the Attendance Management System.
+        """
+    return subject, body, from_email
+
+
+def deliver_pending(batch_size=100, max_attempts=5, log=logger.info):
+    """
+    Claim up to ``batch_size`` due outbox rows and send them over one SMTP
+    connection. Rows locked by another worker are skipped, and digest items
+    are sent as one email per digest key. Returns (sent, failed) counts of
+    emails for the batch. Progress lines go to ``log`` (the module logger by
+    default).
+    """
+    sent = failed = 0
+    
+    with transaction.atomic():
+        now = timezone.now()
+        due = NotificationOutbox.objects.select_for_update(skip_locked=True).filter(
+            status='PENDING', available_at__lte=now
+        )
+        batch = list(due.order_by('available_at', 'id')[:batch_size])
+        if not batch:
+            return sent, failed
+        
+        # Pull in the rest of every digest touched by this batch so it goes out as one email
+        digest_keys = {notification.digest_key for notification in batch if notification.digest_key}
+        if digest_keys:
+            claimed = {notification.pk for notification in batch}
+            batch += [
+                notification for notification in due.filter(digest_key__in=digest_keys)
+                if notification.pk not in claimed
+            ]
+        
+        emails = defaultdict(list)
+        for notification in batch:
+            emails[notification.digest_key or notification.pk].append(notification)
+        
+        connection = get_connection()
+        try:
+            connection.open()
+            connection_error = None
+        except Exception as e:
+            # Nothing in this batch can be delivered; back all of it off
+            connection_error = e
+        
+        try:
+            for key, notifications in emails.items():
+                first = notifications[0]
+                if first.digest_key:
+                    subject, body, from_email = render_digest(notifications)
+                else:
+                    subject, body, from_email = first.subject, first.body, first.from_email
+                
+                attempts = max(notification.attempts for notification in notifications) + 1
+                try:
+                    if connection_error is not None:
+                        raise connection_error
+                    EmailMessage(
+                        subject=subject,
+                        body=body,
+                        from_email=from_email,
+                        to=[first.recipient],
+                        connection=connection,
+                    ).send()
+                except Exception as e:
+                    failed += 1
+                    for notification in notifications:
+                        notification.attempts = attempts
+                        notification.last_error = str(e)
+                        if attempts >= max_attempts:
+                            notification.status = 'FAILED'
+                        else:
+                            notification.available_at = timezone.now() + retry_delay(attempts)
+                    log(f"✗ Failed to send email to {first.recipient} (attempt {attempts}): {e}")
+                    continue
+                
+                sent += 1
+                for notification in notifications:
+                    notification.attempts = attempts
+                    notification.status = 'SENT'
+                    notification.sent_at = timezone.now()
+                    notification.last_error = ''
+                log(f"✓ Email sent to {first.recipient}: {subject}")
+        finally:
+            connection.close()
+        
+        NotificationOutbox.objects.bulk_update(
+            batch, ['status', 'attempts', 'available_at', 'last_error', 'sent_at']
+        )
+    
+    record_email_deliveries(sent, failed)
+    return sent, failed
@@ -0,0 +1,110 @@
+"""
+Pagination classes for attendance request listings.
+
+Page-number pagination stays the default so existing clients keep working.
+Clients that page through long histories can switch to keyset (cursor)
+pagination, which walks the ``-created_at`` index instead of counting and
+offsetting over the whole table. The admin changelists page with estimated
+counts for the same reason.
+"""
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+# Upper bound for the capped count used when the database cannot estimate
+APPROXIMATE_COUNT_CAP = 10000
+
+
+def estimate_count(queryset):
+    """
+    Return a cheap row estimate for a queryset.
+
+    On PostgreSQL the planner's row estimate is read from EXPLAIN, so no rows
+    are scanned. Other databases fall back to a count capped at
+    APPROXIMATE_COUNT_CAP.
+    """
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    return queryset[:APPROXIMATE_COUNT_CAP].count()
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Django paginator for admin changelists over large tables. Results the
+    planner estimates at APPROXIMATE_COUNT_CAP rows or more report that
+    estimate instead of running COUNT(*); smaller results are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate >= APPROXIMATE_COUNT_CAP:
+            return estimate
+        return super().count
+
+
+class AttendanceRequestCursorPagination(CursorPagination):
+    """Keyset pagination ordered by (-created_at, id)."""
+
+    ordering = ('-created_at', 'id')
+
+
+class AttendanceRequestPagination(BasePagination):
+    """
+    Page-number pagination with an opt-in cursor mode.
+
+    Query parameters:
+    - pagination=cursor: use keyset pagination (implied when ``cursor`` is sent)
+    - approximateCount=true: add an estimated total to cursor pages
+    """
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    approximate_count_query_param = 'approximateCount'
+
+    def __init__(self):
+        self.page_number_paginator = PageNumberPagination()
+        self.cursor_paginator = AttendanceRequestCursorPagination()
+        self.paginator = self.page_number_paginator
+        self.approximate_count = None
+
+    def use_cursor(self, request):
+        """Return True when the client asked for keyset pagination."""
+        if self.cursor_query_param in request.query_params:
+            return True
+        return request.query_params.get(self.mode_query_param, '').lower() == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.paginator = self.cursor_paginator
+            approximate_param = request.query_params.get(self.approximate_count_query_param)
+            if str(approximate_param).lower() in ('1', 'true', 'yes'):
+                self.approximate_count = estimate_count(queryset)
+        else:
+            self.paginator = self.page_number_paginator
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = self.paginator.get_paginated_response(data)
+        if self.approximate_count is not None:
+            response.data['approximateCount'] = self.approximate_count
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.paginator.to_html()
@@ -0,0 +1,169 @@
+"""
+Daily rollups of attendance requests backing the analytics endpoint.
+
+RequestDailyRollup counts requests per (date, department, coordinator,
+status) and PeriodDailyRollup counts requested periods per (date,
+department, period, status). Like the statistics counters, every write path
+applies its deltas inside the transaction that changes the rows, and
+``rebuild_rollups`` reconciles them nightly from attendance_requests.
+
+Archived requests keep their rollup rows so dashboards still cover past
+terms. Dates up to the end of the archive are left out of rebuilds, since
+the live table no longer holds all of their requests.
+"""
+from collections import Counter
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncYear
+
+from .counters import increment_counts
+from .models import (
+    NO_COORDINATOR, AttendanceRequest, PeriodDailyRollup, RequestDailyRollup, User, mask_to_periods,
+)
+
+STATUSES = [choice for choice, _ in AttendanceRequest.STATUS_CHOICES]
+
+DAILY_KEY = ('date', 'department', 'coordinator_id', 'status')
+PERIOD_KEY = ('date', 'department', 'period', 'status')
+
+# A request's department is its student's
+DEPARTMENT = 'student__student_profile__department'
+
+GRANULARITIES = {
+    'day': TruncDay,
+    'month': TruncMonth,
+    'year': TruncYear,
+}
+
+
+def rollup_rows(request_ids):
+    """(date, department, coordinator id, periods_mask) of each request, in one query."""
+    return list(
+        AttendanceRequest.objects.filter(id__in=request_ids)
+        .values_list('date', DEPARTMENT, 'event_coordinator_faculty_id', 'periods_mask')
+    )
+
+
+def rollup_deltas(rows, old_status, new_status):
+    """
+    Build (daily, period) deltas for ``rows`` (from rollup_rows) moving from
+    ``old_status`` to ``new_status``; either may be None for creates and deletes.
+    """
+    daily, periods = Counter(), Counter()
+    for date, department, coordinator_id, periods_mask in rows:
+        department = department or ''
+        coordinator_id = coordinator_id or NO_COORDINATOR
+        for status, delta in ((old_status, -1), (new_status, 1)):
+            if not status:
+                continue
+            daily[(date, department, coordinator_id, status)] += delta
+            for period in mask_to_periods(periods_mask):
+                periods[(date, department, period, status)] += delta
+    return daily, periods
+
+
+def apply_rollup_deltas(daily, periods):
+    """
+    Apply daily and period deltas to the rollup tables, one upsert per table.
+    Must run inside the transaction that made the matching row changes.
+    """
+    increment_counts(RequestDailyRollup, DAILY_KEY, daily)
+    increment_counts(PeriodDailyRollup, PERIOD_KEY, periods)
+
+
+def record_rollup_transition(request_ids, old_status, new_status):
+    """Update the rollups for requests created, moved or deleted; call while the rows still exist."""
+    apply_rollup_deltas(*rollup_deltas(rollup_rows(request_ids), old_status, new_status))
+
+
+def expected_rollups(since=None):
+    """Recompute (daily, period) rollups from attendance_requests dated ``since`` or later."""
+    requests = AttendanceRequest.objects.order_by()
+    if since:
+        requests = requests.filter(date__gte=since)
+
+    daily = Counter()
+    rows = requests.values('date', 'event_coordinator_faculty_id', 'status', department=F(DEPARTMENT))
+    for row in rows.annotate(n=Count('pk')):
+        coordinator_id = row['event_coordinator_faculty_id'] or NO_COORDINATOR
+        daily[(row['date'], row['department'] or '', coordinator_id, row['status'])] += row['n']
+
+    periods = Counter()
+    for period in range(1, 9):
+        bit = 1 << (period - 1)
+        rows = (
+            requests.annotate(bit=F('periods_mask').bitand(bit)).filter(bit=bit)
+            .values('date', 'status', department=F(DEPARTMENT))
+        )
+        for row in rows.annotate(n=Count('pk')):
+            periods[(row['date'], row['department'] or '', period, row['status'])] += row['n']
+    return daily, periods
+
+
+def _status_totals(row):
+    """API shape of one aggregated row's per-status counts."""
+    return {
+        'total': sum(row[status] or 0 for status in STATUSES),
+        'pendingMentor': row['PENDING_MENTOR'] or 0,
+        'pendingHOD': row['PENDING_HOD'] or 0,
+        'approved': row['APPROVED'] or 0,
+        'declined': row['DECLINED'] or 0,
+    }
+
+
+def _aggregate(queryset, *group_by, **expressions):
+    """Per-status sums of ``count`` grouped by the given fields/expressions."""
+    return (
+        queryset.order_by()
+        .values(*group_by, **expressions)
+        .annotate(**{status: Sum('count', filter=Q(status=status)) for status in STATUSES})
+    )
+
+
+def analytics(date_from, date_to, granularity='month', department=None):
+    """
+    Request trends between two dates from the rollup tables: a time series
+    bucketed by ``granularity``, and totals per department, per coordinator
+    and per period. Four aggregate queries plus one for coordinator names.
+    """
+    daily = RequestDailyRollup.objects.filter(date__gte=date_from, date__lte=date_to)
+    periods = PeriodDailyRollup.objects.filter(date__gte=date_from, date__lte=date_to)
+    if department:
+        daily = daily.filter(department=department)
+        periods = periods.filter(department=department)
+
+    series = _aggregate(daily, bucket=GRANULARITIES[granularity]('date')).order_by('bucket')
+    departments = _aggregate(daily, 'department').order_by('department')
+    coordinators = list(_aggregate(daily, 'coordinator_id'))
+    names = User.objects.in_bulk([
+        row['coordinator_id'] for row in coordinators if row['coordinator_id'] != NO_COORDINATOR
+    ])
+
+    return {
+        'dateFrom': date_from.isoformat(),
+        'dateTo': date_to.isoformat(),
+        'granularity': granularity,
+        'series': [
+            {'bucket': row['bucket'].isoformat(), **_status_totals(row)}
+            for row in series
+        ],
+        'departments': [
+            {'department': row['department'], **_status_totals(row)}
+            for row in departments
+        ],
+        'coordinators': sorted(
+            (
+                {
+                    'id': str(row['coordinator_id']) if row['coordinator_id'] != NO_COORDINATOR else None,
+                    'name': names[row['coordinator_id']].name if row['coordinator_id'] in names else None,
+                    **_status_totals(row),
+                }
+                for row in coordinators
+            ),
+            key=lambda entry: -entry['total'],
+        ),
+        'periods': [
+            {'period': row['period'], **_status_totals(row)}
+            for row in _aggregate(periods, 'period').order_by('period')
+        ],
+    }
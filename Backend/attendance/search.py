@@ -0,0 +1,54 @@
+"""
+Full-text search over attendance requests (``?q=`` on the request list).
+
+Every request keeps a ``search_document`` column, rebuilt on save from its
+purpose, coordinator and proof faculty names, the student's name and the
+names and register numbers of bulk members (see build_search_document).
+
+On PostgreSQL the document is matched as a ``simple`` tsvector backed by the
+``attreq_search_idx`` GIN expression index, every term of the query as a
+prefix, and results are ranked with ts_rank. Other databases (SQLite test
+runs) fall back to one ``icontains`` per term, ordered newest first.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+
+# Text search configuration: no stemming or stop words, names and register
+# numbers are matched as written
+SEARCH_CONFIG = 'simple'
+
+# Terms beyond this are ignored, a query is a few words typed into a box
+MAX_SEARCH_TERMS = 8
+
+
+def search_vector():
+    """The tsvector expression the GIN index is built on; queries must use the same one."""
+    return SearchVector('search_document', config=SEARCH_CONFIG)
+
+
+def search_terms(text):
+    """Lower-cased word terms of a search query."""
+    return re.findall(r'\w+', text.lower())[:MAX_SEARCH_TERMS]
+
+
+def apply_search(queryset, text):
+    """Filter ``queryset`` to requests matching every term of ``text``, best matches first."""
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+
+    if connections[queryset.db].vendor == 'postgresql':
+        # Terms are \w+ only, so they are safe to join into a raw tsquery
+        query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms), config=SEARCH_CONFIG, search_type='raw'
+        )
+        return queryset.annotate(
+            search=search_vector(),
+            search_rank=SearchRank(search_vector(), query),
+        ).filter(search=query).order_by('-search_rank', '-created_at')
+
+    for term in terms:
+        queryset = queryset.filter(search_document__icontains=term)
+    return queryset.order_by('-created_at')
@@ -3,8 +3,10 @@ Serializers for Physical Attendance Automation API.
 
 Based on BACKEND_INTEGRATION.md specifications.
 """
+from django.utils import timezone
 from rest_framework import serializers
 from .models import User, Faculty, Student, AttendanceRequest
+from .instrumentation import TimedListSerializer, TimedSerializerMixin, timed
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -59,7 +61,7 @@ class LoginSerializer(serializers.Serializer):
         return data
 
 
-class FacultySerializer(serializers.ModelSerializer):
+class FacultySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Faculty with user information."""
     
     id = serializers.UUIDField(source='user.id', read_only=True)
@@ -70,9 +72,10 @@ class FacultySerializer(serializers.ModelSerializer):
     class Meta:
         model = Faculty
         fields = ['id', 'name', 'title', 'department', 'email', 'isHOD']
+        list_serializer_class = TimedListSerializer
 
 
-class AttendanceRequestSerializer(serializers.ModelSerializer):
+class AttendanceRequestSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for AttendanceRequest."""
     
     studentId = serializers.UUIDField(source='student.id', read_only=True, allow_null=True)
@@ -101,6 +104,7 @@ class AttendanceRequestSerializer(serializers.ModelSerializer):
             'createdAt', 'updatedAt'
         ]
         read_only_fields = ['id', 'status', 'studentId', 'studentName', 'studentEmail', 'isBulkRequest', 'bulkStudents', 'createdBy', 'createdByName', 'createdAt', 'updatedAt']
+        list_serializer_class = TimedListSerializer
     
     def validate_periods(self, value):
         """Validate periods are integers 1-8."""
@@ -122,6 +126,75 @@ class AttendanceRequestSerializer(serializers.ModelSerializer):
         return value
 
 
+# Columns of the joined .values() projection read by the list fast path
+ATTENDANCE_REQUEST_ROW_FIELDS = (
+    'id', 'student_id', 'student__first_name', 'student__last_name', 'student__username', 'student__email',
+    'is_bulk_request', 'bulk_students',
+    'created_by_id', 'created_by__first_name', 'created_by__last_name', 'created_by__username',
+    'date', 'periods', 'period_faculty_mapping', 'event_coordinator',
+    'event_coordinator_faculty_id', 'event_coordinator_faculty__first_name',
+    'event_coordinator_faculty__last_name', 'event_coordinator_faculty__username',
+    'proof_faculty', 'purpose', 'status', 'reason', 'proof_url', 'created_at', 'updated_at',
+)
+
+
+def _row_name(row, prefix):
+    """User.name of a joined user in a projected row, or None without one."""
+    if row[f'{prefix}_id'] is None:
+        return None
+    full_name = f"{row[f'{prefix}__first_name']} {row[f'{prefix}__last_name']}".strip()
+    return full_name or row[f'{prefix}__username']
+
+
+def _row_datetime(value, tz):
+    """Format a datetime the way DRF's DateTimeField does (ISO 8601, 'Z' for UTC)."""
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _row_uuid(value):
+    return str(value) if value is not None else None
+
+
+def serialize_request_rows(rows):
+    """
+    Map rows of ``ATTENDANCE_REQUEST_ROW_FIELDS`` to exactly the JSON
+    AttendanceRequestSerializer produces, without building model instances
+    or running DRF field machinery per row. Keep both in step when a field
+    is added.
+    """
+    tz = timezone.get_current_timezone()
+    with timed('serialize'):
+        return [
+            {
+                'id': str(row['id']),
+                'studentId': _row_uuid(row['student_id']),
+                'studentName': _row_name(row, 'student'),
+                'studentEmail': row['student__email'],
+                'isBulkRequest': row['is_bulk_request'],
+                'bulkStudents': row['bulk_students'],
+                'createdBy': _row_uuid(row['created_by_id']),
+                'createdByName': _row_name(row, 'created_by'),
+                'date': row['date'].isoformat(),
+                'periods': row['periods'],
+                'periodFacultyMapping': row['period_faculty_mapping'],
+                'eventCoordinator': row['event_coordinator'],
+                'eventCoordinatorFacultyId': _row_uuid(row['event_coordinator_faculty_id']),
+                'eventCoordinatorFacultyName': _row_name(row, 'event_coordinator_faculty'),
+                'proofFaculty': row['proof_faculty'],
+                'purpose': row['purpose'],
+                'status': row['status'],
+                'reason': row['reason'],
+                'proofUrl': row['proof_url'],
+                'createdAt': _row_datetime(row['created_at'], tz),
+                'updatedAt': _row_datetime(row['updated_at'], tz),
+            }
+            for row in rows
+        ]
+
+
 class AttendanceRequestCreateSerializer(serializers.Serializer):
     """Serializer for creating attendance requests (single student or bulk)."""
     
@@ -192,3 +265,14 @@ class AttendanceRequestStatusUpdateSerializer(serializers.Serializer):
                 }
             })
         return data
+
+
+class AttendanceRequestBulkStatusUpdateSerializer(AttendanceRequestStatusUpdateSerializer):
+    """Serializer for approving/declining many attendance requests at once."""
+    
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=500,
+        help_text="IDs of the requests to update"
+    )
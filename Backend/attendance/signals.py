@@ -0,0 +1,28 @@
+"""
+Signal handlers for the attendance app.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .directory import invalidate_directory
+from .models import Faculty, User
+
+
+@receiver(post_save, sender=Faculty)
+@receiver(post_delete, sender=Faculty)
+def faculty_changed(sender, instance, **kwargs):
+    """Rebuild the faculty directory after a faculty profile changes."""
+    transaction.on_commit(invalidate_directory)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def faculty_user_changed(sender, instance, update_fields=None, **kwargs):
+    """Rebuild the faculty directory after a faculty member's account changes."""
+    if instance.role != 'Faculty':
+        return
+    # Logins only touch last_login, which the directory does not show
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    transaction.on_commit(invalidate_directory)
@@ -0,0 +1,964 @@
+"""
+Tests for the attendance app.
+
+Run with ``python manage.py test attendance``.
+"""
+import csv
+import importlib.util
+import io
+import json
+import os
+import smtplib
+import sys
+import tempfile
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.contrib import admin
+from django.core import mail
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from config.settings import _notification_digest
+
+from .admin import AttendanceRequestAdmin
+from .archive import Segment, find_archived
+from .authentication import AttendanceRefreshToken
+from .directory import invalidate_directory
+from .events import broker
+from .instrumentation import RequestInstrumentationMiddleware
+from .models import (
+    NO_COORDINATOR, AttendanceRequest, AttendanceRequestTombstone, BulkStudentMember, Faculty, NotificationOutbox,
+    RequestDailyRollup, Student, User,
+)
+from .notifications import RETRY_BASE_SECONDS, deliver_pending, digest_window_end, enqueue_approval_notifications
+from .rollups import analytics, record_rollup_transition
+from .search import MAX_SEARCH_TERMS, search_terms
+from .serializers import ATTENDANCE_REQUEST_ROW_FIELDS, AttendanceRequestSerializer, serialize_request_rows
+from .views import SERIALIZED_RELATIONS, _encode_sync_token, _event_filter
+
+
+def make_user(email, role, first_name='Test', last_name='User'):
+    return User.objects.create_user(
+        email=email,
+        username=email.split('@')[0],
+        password='password123',
+        first_name=first_name,
+        last_name=last_name,
+        role=role,
+    )
+
+
+def make_faculty(email, is_hod=False, department='CSE'):
+    user = make_user(email, 'Faculty', last_name=email.split('@')[0].title())
+    Faculty.objects.create(user=user, title='Professor', department=department, is_hod=is_hod)
+    return user
+
+
+def make_student(email, register_number, department='CSE'):
+    user = make_user(email, 'Student', last_name=email.split('@')[0].title())
+    Student.objects.create(user=user, student_id=register_number, department=department, year=2, section='A')
+    return user
+
+
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def request_payload(coordinator, periods, request_date='2026-10-20', **fields):
+    """Body for POST /api/attendance/requests/ coordinated by ``coordinator``."""
+    return {
+        'date': request_date,
+        'periods': periods,
+        'eventCoordinator': coordinator.name,
+        'eventCoordinatorFacultyId': str(coordinator.id),
+        'proofFaculty': coordinator.name,
+        'purpose': 'Presenting a paper at the symposium',
+        **fields,
+    }
+
+
+def write_csv(test_case, content):
+    """Write ``content`` to a temporary CSV file removed after the test."""
+    handle, path = tempfile.mkstemp(suffix='.csv')
+    with os.fdopen(handle, 'w', encoding='utf-8') as csv_file:
+        csv_file.write(content)
+    test_case.addCleanup(os.remove, path)
+    return path
+
+
+class ImportRosterTests(TestCase):
+    """import_roster validation."""
+
+    def test_duplicate_register_numbers_in_file_are_reported_and_dropped(self):
+        path = write_csv(self, (
+            'role,email,first_name,last_name,register_number,department,year,section\n'
+            'Student,first@example.com,First,Student,REG-DUP-1,CSE,2,A\n'
+            'Student,second@example.com,Second,Student,REG-DUP-1,CSE,2,A\n'
+            'Student,third@example.com,Third,Student,REG-3,CSE,2,A\n'
+        ))
+        out = io.StringIO()
+        call_command('import_roster', path, '--workers', '1', stdout=out)
+
+        self.assertIn('line 3: register number REG-DUP-1 is also used by first@example.com', out.getvalue())
+        self.assertEqual(Student.objects.get(student_id='REG-DUP-1').user.email, 'first@example.com')
+        self.assertTrue(Student.objects.filter(student_id='REG-3').exists())
+        self.assertFalse(User.objects.filter(email='second@example.com').exists())
+
+    def test_existing_email_is_matched_case_insensitively(self):
+        existing = make_student('Mixed.Case@example.com', 'REG-1')
+        path = write_csv(self, (
+            'role,email,first_name,last_name,register_number,department,year,section\n'
+            'Student,mixed.case@example.com,Renamed,Student,REG-1,CSE,3,B\n'
+        ))
+        call_command('import_roster', path, '--workers', '1', stdout=io.StringIO())
+
+        self.assertEqual(User.objects.count(), 1)
+        existing.refresh_from_db()
+        self.assertEqual(existing.email, 'Mixed.Case@example.com')
+        self.assertEqual(existing.first_name, 'Renamed')
+        self.assertEqual(existing.student_profile.year, 3)
+
+
+class CreateRequestTests(TestCase):
+    """POST /api/attendance/requests/"""
+
+    def setUp(self):
+        self.mentor = make_faculty('mentor@example.com')
+        self.student = make_student('student@example.com', 'REG-1')
+        self.client = api_client(self.student)
+
+    def create(self, periods):
+        return self.client.post('/api/attendance/requests/', request_payload(self.mentor, periods), format='json')
+
+    def test_overlapping_periods_are_rejected(self):
+        first = self.create([1, 2, 3])
+        self.assertEqual(first.status_code, 201)
+
+        response = self.create([3, 4])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['error']['code'], 'OVERLAPPING_REQUEST')
+        self.assertEqual(response.json()['error']['periods'], [3])
+        self.assertEqual(response.json()['error']['conflictingRequestIds'], [first.json()['id']])
+
+        self.assertEqual(self.create([4, 5]).status_code, 201)
+        self.assertEqual(AttendanceRequest.objects.filter(student=self.student).count(), 2)
+
+
+class StatisticsCounterTests(TestCase):
+    """Maintained counters stay equal to a fresh recount."""
+
+    def test_counters_follow_create_transition_and_delete(self):
+        mentor = make_faculty('mentor@example.com')
+        hod = make_faculty('hod@example.com', is_hod=True)
+        student = make_student('student@example.com', 'REG-1')
+        student_client, mentor_client = api_client(student), api_client(mentor)
+
+        approved = student_client.post('/api/attendance/requests/', request_payload(mentor, [1]), format='json').json()
+        deleted = student_client.post('/api/attendance/requests/', request_payload(mentor, [2]), format='json').json()
+        declined = student_client.post('/api/attendance/requests/', request_payload(mentor, [3]), format='json').json()
+        call_command('recount_statistics', '--verify', stdout=io.StringIO())
+
+        mentor_client.patch(f'/api/attendance/requests/{approved["id"]}/status/', {'status': 'PENDING_HOD'})
+        api_client(hod).patch(f'/api/attendance/requests/{approved["id"]}/status/', {'status': 'APPROVED'})
+        mentor_client.patch(
+            f'/api/attendance/requests/{declined["id"]}/status/', {'status': 'DECLINED', 'reason': 'Clashes with exams'}
+        )
+        self.assertEqual(student_client.delete(f'/api/attendance/requests/{deleted["id"]}/').status_code, 204)
+        call_command('recount_statistics', '--verify', stdout=io.StringIO())
+
+        statistics = mentor_client.get('/api/attendance/statistics/').json()
+        self.assertEqual(
+            (statistics['total'], statistics['approved'], statistics['declined']),
+            (2, 1, 1),
+        )
+
+
+class BulkStatusTests(TestCase):
+    """POST /api/attendance/requests/bulk-status/"""
+
+    def setUp(self):
+        self.mentor = make_faculty('mentor@example.com')
+        self.hod = make_faculty('hod@example.com', is_hod=True)
+        self.ids = []
+        for index in range(4):
+            student = make_student(f'student{index}@example.com', f'REG-{index}')
+            payload = request_payload(self.mentor, [1], periodFacultyMapping={'1': str(self.mentor.id)})
+            self.ids.append(api_client(student).post('/api/attendance/requests/', payload, format='json').json()['id'])
+
+    def bulk_status(self, user, ids, new_status):
+        return api_client(user).post(
+            '/api/attendance/requests/bulk-status/', {'ids': ids, 'status': new_status}, format='json',
+        )
+
+    def test_results_per_id_and_one_notification_batch(self):
+        self.assertEqual(self.bulk_status(self.mentor, self.ids[:3], 'PENDING_HOD').json()['updated'], 3)
+        missing = '00000000-0000-0000-0000-00000000abcd'
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk_status(self.hod, [*self.ids, missing], 'APPROVED')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 3)
+        self.assertEqual(
+            [(result['result'], result['status']) for result in response.json()['results']],
+            [('UPDATED', 'APPROVED')] * 3 + [('INVALID_STATUS_TRANSITION', 'PENDING_MENTOR'), ('NOT_FOUND', None)],
+        )
+        self.assertEqual(NotificationOutbox.objects.count(), 3)
+        outbox_inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "notification_outbox"')]
+        self.assertEqual(len(outbox_inserts), 1)
+        call_command('recount_statistics', '--verify', stdout=io.StringIO())
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        def approve_queries(ids):
+            self.bulk_status(self.mentor, ids, 'PENDING_HOD')
+            with CaptureQueriesContext(connection) as queries:
+                self.bulk_status(self.hod, ids, 'APPROVED')
+            return len(queries)
+
+        self.assertEqual(approve_queries(self.ids[:1]), approve_queries(self.ids[1:]))
+
+
+class BulkStudentMemberTests(TestCase):
+    """Team requests are indexed by the register numbers they list."""
+
+    def setUp(self):
+        self.mentor = make_faculty('mentor@example.com')
+        self.hod = make_faculty('hod@example.com', is_hod=True)
+        self.member = make_student('member@example.com', 'REG-1')
+        self.leader = make_student('leader@example.com', 'REG-2')
+        team = [{'registerNumber': 'REG-1', 'name': 'Member'}, {'registerNumber': ' REG-3 ', 'name': 'Guest'}]
+        self.request_id = api_client(self.leader).post(
+            '/api/attendance/requests/', request_payload(self.mentor, [1], bulkStudents=team), format='json',
+        ).json()['id']
+
+    def test_members_are_linked_and_see_the_request(self):
+        members = BulkStudentMember.objects.filter(attendance_request_id=self.request_id)
+        self.assertEqual(
+            sorted((member.register_number, member.user_id) for member in members),
+            [('REG-1', self.member.id), ('REG-3', None)],
+        )
+        results = api_client(self.member).get('/api/attendance/requests/').json()['results']
+        self.assertEqual([row['id'] for row in results], [self.request_id])
+
+    def test_register_number_filter(self):
+        client = api_client(self.mentor)
+        for register_number, expected in (('REG-1', [self.request_id]), ('REG-3', [self.request_id]), ('REG-2', [])):
+            results = client.get('/api/attendance/requests/', {'registerNumber': register_number}).json()['results']
+            self.assertEqual([row['id'] for row in results], expected)
+
+
+class SerializeRequestRowsTests(TestCase):
+    """serialize_request_rows must match AttendanceRequestSerializer field for field."""
+
+    def setUp(self):
+        mentor = make_faculty('mentor@example.com')
+        student = make_student('student@example.com', 'REG-1')
+        common = {
+            'date': date(2026, 10, 20),
+            'event_coordinator': 'Mentor',
+            'proof_faculty': 'Mentor',
+            'purpose': 'Presenting a paper at the symposium',
+        }
+        AttendanceRequest.objects.create(
+            student=student, periods=[1, 2], period_faculty_mapping={'1': str(mentor.id)},
+            event_coordinator_faculty=mentor, **common,
+        )
+        AttendanceRequest.objects.create(
+            student=None, is_bulk_request=True, created_by=mentor, periods=[3],
+            bulk_students=[{'registerNumber': 'REG-1', 'name': 'Student'}, {'registerNumber': 'REG-2', 'name': 'Other'}],
+            event_coordinator_faculty=mentor, **common,
+        )
+        AttendanceRequest.objects.create(
+            student=student, periods=[4], event_coordinator_faculty=None,
+            status='DECLINED', reason='Not an approved event', **common,
+        )
+
+    def render(self, data):
+        return json.loads(JSONRenderer().render(data))
+
+    def test_values_projection_matches_model_serializer(self):
+        queryset = AttendanceRequest.objects.select_related(*SERIALIZED_RELATIONS).order_by('created_at')
+
+        with self.assertNumQueries(1):
+            fast = self.render(serialize_request_rows(queryset.values(*ATTENDANCE_REQUEST_ROW_FIELDS)))
+        with self.assertNumQueries(1):
+            full = self.render(AttendanceRequestSerializer(queryset, many=True).data)
+
+        self.assertEqual(len(fast), 3)
+        self.assertEqual(fast, full)
+        self.assertIsNone(fast[1]['studentId'])
+        self.assertIsNone(fast[2]['eventCoordinatorFacultyId'])
+
+
+class NotificationDigestSettingTests(SimpleTestCase):
+    """ATTENDANCE_NOTIFICATION_DIGEST parsing in config/settings.py."""
+
+    def test_valid_values(self):
+        self.assertIsNone(_notification_digest(''))
+        self.assertIsNone(_notification_digest('Off'))
+        self.assertEqual(_notification_digest(' EOD '), 'eod')
+        self.assertEqual(_notification_digest('15'), 15)
+
+    def test_invalid_values_are_rejected(self):
+        for value in ('0', '00', '-5', '1.5', 'hourly'):
+            with self.subTest(value=value), self.assertRaises(ImproperlyConfigured):
+                _notification_digest(value)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class DeliverNotificationsTests(TestCase):
+    """The deliver_notifications outbox worker."""
+
+    def queue(self, **fields):
+        return NotificationOutbox.objects.create(
+            recipient='faculty@example.com',
+            from_email='hod@example.com',
+            subject='Physical Attendance Approved',
+            body='Approved',
+            **fields,
+        )
+
+    def deliver(self, *args):
+        call_command('deliver_notifications', '--once', *args, stdout=io.StringIO())
+
+    def test_pending_row_is_sent(self):
+        notification = self.queue()
+        self.deliver()
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, 'SENT')
+        self.assertEqual(notification.attempts, 1)
+        self.assertIsNotNone(notification.sent_at)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['faculty@example.com'])
+
+    def test_failed_send_is_retried_later(self):
+        notification = self.queue()
+        before = timezone.now()
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=smtplib.SMTPException('unavailable')):
+            self.deliver()
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, 'PENDING')
+        self.assertEqual(notification.attempts, 1)
+        self.assertEqual(notification.last_error, 'unavailable')
+        self.assertGreaterEqual(notification.available_at, before + timedelta(seconds=RETRY_BASE_SECONDS))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_row_fails_after_max_attempts(self):
+        notification = self.queue(attempts=2)
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=smtplib.SMTPException('unavailable')):
+            self.deliver('--max-attempts', '3')
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, 'FAILED')
+        self.assertEqual(notification.attempts, 3)
+
+    def test_invalid_faculty_id_is_logged_and_skipped(self):
+        hod = make_faculty('hod@example.com', is_hod=True)
+        faculty = make_faculty('faculty@example.com')
+        student = make_student('student@example.com', 'REG-1')
+        approved = AttendanceRequest.objects.create(
+            student=student, date=date(2026, 10, 20), periods=[1, 2],
+            period_faculty_mapping={'1': str(faculty.id), '2': 'not-a-uuid'},
+            event_coordinator='Mentor', proof_faculty='Mentor', purpose='Presenting a paper at the symposium',
+            status='APPROVED',
+        )
+
+        with self.assertLogs('attendance.notifications', 'WARNING') as logs:
+            notifications = enqueue_approval_notifications([approved], hod)
+
+        self.assertIn("Invalid faculty id 'not-a-uuid'", logs.output[0])
+        self.assertEqual([notification.recipient for notification in notifications], ['faculty@example.com'])
+
+
+class NotificationDigestTests(TestCase):
+    """Approvals batched into one email per faculty member and date."""
+
+    def test_window_end(self):
+        now = datetime(2026, 10, 16, 9, 7, 30, tzinfo=dt_timezone.utc)
+        with override_settings(ATTENDANCE_NOTIFICATION_DIGEST=None):
+            self.assertIsNone(digest_window_end(now))
+        with override_settings(ATTENDANCE_NOTIFICATION_DIGEST=10):
+            self.assertEqual(digest_window_end(now), datetime(2026, 10, 16, 9, 10, tzinfo=dt_timezone.utc))
+        with override_settings(ATTENDANCE_NOTIFICATION_DIGEST='eod'):
+            self.assertEqual(digest_window_end(now), datetime(2026, 10, 17, tzinfo=dt_timezone.utc))
+
+    @override_settings(ATTENDANCE_NOTIFICATION_DIGEST=10)
+    def test_approvals_for_the_same_day_go_out_as_one_email(self):
+        hod = make_faculty('hod@example.com', is_hod=True)
+        faculty = make_faculty('faculty@example.com')
+        approved = [
+            AttendanceRequest.objects.create(
+                student=make_student(f'student{index}@example.com', f'REG-{index}'), date=request_date,
+                periods=[1], period_faculty_mapping={'1': str(faculty.id)},
+                event_coordinator='Mentor', proof_faculty='Mentor', purpose='Presenting a paper at the symposium',
+                status='APPROVED',
+            )
+            for index, request_date in enumerate((date(2026, 10, 20), date(2026, 10, 20), date(2026, 10, 21)))
+        ]
+        enqueue_approval_notifications(approved, hod)
+
+        # Held until the window closes
+        self.assertEqual(deliver_pending(), (0, 0))
+        NotificationOutbox.objects.update(available_at=timezone.now())
+
+        self.assertEqual(deliver_pending(), (2, 0))
+        self.assertEqual(
+            sorted(message.subject for message in mail.outbox),
+            ['Physical Attendance Approved - 1 Request(s) - 21-10-2026',
+             'Physical Attendance Approved - 2 Request(s) - 20-10-2026'],
+        )
+        self.assertFalse(NotificationOutbox.objects.exclude(status='SENT').exists())
+
+
+class MyPeriodsTests(TestCase):
+    """GET /api/attendance/my-periods/"""
+
+    def setUp(self):
+        mentor = make_faculty('mentor@example.com')
+        hod = make_faculty('hod@example.com', is_hod=True)
+        self.teacher = make_faculty('teacher@example.com')
+        self.student = make_student('student@example.com', 'REG-1')
+        other = make_student('other@example.com', 'REG-2')
+        mapping = {'1': str(self.teacher.id), '2': str(mentor.id), '3': str(self.teacher.id)}
+        self.approved = api_client(self.student).post('/api/attendance/requests/', request_payload(
+            mentor, [1, 2, 3], periodFacultyMapping=mapping), format='json').json()['id']
+        api_client(other).post('/api/attendance/requests/', request_payload(
+            mentor, [1], periodFacultyMapping={'1': str(self.teacher.id)}), format='json')
+        for user, new_status in ((mentor, 'PENDING_HOD'), (hod, 'APPROVED')):
+            api_client(user).patch(
+                f'/api/attendance/requests/{self.approved}/status/', {'status': new_status}, format='json',
+            )
+
+    def test_approved_requests_grouped_by_period(self):
+        response = api_client(self.teacher).get('/api/attendance/my-periods/', {'date': '2026-10-20'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['date'], '2026-10-20')
+        periods = response.json()['periods']
+        self.assertEqual([period['period'] for period in periods], [1, 3])
+        for period in periods:
+            self.assertEqual([request['requestId'] for request in period['requests']], [self.approved])
+            self.assertEqual(period['requests'][0]['students'][0]['email'], 'student@example.com')
+
+        other_day = api_client(self.teacher).get('/api/attendance/my-periods/', {'date': '2026-10-21'})
+        self.assertEqual(other_day.json()['periods'], [])
+
+    def test_faculty_only_and_date_format(self):
+        self.assertEqual(api_client(self.student).get('/api/attendance/my-periods/').status_code, 403)
+        response = api_client(self.teacher).get('/api/attendance/my-periods/', {'date': '20-10-2026'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ListRequestsTests(TestCase):
+    """GET /api/attendance/requests/"""
+
+    def setUp(self):
+        self.hod = make_faculty('hod@example.com', is_hod=True)
+        student = make_student('student@example.com', 'REG-1')
+        for day in (20, 21, 22):
+            AttendanceRequest.objects.create(
+                student=student, date=date(2026, 10, day), periods=[1],
+                event_coordinator='Mentor', proof_faculty='Mentor', purpose='Presenting a paper at the symposium',
+            )
+        self.client = api_client(self.hod)
+
+    def test_offset_page_answers_not_modified(self):
+        response = self.client.get('/api/attendance/requests/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+
+        repeat = self.client.get('/api/attendance/requests/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+
+    def test_cursor_page_does_not_aggregate_the_scope(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/attendance/requests/?pagination=cursor&history=true')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertNotIn('ETag', response)
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql'].upper()])
+
+
+class SearchRequestsTests(TestCase):
+    """GET /api/attendance/requests/?q="""
+
+    def setUp(self):
+        self.mentor = make_faculty('mentor@example.com')
+        student = make_student('student@example.com', 'REG-1')
+        client = api_client(student)
+        self.hackathon = client.post('/api/attendance/requests/', request_payload(
+            self.mentor, [1], '2026-10-20', purpose='Hackathon finals'), format='json').json()['id']
+        self.symposium = client.post('/api/attendance/requests/', request_payload(
+            self.mentor, [1], '2026-10-21', purpose='Paper symposium',
+            bulkStudents=[{'registerNumber': 'CS2041', 'name': 'Priya Raman'}]), format='json').json()['id']
+
+    def search(self, text):
+        response = api_client(self.mentor).get('/api/attendance/requests/', {'q': text})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search('hack'), [self.hackathon])
+        self.assertEqual(self.search('Symposium cs2041'), [self.symposium])
+        self.assertEqual(self.search('priya hackathon'), [])
+        self.assertEqual(self.search('mentor'), [self.symposium, self.hackathon])
+        self.assertEqual(self.search('!!!'), [])
+
+    def test_terms_are_words_capped_in_number(self):
+        self.assertEqual(search_terms('Reg-7, PAPER'), ['reg', '7', 'paper'])
+        self.assertEqual(len(search_terms(' '.join(['word'] * 20))), MAX_SEARCH_TERMS)
+
+
+class ExportRequestsTests(TestCase):
+    """GET /api/attendance/requests/export/"""
+
+    def setUp(self):
+        mentor = make_faculty('mentor@example.com')
+        self.student = make_student('student@example.com', 'REG-1')
+        team = [{'registerNumber': 'REG-1', 'name': 'Member'}, {'registerNumber': 'REG-2', 'name': 'Leader'}]
+        client = api_client(self.student)
+        self.single = client.post('/api/attendance/requests/', request_payload(
+            mentor, [1, 2], '2026-10-20', purpose='=HYPERLINK("http://example.com")'), format='json').json()['id']
+        self.bulk = client.post('/api/attendance/requests/', request_payload(
+            mentor, [3], '2026-10-21', bulkStudents=team), format='json').json()['id']
+
+    def export(self, **params):
+        return api_client(self.student).get('/api/attendance/requests/export/', {'format': 'csv', **params})
+
+    def test_csv_has_one_row_per_student(self):
+        response = self.export()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Disposition'].endswith('.csv"'))
+        lines = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+        self.assertEqual(lines[0][:3], ['Request ID', 'Date', 'Status'])
+        self.assertEqual([(line[0], line[5]) for line in lines[1:]], [
+            (self.bulk, 'REG-1'), (self.bulk, 'REG-2'), (self.single, ''),
+        ])
+        # Formulas in user text are neutralized
+        self.assertEqual(lines[3][10], '\'=HYPERLINK("http://example.com")')
+        self.assertEqual(lines[3][7], '1, 2')
+
+    def test_filters_apply(self):
+        response = self.export(dateFrom='2026-10-21')
+        lines = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual({line[0] for line in lines[1:]}, {self.bulk})
+
+    def test_xlsx_without_openpyxl(self):
+        with mock.patch.dict(sys.modules, {'openpyxl': None}):
+            response = self.export(format='xlsx')
+        self.assertEqual(response.status_code, 406)
+        self.assertEqual(json.loads(response.content)['error']['code'], 'EXPORT_FORMAT_UNAVAILABLE')
+
+
+class RequestChangesTests(TestCase):
+    """GET /api/attendance/requests/changes/"""
+
+    def setUp(self):
+        self.mentor = make_faculty('mentor@example.com')
+        self.student = make_student('student@example.com', 'REG-1')
+        mapping = {'periodFacultyMapping': {str(period): str(self.mentor.id) for period in (1, 2, 3)}}
+        self.unchanged, self.updated, self.deleted = [
+            api_client(self.student).post(
+                '/api/attendance/requests/', request_payload(self.mentor, [period], **mapping), format='json',
+            ).json()['id']
+            for period in (1, 2, 3)
+        ]
+        AttendanceRequest.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def changes(self, user, since):
+        return api_client(user).get('/api/attendance/requests/changes/', {'since': _encode_sync_token(since)})
+
+    def test_updates_and_tombstones_after_the_token(self):
+        since = timezone.now() - timedelta(minutes=10)
+        api_client(self.mentor).patch(
+            f'/api/attendance/requests/{self.updated}/status/', {'status': 'PENDING_HOD'}, format='json',
+        )
+        api_client(self.student).delete(f'/api/attendance/requests/{self.deleted}/')
+
+        for user in (self.student, self.mentor):
+            response = self.changes(user, since)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([row['id'] for row in response.json()['changed']], [self.updated])
+            self.assertEqual(response.json()['changed'][0]['status'], 'PENDING_HOD')
+            self.assertEqual(response.json()['deleted'], [self.deleted])
+
+    def test_expired_token_is_gone(self):
+        response = self.changes(self.student, timezone.now() - timedelta(days=31))
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.json()['error']['code'], 'SYNC_TOKEN_EXPIRED')
+
+
+class FacultyDirectoryTests(TestCase):
+    """GET /api/faculty/directory/"""
+
+    def setUp(self):
+        invalidate_directory()
+        self.addCleanup(invalidate_directory)
+        make_faculty('mentor@example.com')
+        make_faculty('ece@example.com', department='ECE')
+        self.client = api_client(make_student('student@example.com', 'REG-1'))
+
+    def test_grouped_by_department_and_not_modified_from_cache(self):
+        response = self.client.get('/api/faculty/directory/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 2)
+        self.assertEqual([group['department'] for group in response.json()['departments']], ['CSE', 'ECE'])
+
+        with self.assertNumQueries(0):
+            repeat = self.client.get('/api/faculty/directory/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+
+    def test_faculty_changes_replace_the_etag(self):
+        etag = self.client.get('/api/faculty/directory/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            make_faculty('new@example.com')
+
+        response = self.client.get('/api/faculty/directory/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 3)
+
+
+class StatelessAuthenticationTests(TestCase):
+    """Reads trust the access token's claims; writes reload the user."""
+
+    def setUp(self):
+        self.mentor = make_faculty('mentor@example.com')
+        self.student = make_student('student@example.com', 'REG-1')
+        self.client = APIClient()
+        token = AttendanceRefreshToken.for_user(self.student).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_writes_load_the_database_user(self):
+        User.objects.filter(pk=self.student.pk).update(is_active=False)
+
+        # Until the access token expires, reads are still served from its claims
+        self.assertEqual(self.client.get('/api/attendance/requests/').status_code, 200)
+
+        response = self.client.post('/api/attendance/requests/', request_payload(self.mentor, [1]), format='json')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(AttendanceRequest.objects.exists())
+
+
+class RequestEventsTests(TestCase):
+    """GET /api/attendance/requests/events/"""
+
+    def setUp(self):
+        self.mentor = make_faculty('mentor@example.com')
+        self.hod = make_faculty('hod@example.com', is_hod=True)
+        self.student = make_student('student@example.com', 'REG-1')
+
+    def events(self, user=None):
+        params = {'token': self.token(user)} if user else {}
+        return self.client.get('/api/attendance/requests/events/', params)
+
+    def token(self, user):
+        return str(AttendanceRefreshToken.for_user(user).access_token)
+
+    def test_only_authenticated_faculty_can_subscribe(self):
+        self.assertEqual(self.events().status_code, 401)
+        response = self.client.get('/api/attendance/requests/events/', {'token': 'not-a-jwt'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.events(self.student).status_code, 403)
+
+    @override_settings(ATTENDANCE_EVENT_STREAM_SECONDS=0)
+    async def test_stream_closes_and_unsubscribes(self):
+        token = await sync_to_async(self.token)(self.mentor)
+        response = await self.async_client.get('/api/attendance/requests/events/', {'token': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), b'retry: 5000\n\n')
+        self.assertFalse(broker._subscribers)
+
+    def test_mentors_see_their_requests_and_hods_their_queue(self):
+        def event(coordinator, new_status, previous_status):
+            return {
+                'eventCoordinatorFacultyId': str(coordinator.id),
+                'status': new_status,
+                'previousStatus': previous_status,
+            }
+
+        other = make_faculty('other@example.com')
+        mentor_filter, hod_filter = _event_filter(self.mentor), _event_filter(self.hod)
+
+        self.assertTrue(mentor_filter(event(self.mentor, 'PENDING_MENTOR', None)))
+        self.assertFalse(mentor_filter(event(other, 'PENDING_MENTOR', None)))
+        self.assertFalse(hod_filter(event(self.mentor, 'PENDING_MENTOR', None)))
+        self.assertTrue(hod_filter(event(other, 'PENDING_HOD', 'PENDING_MENTOR')))
+        self.assertTrue(hod_filter(event(other, 'APPROVED', 'PENDING_HOD')))
+
+
+class RollupTests(TestCase):
+    """Daily analytics rollups."""
+
+    def test_requests_without_coordinator_share_one_rollup_row(self):
+        student = make_student('student@example.com', 'REG-1')
+        for periods in ([1], [2]):
+            attendance_request = AttendanceRequest.objects.create(
+                student=student, date=date(2026, 10, 20), periods=periods,
+                event_coordinator='External', proof_faculty='External', purpose='Presenting a paper at the symposium',
+            )
+            record_rollup_transition([attendance_request.id], None, attendance_request.status)
+
+        rollup = RequestDailyRollup.objects.get()
+        self.assertEqual((rollup.coordinator_id, rollup.count), (NO_COORDINATOR, 2))
+        call_command('rebuild_rollups', '--verify', stdout=io.StringIO())
+
+        coordinators = analytics(date(2026, 10, 1), date(2026, 10, 31))['coordinators']
+        self.assertEqual(coordinators, [{
+            'id': None, 'name': None, 'total': 2, 'pendingMentor': 2, 'pendingHOD': 0, 'approved': 0, 'declined': 0,
+        }])
+
+    def test_rollups_follow_transitions_and_feed_analytics(self):
+        mentor = make_faculty('mentor@example.com')
+        hod = make_faculty('hod@example.com', is_hod=True)
+        student = make_student('student@example.com', 'REG-1')
+        student_client, mentor_client = api_client(student), api_client(mentor)
+
+        ids = [
+            student_client.post(
+                '/api/attendance/requests/', request_payload(mentor, periods, request_date), format='json',
+            ).json()['id']
+            for periods, request_date in (([1, 2], '2026-09-10'), ([3], '2026-10-20'), ([4], '2026-10-21'))
+        ]
+        mentor_client.post('/api/attendance/requests/bulk-status/', {'ids': ids[:2], 'status': 'PENDING_HOD'}, format='json')
+        api_client(hod).patch(f'/api/attendance/requests/{ids[0]}/status/', {'status': 'APPROVED'})
+        student_client.delete(f'/api/attendance/requests/{ids[2]}/')
+        call_command('rebuild_rollups', '--verify', stdout=io.StringIO())
+
+        response = api_client(hod).get('/api/attendance/analytics/?dateFrom=2026-09-01&dateTo=2026-10-31')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            [(row['bucket'][:7], row['total'], row['approved'], row['pendingHOD']) for row in data['series']],
+            [('2026-09', 1, 1, 0), ('2026-10', 1, 0, 1)],
+        )
+        self.assertEqual([(row['department'], row['total']) for row in data['departments']], [('CSE', 2)])
+        self.assertEqual([(row['id'], row['name']) for row in data['coordinators']], [(str(mentor.id), mentor.name)])
+        self.assertEqual([(row['period'], row['total']) for row in data['periods']], [(1, 1), (2, 1), (3, 1), (4, 0)])
+        self.assertEqual(api_client(mentor).get('/api/attendance/analytics/').status_code, 403)
+
+
+class AttendanceRequestAdminTests(TestCase):
+    """Admin edits and deletes keep the maintained tables in step."""
+
+    def setUp(self):
+        self.mentor = make_faculty('mentor@example.com')
+        self.student = make_student('student@example.com', 'REG-1')
+        client = api_client(self.student)
+        self.ids = [
+            client.post('/api/attendance/requests/', request_payload(self.mentor, [period]), format='json').json()['id']
+            for period in (1, 2, 3)
+        ]
+        self.admin_user = User.objects.create_superuser(
+            email='admin@example.com', username='admin', password='password123', role='Faculty',
+        )
+        self.model_admin = AttendanceRequestAdmin(AttendanceRequest, admin.site)
+
+    def assert_maintained_tables_verify(self):
+        call_command('recount_statistics', '--verify', stdout=io.StringIO())
+        call_command('rebuild_rollups', '--verify', stdout=io.StringIO())
+
+    def test_status_and_reason_are_read_only(self):
+        readonly = self.model_admin.get_readonly_fields(None)
+        self.assertIn('status', readonly)
+        self.assertIn('reason', readonly)
+
+    def test_saving_a_moved_request_moves_its_rollups(self):
+        attendance_request = AttendanceRequest.objects.get(pk=self.ids[0])
+        attendance_request.date = date(2026, 11, 2)
+        self.model_admin.save_model(None, attendance_request, None, change=True)
+        self.assert_maintained_tables_verify()
+
+    def test_delete_selected_writes_tombstones_and_deltas(self):
+        self.client.force_login(self.admin_user)
+        response = self.client.post('/admin/attendance/attendancerequest/', {
+            'action': 'delete_selected',
+            '_selected_action': self.ids[:2],
+            'post': 'yes',
+        })
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(AttendanceRequest.objects.values_list('id', flat=True)), [uuid.UUID(self.ids[2])])
+        self.assertEqual(
+            {str(request_id) for request_id in AttendanceRequestTombstone.objects.values_list('request_id', flat=True)},
+            set(self.ids[:2]),
+        )
+        self.assert_maintained_tables_verify()
+
+
+class GenerateLoadDataTests(TestCase):
+    """generate_load_data"""
+
+    def generate(self, *args):
+        call_command(
+            'generate_load_data', '--departments', '2', '--faculty', '6', '--students', '20', '--requests', '60',
+            '--anchor-date', '2026-06-30', *args, stdout=io.StringIO(),
+        )
+        return list(AttendanceRequest.objects.order_by('id').values_list('id', 'date', 'status', 'created_at'))
+
+    def test_same_seed_and_anchor_give_the_same_dataset(self):
+        first = self.generate()
+        self.assertEqual(len(first), 60)
+        self.assertEqual(self.generate(), first)
+        self.assertTrue(all(created_at.date() < date(2026, 6, 30) for _, _, _, created_at in first))
+        call_command('recount_statistics', '--verify', stdout=io.StringIO())
+
+    def test_coordinators_are_never_hods(self):
+        self.generate()
+        hods = set(Faculty.objects.filter(is_hod=True).values_list('user_id', flat=True))
+        coordinators = set(AttendanceRequest.objects.values_list('event_coordinator_faculty_id', flat=True))
+        self.assertTrue(coordinators)
+        self.assertFalse(coordinators & hods)
+
+    def test_every_department_needs_a_mentor(self):
+        with self.assertRaisesMessage(CommandError, '--faculty must be at least twice --departments'):
+            call_command('generate_load_data', '--departments', '5', '--faculty', '5', stdout=io.StringIO())
+
+
+class ArchiveRoundTripTests(TestCase):
+    """archive_requests keeps history listings unchanged and indexes members."""
+
+    def setUp(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        archive_settings = override_settings(ATTENDANCE_ARCHIVE_DIR=archive_dir.name)
+        archive_settings.enable()
+        self.addCleanup(archive_settings.disable)
+
+        mentor = make_faculty('mentor@example.com')
+        hod = make_faculty('hod@example.com', is_hod=True)
+        self.member = make_student('member@example.com', 'REG-1')
+        self.leader = make_student('leader@example.com', 'REG-2')
+        mapping = {'periodFacultyMapping': {'1': str(mentor.id), '2': str(mentor.id)}}
+        team = [{'registerNumber': 'REG-1', 'name': 'Member'}, {'registerNumber': 'REG-2', 'name': 'Leader'}]
+        ids = [
+            api_client(self.member).post('/api/attendance/requests/', request_payload(
+                mentor, [1], '2026-10-20', **mapping), format='json').json()['id'],
+            api_client(self.leader).post('/api/attendance/requests/', request_payload(
+                mentor, [1], '2026-10-21', bulkStudents=team, **mapping), format='json').json()['id'],
+            api_client(self.leader).post('/api/attendance/requests/', request_payload(
+                mentor, [2], '2026-10-22', **mapping), format='json').json()['id'],
+        ]
+        for user, new_status in ((mentor, 'PENDING_HOD'), (hod, 'APPROVED')):
+            api_client(user).post(
+                '/api/attendance/requests/bulk-status/', {'ids': ids, 'status': new_status}, format='json',
+            )
+        AttendanceRequest.objects.update(date=F('date') - timedelta(days=365))
+
+    def history(self, user, **params):
+        return api_client(user).get(
+            '/api/attendance/requests/', {'history': 'true', 'dateFrom': '2025-01-01', **params},
+        )
+
+    def test_history_is_the_same_after_archiving(self):
+        before = {
+            (user.email, register_number): self.history(user, **params).json()['results']
+            for user in (self.member, self.leader)
+            for register_number, params in ((None, {}), ('REG-1', {'registerNumber': 'REG-1'}))
+        }
+        self.assertEqual(len(before[('member@example.com', None)]), 2)
+        self.assertEqual(len(before[('leader@example.com', 'REG-1')]), 1)
+
+        call_command('archive_requests', '--before', '2026-01-01', stdout=io.StringIO())
+
+        self.assertFalse(AttendanceRequest.objects.exists())
+        for (email, register_number), results in before.items():
+            user = User.objects.get(email=email)
+            params = {'registerNumber': register_number} if register_number else {}
+            self.assertEqual(self.history(user, **params).json()['results'], results)
+
+    def test_student_lookup_reads_no_blocks(self):
+        call_command('archive_requests', '--before', '2026-01-01', stdout=io.StringIO())
+
+        with mock.patch.object(Segment, 'read_block', side_effect=AssertionError('block decompressed')):
+            visible = find_archived(visible_to_student=str(self.member.id), visible_register_number='REG-1')
+            listed = find_archived(register_number='REG-2')
+        self.assertEqual(len(visible), 2)
+        self.assertEqual(len(listed), 1)
+
+    def test_cursor_listing_reaching_the_archive_is_rejected(self):
+        call_command('archive_requests', '--before', '2026-01-01', stdout=io.StringIO())
+
+        response = self.history(self.member, pagination='cursor')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error']['code'], 'VALIDATION_ERROR')
+        self.assertEqual(self.history(self.member, pagination='cursor', dateFrom='2026-01-01').status_code, 200)
+
+
+class RequestInstrumentationTests(TestCase):
+    """Server-Timing query counts in sync and async mode."""
+
+    def test_sync_request_reports_its_queries(self):
+        response = api_client(make_faculty('hod@example.com', is_hod=True)).get('/api/attendance/requests/')
+        self.assertRegex(response['Server-Timing'], r'db;dur=[0-9.]+;desc="[1-9][0-9]* queries"')
+
+    def test_async_mode_runs_without_thread_hops_and_counts_queries(self):
+        async def view(request):
+            await sync_to_async(lambda: list(User.objects.all()))()
+            return HttpResponse()
+
+        middleware = RequestInstrumentationMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertTrue(iscoroutinefunction(middleware.process_view))
+
+        response = async_to_sync(middleware)(RequestFactory().get('/'))
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+
+class MetricsEndpointTests(TestCase):
+    """/metrics is closed unless a token is configured and sent."""
+
+    @override_settings(ATTENDANCE_METRICS_TOKEN='')
+    def test_closed_without_a_configured_token(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['error']['code'], 'FORBIDDEN')
+
+    @override_settings(ATTENDANCE_METRICS_TOKEN='scrape-secret')
+    def test_requires_the_configured_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'attendance_', response.content)
+
+
+class GunicornMetricsDirTests(SimpleTestCase):
+    """Server start only removes metric files of processes that have exited."""
+
+    def test_keeps_files_of_live_processes(self):
+        spec = importlib.util.spec_from_file_location(
+            'gunicorn_conf', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'gunicorn.conf.py')
+        )
+        gunicorn_conf = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(gunicorn_conf)
+
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            live = os.path.join(metrics_dir, f'counter_{os.getpid()}.db')
+            dead = os.path.join(metrics_dir, 'gauge_livesum_999999999.db')
+            for path in (live, dead):
+                open(path, 'wb').close()
+
+            with mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': metrics_dir}):
+                gunicorn_conf.on_starting(server=None)
+
+            self.assertTrue(os.path.exists(live))
+            self.assertFalse(os.path.exists(dead))
@@ -0,0 +1,115 @@
+"""
+Set-based status changes for many attendance requests at once.
+
+Used by the bulk-status endpoint and the admin actions. One UPDATE moves the
+whole batch, and the maintained counters and rollups, transition metrics,
+live events, period excusals and approval notifications follow in the same
+transaction. Deletions go through delete_requests for the same reason.
+"""
+from collections import defaultdict
+
+from django.utils import timezone
+
+from .counters import apply_deltas, transition_deltas
+from .events import build_event, publish_events
+from .excusals import record_excusals
+from .metrics import record_status_transitions
+from .models import AttendanceRequest, AttendanceRequestTombstone, BulkStudentMember
+from .notifications import enqueue_approval_notifications
+from .rollups import record_rollup_transition
+
+# Columns apply_status_change needs from each locked row
+TRANSITION_ROW_FIELDS = ('id', 'student_id', 'event_coordinator_faculty_id')
+
+
+def lock_requests(queryset, source_status):
+    """Lock the requests of ``queryset`` still in ``source_status``; returns their TRANSITION_ROW_FIELDS rows."""
+    return list(
+        queryset.filter(status=source_status)
+        .select_for_update()
+        # Lock in primary key order so overlapping batches cannot deadlock
+        .order_by('id')
+        .values(*TRANSITION_ROW_FIELDS)
+    )
+
+
+def apply_status_change(rows, source_status, new_status, actor, reason=''):
+    """
+    Move the locked ``rows`` (from lock_requests) from ``source_status`` to
+    ``new_status``. ``actor`` is named as the approver in notifications.
+    Call inside a transaction. Returns the ids of the updated requests.
+    """
+    updated_ids = [row['id'] for row in rows]
+    if not updated_ids:
+        return updated_ids
+
+    now = timezone.now()
+    changes = {'status': new_status, 'updated_at': now}
+    if new_status == 'DECLINED':
+        changes['reason'] = reason
+    AttendanceRequest.objects.filter(id__in=updated_ids).update(**changes)
+
+    apply_deltas(transition_deltas(
+        [(row['student_id'], row['event_coordinator_faculty_id']) for row in rows],
+        source_status,
+        new_status,
+    ))
+    record_rollup_transition(updated_ids, source_status, new_status)
+    record_status_transitions(source_status, new_status, len(rows))
+    publish_events([
+        build_event(row['id'], new_status, row['event_coordinator_faculty_id'], now,
+                    'status_changed', previous_status=source_status)
+        for row in rows
+    ])
+
+    # Record excusals and queue the whole batch's notifications with the status change
+    if new_status == 'APPROVED':
+        approved = list(AttendanceRequest.objects.filter(id__in=updated_ids).select_related('student'))
+        record_excusals(approved)
+        enqueue_approval_notifications(approved, actor)
+    return updated_ids
+
+
+def delete_requests(queryset):
+    """
+    Delete the requests of ``queryset`` with their counter and rollup deltas,
+    leaving a tombstone for the creator and every linked team member so
+    delta-sync clients drop them. Call inside a transaction. Returns how
+    many requests were deleted.
+    """
+    rows = list(
+        queryset.select_for_update()
+        .order_by('id')
+        .values('status', *TRANSITION_ROW_FIELDS)
+    )
+    if not rows:
+        return 0
+
+    members = defaultdict(set)
+    for request_id, user_id in BulkStudentMember.objects.filter(
+        attendance_request_id__in=[row['id'] for row in rows], user__isnull=False
+    ).values_list('attendance_request_id', 'user_id'):
+        members[request_id].add(user_id)
+    AttendanceRequestTombstone.objects.bulk_create([
+        AttendanceRequestTombstone(
+            request_id=row['id'],
+            student_id=student_id,
+            event_coordinator_faculty_id=row['event_coordinator_faculty_id'],
+        )
+        for row in rows
+        for student_id in [row['student_id'], *(members[row['id']] - {row['student_id']})]
+    ])
+
+    by_status = defaultdict(list)
+    for row in rows:
+        by_status[row['status']].append(row)
+    for status, status_rows in by_status.items():
+        apply_deltas(transition_deltas(
+            [(row['student_id'], row['event_coordinator_faculty_id']) for row in status_rows],
+            status,
+            None,
+        ))
+        record_rollup_transition([row['id'] for row in status_rows], status, None)
+
+    AttendanceRequest.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    return len(rows)
@@ -20,11 +20,21 @@ urlpatterns = [
     
     # Faculty endpoints
     path('faculty/', views.FacultyListView.as_view(), name='faculty-list'),
+    path('faculty/directory/', views.faculty_directory_view, name='faculty-directory'),
     path('faculty/by-department/<str:department>/', views.FacultyByDepartmentView.as_view(), name='faculty-by-department'),
     
+    # Live queue events (Server-Sent Events, served via ASGI)
+    path('attendance/requests/events/', views.request_events_view, name='attendance-request-events'),
+    
     # Statistics endpoint
     path('attendance/statistics/', views.statistics_view, name='attendance-statistics'),
     
+    # Request trends from the daily rollups (HOD dashboards)
+    path('attendance/analytics/', views.analytics_view, name='attendance-analytics'),
+    
+    # Students excused from the calling faculty member's periods
+    path('attendance/my-periods/', views.my_periods_view, name='attendance-my-periods'),
+    
     # Router URLs (attendance requests CRUD)
     path('', include(router.urls)),
 ]
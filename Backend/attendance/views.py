@@ -7,17 +7,49 @@ from rest_framework import viewsets, status, generics
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
-from django.db.models import Q, Count
-from datetime import datetime
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework.exceptions import AuthenticationFailed
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import datetime, timedelta
+import asyncio
+import base64
+import hmac
+import json
 
-from .models import User, Faculty, Student, AttendanceRequest
+from .models import (
+    User, Faculty, Student, AttendanceRequest, AttendanceRequestTombstone, BulkStudentMember, PeriodExcusal,
+    periods_to_mask, mask_to_periods,
+)
 from .serializers import (
     UserSerializer, LoginSerializer, FacultySerializer,
     AttendanceRequestSerializer, AttendanceRequestCreateSerializer,
-    AttendanceRequestStatusUpdateSerializer
+    AttendanceRequestStatusUpdateSerializer, AttendanceRequestBulkStatusUpdateSerializer,
+    ATTENDANCE_REQUEST_ROW_FIELDS, serialize_request_rows
 )
+from .authentication import AttendanceRefreshToken, StatelessJWTAuthentication
 from .permissions import IsStudent, IsFaculty, IsHOD, IsStudentOwner
+from .pagination import AttendanceRequestPagination
+from .conditional import make_etag, queryset_etag, etag_matches, set_validators, not_modified
+from .events import broker, publish_request_event
+from .notifications import enqueue_approval_notifications
+from .metrics import record_status_transitions, render_metrics
+from .excusals import record_excusals
+from .directory import get_directory
+from .archive import MergedListing, archive_version, find_archived, reaches_archive
+from .search import apply_search
+from .transitions import apply_status_change, delete_requests, lock_requests
+from .rollups import analytics, record_rollup_transition, GRANULARITIES
+from .export import CSVRenderer, XLSXRenderer, XLSX_CONTENT_TYPE, build_xlsx, stream_csv
+from .counters import (
+    record_transition, scope_counts, student_scope, coordinator_scope, ALL_SCOPE
+)
 
 
 # ============================================================================
@@ -36,8 +68,8 @@ def login_view(request):
     
     user = serializer.validated_data['user']
     
-    # Generate JWT tokens
-    refresh = RefreshToken.for_user(user)
+    # Generate JWT tokens carrying role, isHOD and department claims
+    refresh = AttendanceRefreshToken.for_user(user)
     
     # Prepare user data
     user_data = {
@@ -68,7 +100,7 @@ def logout_view(request):
     try:
         refresh_token = request.data.get('refreshToken')
         if refresh_token:
-            token = RefreshToken(refresh_token)
+            token = AttendanceRefreshToken(refresh_token)
             token.blacklist()
         return Response(status=status.HTTP_204_NO_CONTENT)
     except Exception:
@@ -116,7 +148,10 @@ def refresh_token_view(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        refresh = RefreshToken(refresh_token)
+        refresh = AttendanceRefreshToken(refresh_token)
+        # Re-read the claims so role or HOD changes reach the new access token
+        user = User.objects.get(id=refresh['user_id'], is_active=True)
+        refresh.set_user_claims(user)
         return Response({
             'token': str(refresh.access_token)
         })
@@ -134,20 +169,29 @@ def refresh_token_view(request):
 # Attendance Request Views
 # ============================================================================
 
+# Relations AttendanceRequestSerializer reads; joined up front to avoid N+1 queries
+SERIALIZED_RELATIONS = ('student', 'created_by', 'event_coordinator_faculty')
+
+
 class AttendanceRequestViewSet(viewsets.ModelViewSet):
     """
     ViewSet for AttendanceRequest CRUD operations.
     
     Endpoints:
     - GET /api/attendance/requests - List requests with filters
+      (page-number by default, ?pagination=cursor for keyset paging)
     - GET /api/attendance/requests/:id - Get single request
     - POST /api/attendance/requests - Create request(s)
     - PATCH /api/attendance/requests/:id/status - Update status
+    - POST /api/attendance/requests/bulk-status - Update status of many requests
     - DELETE /api/attendance/requests/:id - Delete request
+    - GET /api/attendance/requests/changes?since=<token> - Delta sync
+    - GET /api/attendance/requests/export?format=csv|xlsx - Streaming export
     """
     queryset = AttendanceRequest.objects.all()
     serializer_class = AttendanceRequestSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = AttendanceRequestPagination
     
     def get_queryset(self):
         """Filter queryset based on user role and query parameters."""
@@ -156,8 +200,8 @@ class AttendanceRequestViewSet(viewsets.ModelViewSet):
         
         # Role-based filtering
         if user.role == 'Student':
-            # Students see only their own requests
-            queryset = queryset.filter(student=user)
+            # Students see their own requests and team requests they are listed on
+            queryset = queryset.filter(self._student_visibility(user))
         
         elif user.role == 'Faculty':
             if hasattr(user, 'faculty_profile'):
@@ -183,15 +227,26 @@ class AttendanceRequestViewSet(viewsets.ModelViewSet):
                         # Show only PENDING_MENTOR where they are event coordinator
                         queryset = queryset.filter(status='PENDING_MENTOR', event_coordinator_faculty=user)
         
-        # Apply query parameter filters
+        return self._apply_query_filters(queryset).select_related(*SERIALIZED_RELATIONS)
+    
+    def _apply_query_filters(self, queryset):
+        """Apply the studentId, registerNumber, status, date range and q (search) filters."""
         student_id = self.request.query_params.get('studentId')
+        register_number = self.request.query_params.get('registerNumber')
         status_filter = self.request.query_params.get('status')
         date_from = self.request.query_params.get('dateFrom')
         date_to = self.request.query_params.get('dateTo')
+        search = self.request.query_params.get('q', '').strip()
         
         if student_id:
             queryset = queryset.filter(student__id=student_id)
         
+        if register_number:
+            # Index seek on bulk_student_members instead of scanning bulk_students JSON
+            queryset = queryset.filter(id__in=BulkStudentMember.objects.filter(
+                register_number=register_number.strip()
+            ).values('attendance_request_id'))
+        
         if status_filter:
             queryset = queryset.filter(status=status_filter)
         
@@ -201,7 +256,154 @@ class AttendanceRequestViewSet(viewsets.ModelViewSet):
         if date_to:
             queryset = queryset.filter(date__lte=date_to)
         
-        return queryset.select_related('student')
+        if search:
+            # Ranked best match first; cursor paging and exports keep their own order
+            queryset = apply_search(queryset, search)
+        
+        return queryset
+    
+    def _visible_queryset(self, user):
+        """
+        Every request the user can ever see, regardless of queue or history mode.
+        Used by delta sync so rows that move between queues still reach the client.
+        """
+        queryset = AttendanceRequest.objects.all()
+        
+        if user.role == 'Student':
+            return queryset.filter(self._student_visibility(user))
+        
+        if user.role == 'Faculty' and hasattr(user, 'faculty_profile'):
+            if user.faculty_profile.is_hod:
+                return queryset
+            return queryset.filter(event_coordinator_faculty=user)
+        
+        return queryset.none()
+    
+    def _student_visibility(self, user):
+        """
+        Filter for the requests a student can see: requests they created and
+        team requests listing them, matched by account or register number.
+        """
+        memberships = Q(user=user)
+        student_profile = Student.objects.filter(user=user).only('student_id').first()
+        if student_profile:
+            memberships |= Q(register_number=student_profile.student_id)
+        
+        return Q(student=user) | Q(id__in=BulkStudentMember.objects.filter(memberships).values('attendance_request_id'))
+    
+    def _archived_requests(self, user, history):
+        """
+        Archived requests for a listing or export, or None when its dateFrom
+        does not reach back into the archive. Mirrors the role visibility of
+        get_queryset (history mode) and the query filters; searches (q) only
+        cover live requests.
+        """
+        filters = self._archive_filters(user, history)
+        if filters is None:
+            return None
+        return find_archived(**filters)
+    
+    def _archive_filters(self, user, history):
+        """find_archived arguments for this listing, or None when it needs no archived requests."""
+        params = self.request.query_params
+        if params.get('q', '').strip():
+            return None
+        try:
+            date_from = parse_date(params.get('dateFrom') or '')
+            date_to = parse_date(params.get('dateTo') or '')
+        except ValueError:
+            return None
+        if not reaches_archive(date_from):
+            return None
+        
+        visibility = {}
+        if user.role == 'Student':
+            visibility['visible_to_student'] = str(user.id)
+            visibility['visible_register_number'] = (
+                Student.objects.filter(user=user).values_list('student_id', flat=True).first()
+            )
+        elif user.role == 'Faculty' and hasattr(user, 'faculty_profile') and history:
+            # Archived requests are closed, so they only show up in faculty history
+            if not user.faculty_profile.is_hod:
+                visibility['coordinator_id'] = str(user.id)
+        else:
+            return None
+        
+        return dict(
+            date_from=date_from,
+            date_to=date_to,
+            status=params.get('status'),
+            student_id=params.get('studentId'),
+            register_number=(params.get('registerNumber') or '').strip() or None,
+            **visibility,
+        )
+    
+    def _visible_tombstones(self, user):
+        """Tombstones for deleted requests the user could see."""
+        tombstones = AttendanceRequestTombstone.objects.all()
+        
+        if user.role == 'Student':
+            return tombstones.filter(student_id=user.id)
+        
+        if user.role == 'Faculty' and hasattr(user, 'faculty_profile'):
+            if user.faculty_profile.is_hod:
+                return tombstones
+            return tombstones.filter(event_coordinator_faculty_id=user.id)
+        
+        return tombstones.none()
+    
+    def list(self, request, *args, **kwargs):
+        """
+        List requests, answering 304 Not Modified when the client's ETag
+        still matches the version of its role-filtered queryset.
+        
+        Pages are read as one joined .values() projection and mapped
+        straight to the AttendanceRequestSerializer JSON shape. History
+        pages whose dateFrom reaches the archive merge in archived requests.
+        
+        Cursor pages carry no ETag: its version aggregates the whole scoped
+        queryset, which would cost more than the keyset page itself. Keyset
+        pages only walk live rows, so cursor listings that reach archived
+        dates are rejected rather than silently leaving those requests out.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        history = str(request.query_params.get('history')).lower() in ('1', 'true', 'yes')
+        
+        if self.paginator.use_cursor(request):
+            if self._archive_filters(request.user, history) is not None:
+                return Response({
+                    'error': {
+                        'message': 'dateFrom reaches archived requests, which cursor pagination cannot return; use page pagination',
+                        'code': 'VALIDATION_ERROR',
+                        'statusCode': 400
+                    }
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            rows = queryset.values(*ATTENDANCE_REQUEST_ROW_FIELDS)
+            page = self.paginate_queryset(rows)
+            return self.get_paginated_response(serialize_request_rows(page))
+        
+        archived = self._archived_requests(request.user, history)
+        if archived is not None:
+            etag = queryset_etag(request, queryset, archive_version())
+        else:
+            etag = queryset_etag(request, queryset)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        if archived is not None:
+            rows = MergedListing(queryset, archived)
+            page = self.paginate_queryset(rows)
+            response = self.get_paginated_response(page) if page is not None else Response(rows[:])
+            return set_validators(response, etag)
+        
+        rows = queryset.values(*ATTENDANCE_REQUEST_ROW_FIELDS)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            response = self.get_paginated_response(serialize_request_rows(page))
+        else:
+            response = Response(serialize_request_rows(rows))
+        return set_validators(response, etag)
     
     def create(self, request, *args, **kwargs):
         """
@@ -238,7 +440,6 @@ class AttendanceRequestViewSet(viewsets.ModelViewSet):
             
             if event_coordinator_faculty_id:
                 try:
-                    from .models import User
                     event_coordinator_faculty = User.objects.get(id=event_coordinator_faculty_id, role='Faculty')
                 except (User.DoesNotExist, ValueError):
                     return Response({
@@ -249,39 +450,75 @@ class AttendanceRequestViewSet(viewsets.ModelViewSet):
                         }
                     }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create the attendance request
-        if is_bulk:
-            # Bulk request - Student applying for multiple students (team/group)
-            attendance_request = AttendanceRequest.objects.create(
-                student=request.user,  # Student who created the bulk request
-                is_bulk_request=True,
-                bulk_students=validated_data['bulkStudents'],
-                created_by=request.user,  # Same as student for tracking
-                date=validated_data['date'],
-                periods=validated_data['periods'],
-                period_faculty_mapping=validated_data.get('periodFacultyMapping', validated_data.get('period_faculty_mapping', {})),
-                event_coordinator=validated_data.get('eventCoordinator', validated_data.get('event_coordinator')),
-                event_coordinator_faculty=event_coordinator_faculty,
-                proof_faculty=validated_data.get('proofFaculty', validated_data.get('proof_faculty')),
-                purpose=validated_data['purpose'],
-                status='PENDING_MENTOR'
-            )
-        else:
-            # Single student request
-            attendance_request = AttendanceRequest.objects.create(
-                student=request.user,
-                is_bulk_request=False,
-                bulk_students=[],
-                created_by=request.user,
-                date=validated_data['date'],
-                periods=validated_data['periods'],
-                period_faculty_mapping=validated_data.get('periodFacultyMapping', validated_data.get('period_faculty_mapping', {})),
-                event_coordinator=validated_data.get('eventCoordinator', validated_data.get('event_coordinator')),
-                event_coordinator_faculty=event_coordinator_faculty,
-                proof_faculty=validated_data.get('proofFaculty', validated_data.get('proof_faculty')),
-                purpose=validated_data['purpose'],
-                status='PENDING_MENTOR'
+        with transaction.atomic():
+            # Serialize this student's submissions: a concurrent create for the same
+            # date waits here and then sees this one in the overlap check. The user
+            # row is locked because not every student has a Student profile.
+            list(User.objects.select_for_update().filter(pk=request.user.pk).values_list('pk', flat=True))
+            
+            # Reject requests whose periods overlap the student's other live requests that day
+            periods_mask = periods_to_mask(validated_data['periods'])
+            overlapping = list(
+                AttendanceRequest.objects.filter(student=request.user, date=validated_data['date'])
+                .exclude(status='DECLINED')
+                .annotate(overlap=F('periods_mask').bitand(periods_mask))
+                .filter(overlap__gt=0)
+                .order_by()
+                .values('id', 'overlap')
             )
+            if overlapping:
+                overlap = 0
+                for row in overlapping:
+                    overlap |= row['overlap']
+                return Response({
+                    'error': {
+                        'message': f"You already have a request for period(s) {', '.join(map(str, mask_to_periods(overlap)))} on this date",
+                        'code': 'OVERLAPPING_REQUEST',
+                        'statusCode': 409,
+                        'conflictingRequestIds': [str(row['id']) for row in overlapping],
+                        'periods': mask_to_periods(overlap),
+                    }
+                }, status=status.HTTP_409_CONFLICT)
+            
+            # Create the attendance request
+            if is_bulk:
+                # Bulk request - Student applying for multiple students (team/group)
+                attendance_request = AttendanceRequest.objects.create(
+                    student=request.user,  # Student who created the bulk request
+                    is_bulk_request=True,
+                    bulk_students=validated_data['bulkStudents'],
+                    created_by=request.user,  # Same as student for tracking
+                    date=validated_data['date'],
+                    periods=validated_data['periods'],
+                    period_faculty_mapping=validated_data.get('periodFacultyMapping', validated_data.get('period_faculty_mapping', {})),
+                    event_coordinator=validated_data.get('eventCoordinator', validated_data.get('event_coordinator')),
+                    event_coordinator_faculty=event_coordinator_faculty,
+                    proof_faculty=validated_data.get('proofFaculty', validated_data.get('proof_faculty')),
+                    purpose=validated_data['purpose'],
+                    status='PENDING_MENTOR'
+                )
+            else:
+                # Single student request
+                attendance_request = AttendanceRequest.objects.create(
+                    student=request.user,
+                    is_bulk_request=False,
+                    bulk_students=[],
+                    created_by=request.user,
+                    date=validated_data['date'],
+                    periods=validated_data['periods'],
+                    period_faculty_mapping=validated_data.get('periodFacultyMapping', validated_data.get('period_faculty_mapping', {})),
+                    event_coordinator=validated_data.get('eventCoordinator', validated_data.get('event_coordinator')),
+                    event_coordinator_faculty=event_coordinator_faculty,
+                    proof_faculty=validated_data.get('proofFaculty', validated_data.get('proof_faculty')),
+                    purpose=validated_data['purpose'],
+                    status='PENDING_MENTOR'
+                )
+            
+            if attendance_request.is_bulk_request:
+                BulkStudentMember.objects.bulk_create(attendance_request.build_members())
+            record_transition(attendance_request, None, attendance_request.status)
+            record_rollup_transition([attendance_request.id], None, attendance_request.status)
+            publish_request_event(attendance_request, 'created')
         
         # Serialize and return response
         response_serializer = AttendanceRequestSerializer(attendance_request)
@@ -313,27 +550,119 @@ class AttendanceRequestViewSet(viewsets.ModelViewSet):
                 }
             }, status=status.HTTP_403_FORBIDDEN)
         
-        instance.delete()
+        with transaction.atomic():
+            # Tombstones for the creator and every linked team member, plus counter and rollup deltas
+            delete_requests(AttendanceRequest.objects.filter(pk=instance.pk))
+            
+            # Tombstones only need to outlive the sync token retention window
+            AttendanceRequestTombstone.objects.filter(
+                deleted_at__lt=timezone.now() - _sync_retention()
+            ).delete()
+        
         return Response(status=status.HTTP_204_NO_CONTENT)
     
-    @action(detail=True, methods=['patch'], url_path='status')
-    def update_status(self, request, pk=None):
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
         """
-        PATCH /api/attendance/requests/:id/status
-        Update request status (approve/decline).
+        GET /api/attendance/requests/changes?since=<token>
+        Return requests created or updated after the token's watermark, the IDs
+        of requests deleted since then, and a new token.
+        
+        Call without `since` to obtain a starting token. Changes are computed
+        with a small overlap window, so clients must upsert rows by ID.
         """
-        instance = self.get_object()
-        serializer = AttendanceRequestStatusUpdateSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        user = request.user
+        now = timezone.now()
+        since_token = request.query_params.get('since')
         
-        new_status = serializer.validated_data['status']
-        reason = serializer.validated_data.get('reason', '')
+        if not since_token:
+            return Response({
+                'changed': [],
+                'deleted': [],
+                'token': _encode_sync_token(now),
+            })
         
-        # Validate status transitions
-        current_status = instance.status
+        try:
+            since = _decode_sync_token(since_token)
+        except ValueError:
+            return Response({
+                'error': {
+                    'message': 'Invalid sync token',
+                    'code': 'VALIDATION_ERROR',
+                    'statusCode': 400
+                }
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Tombstones older than the retention window are gone; force a full reload
+        if since < now - _sync_retention():
+            return Response({
+                'error': {
+                    'message': 'Sync token expired, reload the full list',
+                    'code': 'SYNC_TOKEN_EXPIRED',
+                    'statusCode': 410
+                }
+            }, status=status.HTTP_410_GONE)
+        
+        # Re-scan a short window so rows committed late by slower transactions are not missed
+        window_start = since - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+        
+        changed = (
+            self._visible_queryset(user)
+            .filter(updated_at__gt=window_start)
+            .order_by('updated_at')
+            .values(*ATTENDANCE_REQUEST_ROW_FIELDS)
+        )
+        deleted = (
+            self._visible_tombstones(user)
+            .filter(deleted_at__gt=window_start)
+            .values_list('request_id', flat=True)
+            .distinct()
+        )
+        
+        return Response({
+            'changed': serialize_request_rows(changed),
+            'deleted': [str(request_id) for request_id in deleted],
+            'token': _encode_sync_token(now),
+        })
+    
+    @action(detail=False, methods=['get'], url_path='export',
+            renderer_classes=[CSVRenderer, XLSXRenderer, JSONRenderer])
+    def export(self, request):
+        """
+        GET /api/attendance/requests/export?format=csv|xlsx
+        Export every request the user can see (history included), filtered by
+        status, dateFrom, dateTo, studentId and registerNumber. Bulk requests
+        produce one row per listed student.
+        """
+        queryset = self._apply_query_filters(self._visible_queryset(request.user))
+        archived = self._archived_requests(request.user, history=True) or []
+        filename = f"attendance-requests-{timezone.localdate().isoformat()}"
+        
+        if request.accepted_renderer.format == 'xlsx':
+            try:
+                output = build_xlsx(queryset, archived)
+            except ImportError:
+                return Response({
+                    'error': {
+                        'message': 'XLSX export is not available on this server, use format=csv',
+                        'code': 'EXPORT_FORMAT_UNAVAILABLE',
+                        'statusCode': 406
+                    }
+                }, status=status.HTTP_406_NOT_ACCEPTABLE)
+            return FileResponse(output, as_attachment=True, filename=f'{filename}.xlsx', content_type=XLSX_CONTENT_TYPE)
         
+        response = StreamingHttpResponse(stream_csv(queryset, archived), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        return response
+    
+    def _transition_error(self, user, current_status, new_status):
+        """
+        Check the two-tier workflow rules for moving a request from
+        current_status to new_status. Returns an error Response, or None
+        when the transition is allowed.
+        """
         # Only Faculty can update status
-        if request.user.role != 'Faculty':
+        if user.role != 'Faculty':
             return Response({
                 'error': {
                     'message': 'Only faculty can approve/decline requests',
@@ -344,7 +673,7 @@ class AttendanceRequestViewSet(viewsets.ModelViewSet):
         
         # Mentor can only approve PENDING_MENTOR to PENDING_HOD or DECLINED
         if current_status == 'PENDING_MENTOR':
-            if not hasattr(request.user, 'faculty_profile') or request.user.faculty_profile.is_hod:
+            if not hasattr(user, 'faculty_profile') or user.faculty_profile.is_hod:
                 return Response({
                     'error': {
                         'message': 'Only mentors can approve PENDING_MENTOR requests',
@@ -352,7 +681,7 @@ class AttendanceRequestViewSet(viewsets.ModelViewSet):
                         'statusCode': 403
                     }
                 }, status=status.HTTP_403_FORBIDDEN)
-            
+        
             if new_status not in ['PENDING_HOD', 'DECLINED']:
                 return Response({
                     'error': {
@@ -364,7 +693,7 @@ class AttendanceRequestViewSet(viewsets.ModelViewSet):
         
         # HOD can only approve PENDING_HOD to APPROVED or DECLINED
         elif current_status == 'PENDING_HOD':
-            if not hasattr(request.user, 'faculty_profile') or not request.user.faculty_profile.is_hod:
+            if not hasattr(user, 'faculty_profile') or not user.faculty_profile.is_hod:
                 return Response({
                     'error': {
                         'message': 'Only HOD can approve PENDING_HOD requests',
@@ -372,7 +701,7 @@ class AttendanceRequestViewSet(viewsets.ModelViewSet):
                         'statusCode': 403
                     }
                 }, status=status.HTTP_403_FORBIDDEN)
-            
+        
             if new_status not in ['APPROVED', 'DECLINED']:
                 return Response({
                     'error': {
@@ -392,120 +721,237 @@ class AttendanceRequestViewSet(viewsets.ModelViewSet):
                 }
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Update status
-        instance.status = new_status
-        if new_status == 'DECLINED':
-            instance.reason = reason
-        instance.save()
+        return None
+        
+    @action(detail=True, methods=['patch'], url_path='status')
+    def update_status(self, request, pk=None):
+        """
+        PATCH /api/attendance/requests/:id/status
+        Update request status (approve/decline).
+        """
+        instance = self.get_object()
+        serializer = AttendanceRequestStatusUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        new_status = serializer.validated_data['status']
+        reason = serializer.validated_data.get('reason', '')
         
-        # Send email notifications to period faculty when HOD approves
-        if new_status == 'APPROVED' and current_status == 'PENDING_HOD':
-            self._send_faculty_notifications(instance, request.user)
+        # Validate status transitions
+        current_status = instance.status
+        error_response = self._transition_error(request.user, current_status, new_status)
+        if error_response is not None:
+            return error_response
+        
+        # Update status
+        with transaction.atomic():
+            # Lock the row so concurrent reviews cannot apply the same transition twice
+            locked_status = (
+                AttendanceRequest.objects.select_for_update()
+                .filter(pk=instance.pk)
+                .values_list('status', flat=True)
+                .first()
+            )
+            if locked_status != current_status:
+                return Response({
+                    'error': {
+                        'message': 'Request status was changed by someone else, please reload',
+                        'code': 'INVALID_STATUS_TRANSITION',
+                        'statusCode': 409
+                    }
+                }, status=status.HTTP_409_CONFLICT)
+            
+            instance.status = new_status
+            if new_status == 'DECLINED':
+                instance.reason = reason
+            instance.save()
+            
+            record_transition(instance, current_status, new_status)
+            record_rollup_transition([instance.id], current_status, new_status)
+            record_status_transitions(current_status, new_status)
+            publish_request_event(instance, 'status_changed', previous_status=current_status)
+            
+            # Queue email notifications to period faculty when HOD approves
+            if new_status == 'APPROVED' and current_status == 'PENDING_HOD':
+                record_excusals([instance])
+                enqueue_approval_notifications([instance], request.user)
         
         # Serialize and return
         response_serializer = AttendanceRequestSerializer(instance)
         return Response(response_serializer.data)
     
-    def _send_faculty_notifications(self, request_instance, hod_user):
-        """Send email notifications to faculty members for their respective periods from HOD's email."""
-        try:
-            from django.core.mail import send_mail
-            from django.conf import settings
-            
-            period_faculty_mapping = request_instance.period_faculty_mapping
-            if not period_faculty_mapping:
-                return
-            
-            # Get HOD's name and email
-            hod_name = hod_user.get_full_name()
-            hod_email = hod_user.email
-            hod_faculty_profile = hod_user.faculty_profile if hasattr(hod_user, 'faculty_profile') else None
-            hod_title = hod_faculty_profile.title if hod_faculty_profile else "HOD"
-            
-            # Determine if bulk request
-            is_bulk = request_instance.is_bulk_request
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_update_status(self, request):
+        """
+        POST /api/attendance/requests/bulk-status
+        Approve or decline many requests from the caller's queue at once.
+        
+        Applies the same transition rules as update_status in one transaction
+        with set-based UPDATEs, returns a result per ID, and queues the batch's
+        notifications in the same transaction.
+        """
+        serializer = AttendanceRequestBulkStatusUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        user = request.user
+        new_status = serializer.validated_data['status']
+        reason = serializer.validated_data.get('reason', '')
+        request_ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        
+        # Mentors clear PENDING_MENTOR, HODs clear PENDING_HOD
+        is_hod = hasattr(user, 'faculty_profile') and user.faculty_profile.is_hod
+        source_status = 'PENDING_HOD' if is_hod else 'PENDING_MENTOR'
+        error_response = self._transition_error(user, source_status, new_status)
+        if error_response is not None:
+            return error_response
+        
+        with transaction.atomic():
+            candidates = self._visible_queryset(user).filter(id__in=request_ids)
+            rows = lock_requests(candidates, source_status)
+            updated_ids = apply_status_change(rows, source_status, new_status, user, reason)
             
-            # Prepare student information
-            if is_bulk:
-                student_count = len(request_instance.bulk_students)
-                students_list = "\n".join([
-                    f"  - {s['registerNumber']}: {s['name']}" 
-                    for s in request_instance.bulk_students
-                ])
-                student_info = f"Bulk Request ({student_count} students):\n{students_list}"
-                subject_student = f"{student_count} Students"
+            # Rows the caller can see but that are no longer in their queue
+            skipped = dict(
+                candidates.exclude(id__in=updated_ids).values_list('id', 'status')
+            )
+        
+        updated = set(updated_ids)
+        results = []
+        for request_id in request_ids:
+            if request_id in updated:
+                results.append({'id': str(request_id), 'result': 'UPDATED', 'status': new_status})
+            elif request_id in skipped:
+                results.append({'id': str(request_id), 'result': 'INVALID_STATUS_TRANSITION', 'status': skipped[request_id]})
             else:
-                student_info = f"Name:          {request_instance.student.get_full_name()}\nEmail:         {request_instance.student.email}"
-                subject_student = request_instance.student.get_full_name()
-            
-            # Get unique faculty IDs
-            faculty_ids = set(period_faculty_mapping.values())
-            
-            for faculty_id in faculty_ids:
+                results.append({'id': str(request_id), 'result': 'NOT_FOUND', 'status': None})
+        
+        return Response({
+            'status': new_status,
+            'updated': len(updated_ids),
+            'results': results,
+        })
+
+
+# ============================================================================
+# Live Event Views
+# ============================================================================
+
+# Seconds between SSE keepalive comments on an idle stream
+EVENT_STREAM_HEARTBEAT_SECONDS = 15
+
+
+@sync_to_async
+def _authenticate_event_stream(request):
+    """
+    Resolve the user for an event stream from the Authorization header or,
+    since EventSource cannot send headers, from a ``token`` query parameter.
+    """
+    authenticator = StatelessJWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header else None
+    raw_token = raw_token or request.GET.get('token')
+    if not raw_token:
+        return None
+    
+    try:
+        user = authenticator.get_principal(authenticator.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+    
+    # hasattr() loads and caches the faculty profile while database access is allowed
+    # (already cached for principals built from token claims)
+    hasattr(user, 'faculty_profile')
+    return user
+
+
+def _event_filter(user):
+    """Return a predicate selecting the events visible in the user's queue."""
+    if user.faculty_profile.is_hod:
+        return lambda event: 'PENDING_HOD' in (event['status'], event['previousStatus'])
+    
+    user_id = str(user.id)
+    return lambda event: event['eventCoordinatorFacultyId'] == user_id
+
+
+async def request_events_view(request):
+    """
+    GET /api/attendance/requests/events
+    Server-Sent Events stream of queue changes for mentors and HODs.
+    
+    Mentors receive events for requests they coordinate; HODs receive events
+    for requests entering or leaving PENDING_HOD. Streams are closed after
+    ATTENDANCE_EVENT_STREAM_SECONDS and EventSource reconnects on its own.
+    Serve through config.asgi so idle streams do not hold a worker thread.
+    """
+    user = await _authenticate_event_stream(request)
+    if user is None:
+        return JsonResponse({
+            'error': {
+                'message': 'Authentication credentials were not provided or are invalid',
+                'code': 'UNAUTHORIZED',
+                'statusCode': 401
+            }
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    if user.role != 'Faculty' or not hasattr(user, 'faculty_profile'):
+        return JsonResponse({
+            'error': {
+                'message': 'Only faculty can subscribe to request events',
+                'code': 'FORBIDDEN',
+                'statusCode': 403
+            }
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    subscription = broker.subscribe(_event_filter(user))
+    
+    async def stream():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.ATTENDANCE_EVENT_STREAM_SECONDS
+        try:
+            yield 'retry: 5000\n\n'
+            while loop.time() < deadline:
                 try:
-                    faculty_user = User.objects.get(id=faculty_id, role='Faculty')
-                    
-                    # Find which periods this faculty handles
-                    their_periods = [period for period, fac_id in period_faculty_mapping.items() if fac_id == faculty_id]
-                    periods_str = ', '.join(f"Period {p}" for p in sorted(their_periods, key=int))
-                    
-                    # Email content
-                    subject = f'Physical Attendance Approved - {subject_student} - {request_instance.date.strftime("%d-%m-%Y")}'
-                    
-                    message = f"""Dear {faculty_user.get_full_name()},
-
-I hope this email finds you well.
-
-This is to inform you that a physical attendance request has been approved for the following:
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-STUDENT DETAILS
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-{student_info}
-Date:          {request_instance.date.strftime('%B %d, %Y')} ({request_instance.date.strftime('%A')})
-Your Period(s): {periods_str}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-EVENT DETAILS
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Purpose:            {request_instance.purpose}
-Event Coordinator:  {request_instance.event_coordinator}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-The {"students have" if is_bulk else "student has"} been granted physical attendance for the mentioned period(s) in your class. Please mark their attendance accordingly.
-
-If you have any questions or concerns regarding this approval, please feel free to contact me.
-
-Best regards,
-{hod_name}
-{hod_title}
-{hod_email}
-
----
-This is an automated notification from the Attendance Management System.
-                    """
-                    
-                    send_mail(
-                        subject=subject,
-                        message=message,
-                        from_email=f"{hod_name} <{hod_email}>",  # Send from HOD's email
-                        recipient_list=[faculty_user.email],
-                        fail_silently=False,  # Raise exception if email fails (for debugging)
+                    event = await asyncio.wait_for(
+                        subscription.get(),
+                        timeout=min(EVENT_STREAM_HEARTBEAT_SECONDS, max(deadline - loop.time(), 0)),
                     )
-                    
-                    print(f"✓ Email sent to {faculty_user.get_full_name()} ({faculty_user.email}) for periods: {periods_str}")
-                    
-                except User.DoesNotExist:
-                    print(f"✗ Faculty user not found: {faculty_id}")
-                    continue
-                except Exception as e:
-                    print(f"✗ Failed to send email to faculty {faculty_id}: {str(e)}")
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
                     continue
-                    
-        except Exception as e:
-            print(f"✗ Failed to send faculty notifications: {str(e)}")
-            # Don't fail the request if email fails
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+    
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# ============================================================================
+# Delta Sync Helpers
+# ============================================================================
+
+# Overlap applied to every delta query to catch rows from in-flight transactions
+SYNC_OVERLAP_SECONDS = 5
+
+
+def _sync_retention():
+    """How long sync tokens (and the tombstones behind them) stay valid."""
+    return timedelta(days=settings.ATTENDANCE_SYNC_RETENTION_DAYS)
+
+
+def _encode_sync_token(watermark):
+    """Encode a watermark timestamp as an opaque URL-safe token."""
+    return base64.urlsafe_b64encode(watermark.isoformat().encode('utf-8')).decode('ascii')
+
+
+def _decode_sync_token(token):
+    """Decode a sync token back to its watermark; raises ValueError if invalid."""
+    # Bad base64, bad UTF-8 and bad ISO timestamps all raise ValueError
+    watermark = datetime.fromisoformat(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+    if timezone.is_naive(watermark):
+        raise ValueError('Invalid sync token')
+    return watermark
 
 
 # ============================================================================
@@ -522,6 +968,23 @@ class FacultyListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def faculty_directory_view(request):
+    """
+    GET /api/faculty/directory
+    All active faculty grouped by department in one unpaginated payload.
+    
+    Served from a cached snapshot with a strong ETag that only changes when
+    a faculty member or their account changes. Supports If-None-Match.
+    """
+    etag, payload = get_directory()
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    return set_validators(Response(payload), etag)
+
+
 class FacultyByDepartmentView(generics.ListAPIView):
     """
     GET /api/faculty/by-department/:department
@@ -545,61 +1008,237 @@ def statistics_view(request):
     """
     GET /api/attendance/statistics
     Get role-specific attendance statistics.
+    
+    Reads the maintained counters for the user's scope in one query:
+    students see the requests they created, mentors the requests they
+    coordinate and HODs every request. A student's counts leave out team
+    requests that only list them as a bulk member, although their request
+    list shows those. Supports If-None-Match.
     """
     user = request.user
     
     if user.role == 'Student':
-        # Student statistics
-        total = AttendanceRequest.objects.filter(student=user).count()
-        pending = AttendanceRequest.objects.filter(
-            student=user,
-            status__in=['PENDING_MENTOR', 'PENDING_HOD']
-        ).count()
-        approved = AttendanceRequest.objects.filter(student=user, status='APPROVED').count()
-        declined = AttendanceRequest.objects.filter(student=user, status='DECLINED').count()
-        
-        return Response({
-            'total': total,
-            'pending': pending,
-            'approved': approved,
-            'declined': declined
-        })
+        counts = scope_counts(student_scope(user.id))
+        data = {
+            'total': sum(counts.values()),
+            'pending': counts['PENDING_MENTOR'] + counts['PENDING_HOD'],
+            'approved': counts['APPROVED'],
+            'declined': counts['DECLINED']
+        }
+    
+    elif user.role == 'Faculty' and hasattr(user, 'faculty_profile') and user.faculty_profile.is_hod:
+        # HOD statistics (department-wide)
+        counts = scope_counts(ALL_SCOPE)
+        data = {
+            'total': sum(counts.values()),
+            'pendingHOD': counts['PENDING_HOD'],
+            'approved': counts['APPROVED'],
+            'declined': counts['DECLINED']
+        }
     
     elif user.role == 'Faculty':
-        if hasattr(user, 'faculty_profile') and user.faculty_profile.is_hod:
-            # HOD statistics (department-wide)
-            total = AttendanceRequest.objects.count()
-            pending_hod = AttendanceRequest.objects.filter(status='PENDING_HOD').count()
-            approved = AttendanceRequest.objects.filter(status='APPROVED').count()
-            declined = AttendanceRequest.objects.filter(status='DECLINED').count()
-            
-            return Response({
-                'total': total,
-                'pendingHOD': pending_hod,
-                'approved': approved,
-                'declined': declined
-            })
-        else:
-            # Mentor statistics (assigned requests)
-            total = AttendanceRequest.objects.count()
-            pending_mentor = AttendanceRequest.objects.filter(status='PENDING_MENTOR').count()
+        # Mentor statistics (requests they coordinate)
+        counts = scope_counts(coordinator_scope(user.id))
+        data = {
+            'total': sum(counts.values()),
+            'pendingMentor': counts['PENDING_MENTOR'],
             # Approved means moved to PENDING_HOD by mentor
-            approved = AttendanceRequest.objects.filter(
-                status__in=['PENDING_HOD', 'APPROVED']
-            ).count()
-            declined = AttendanceRequest.objects.filter(status='DECLINED').count()
-            
+            'approved': counts['PENDING_HOD'] + counts['APPROVED'],
+            'declined': counts['DECLINED']
+        }
+    
+    else:
+        return Response({
+            'error': {
+                'message': 'Invalid user role',
+                'code': 'FORBIDDEN',
+                'statusCode': 403
+            }
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    etag = make_etag(request, *sorted(data.items()))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    return set_validators(Response(data), etag)
+
+
+# Longest range the analytics endpoint answers in one request
+ANALYTICS_MAX_DAYS = 10 * 366
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def analytics_view(request):
+    """
+    GET /api/attendance/analytics?dateFrom=&dateTo=&granularity=day|month|year&department=
+    Request trends for HOD dashboards, read from the daily rollup tables:
+    a time series plus totals per department, coordinator and period.
+    Defaults to the last twelve months by month. Supports If-None-Match.
+    """
+    user = request.user
+    if user.role != 'Faculty' or not hasattr(user, 'faculty_profile') or not user.faculty_profile.is_hod:
+        return Response({
+            'error': {
+                'message': 'Only HODs can view analytics',
+                'code': 'FORBIDDEN',
+                'statusCode': 403
+            }
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    date_from_param = request.query_params.get('dateFrom')
+    date_to_param = request.query_params.get('dateTo')
+    try:
+        if date_to_param:
+            date_to = datetime.strptime(date_to_param, '%Y-%m-%d').date()
+        else:
+            date_to = timezone.localdate()
+        if date_from_param:
+            date_from = datetime.strptime(date_from_param, '%Y-%m-%d').date()
+        else:
+            # First day of the month eleven months back: twelve whole buckets by month
+            date_from = (date_to.replace(day=1) - timedelta(days=335)).replace(day=1)
+    except ValueError:
+        return Response({
+            'error': {
+                'message': 'dateFrom and dateTo must be in YYYY-MM-DD format',
+                'code': 'VALIDATION_ERROR',
+                'statusCode': 400
+            }
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if date_from > date_to or (date_to - date_from).days > ANALYTICS_MAX_DAYS:
+        return Response({
+            'error': {
+                'message': f'dateFrom must not be after dateTo, and the range at most {ANALYTICS_MAX_DAYS} days',
+                'code': 'VALIDATION_ERROR',
+                'statusCode': 400
+            }
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    granularity = request.query_params.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        return Response({
+            'error': {
+                'message': f"granularity must be one of {', '.join(GRANULARITIES)}",
+                'code': 'VALIDATION_ERROR',
+                'statusCode': 400
+            }
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = analytics(date_from, date_to, granularity, request.query_params.get('department'))
+    
+    etag = make_etag(request, json.dumps(data, sort_keys=True))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    return set_validators(Response(data), etag)
+
+
+# ============================================================================
+# Period Faculty Views
+# ============================================================================
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def my_periods_view(request):
+    """
+    GET /api/attendance/my-periods?date=YYYY-MM-DD
+    List the students excused from the caller's periods on a date (default
+    today), grouped by period. Only approved requests create excusals.
+    """
+    user = request.user
+    
+    if user.role != 'Faculty':
+        return Response({
+            'error': {
+                'message': 'Only faculty can view their periods',
+                'code': 'FORBIDDEN',
+                'statusCode': 403
+            }
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    date_param = request.query_params.get('date')
+    if date_param:
+        try:
+            date = datetime.strptime(date_param, '%Y-%m-%d').date()
+        except ValueError:
             return Response({
-                'total': total,
-                'pendingMentor': pending_mentor,
-                'approved': approved,
-                'declined': declined
-            })
+                'error': {
+                    'message': 'date must be in YYYY-MM-DD format',
+                    'code': 'VALIDATION_ERROR',
+                    'statusCode': 400
+                }
+            }, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        date = timezone.localdate()
+    
+    excusals = (
+        PeriodExcusal.objects.filter(faculty=user, date=date)
+        .select_related('attendance_request__student')
+        .order_by('period', 'attendance_request__created_at')
+    )
+    
+    periods = {}
+    for excusal in excusals:
+        attendance_request = excusal.attendance_request
+        if attendance_request.is_bulk_request:
+            students = [
+                {'name': entry.get('name'), 'registerNumber': entry.get('registerNumber')}
+                for entry in attendance_request.bulk_students
+            ]
+        else:
+            students = [{
+                'name': attendance_request.student.name if attendance_request.student else None,
+                'email': attendance_request.student.email if attendance_request.student else None,
+            }]
+        
+        periods.setdefault(excusal.period, []).append({
+            'requestId': str(attendance_request.id),
+            'purpose': attendance_request.purpose,
+            'eventCoordinator': attendance_request.event_coordinator,
+            'students': students,
+        })
     
     return Response({
-        'error': {
-            'message': 'Invalid user role',
-            'code': 'FORBIDDEN',
-            'statusCode': 403
-        }
-    }, status=status.HTTP_403_FORBIDDEN)
+        'date': date.isoformat(),
+        'periods': [
+            {'period': period, 'requests': requests}
+            for period, requests in periods.items()
+        ],
+    })
+
+
+# ============================================================================
+# Monitoring Views
+# ============================================================================
+
+def metrics_view(request):
+    """
+    GET /metrics
+    Prometheus text exposition of request latencies, query counts, status
+    transitions, email deliveries and queue depths. The scraper must send
+    ATTENDANCE_METRICS_TOKEN as a bearer token; without one configured the
+    endpoint is closed.
+    """
+    token = settings.ATTENDANCE_METRICS_TOKEN
+    if not token:
+        return JsonResponse({
+            'error': {
+                'message': 'Metrics are disabled, set ATTENDANCE_METRICS_TOKEN to enable them',
+                'code': 'FORBIDDEN',
+                'statusCode': 403
+            }
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return JsonResponse({
+            'error': {
+                'message': 'A valid metrics token is required',
+                'code': 'UNAUTHORIZED',
+                'statusCode': 401
+            }
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
@@ -7,6 +7,7 @@ Generated by Django 4.2, configured for PostgreSQL with environment variables.
 import os
 from pathlib import Path
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Must be at the top
+    'attendance.instrumentation.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -144,7 +146,7 @@ AUTH_USER_MODEL = 'attendance.User'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'attendance.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -159,6 +161,10 @@ REST_FRAMEWORK = {
 
 # Simple JWT Configuration
 SIMPLE_JWT = {
+    # Read-only requests trust the role, HOD flag and active state baked into
+    # the access token (attendance.authentication), so a deactivated or
+    # demoted user keeps read access for up to this long. Writes always
+    # reload the user from the database.
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
@@ -210,6 +216,13 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'if-none-match',
+]
+
+# Let the frontend read validators on conditional GET responses
+CORS_EXPOSE_HEADERS = [
+    'etag',
+    'server-timing',
 ]
 
 # Email Configuration (for future HOD notifications)
@@ -221,6 +234,77 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@university.edu')
 
+# Approval email digests: empty for one email per approved request, a window in
+# minutes (e.g. 10) or 'eod' to send each faculty member one email per date.
+# Normalized to None (off), 'eod' or a positive number of minutes.
+def _notification_digest(value):
+    value = value.strip().lower()
+    if value in ('', 'off', 'none'):
+        return None
+    if value == 'eod':
+        return value
+    if value.isdigit() and int(value) > 0:
+        return int(value)
+    raise ImproperlyConfigured(
+        f"ATTENDANCE_NOTIFICATION_DIGEST must be off, eod or a positive number of minutes, got {value!r}"
+    )
+
+
+ATTENDANCE_NOTIFICATION_DIGEST = _notification_digest(os.getenv('ATTENDANCE_NOTIFICATION_DIGEST', ''))
+
+# Attendance delta sync: how long sync tokens and deletion tombstones are kept
+ATTENDANCE_SYNC_RETENTION_DAYS = int(os.getenv('ATTENDANCE_SYNC_RETENTION_DAYS', '30'))
+
+# Attendance live events: SSE streams are closed (and re-opened by the client)
+# after this many seconds so dropped connections never linger
+ATTENDANCE_EVENT_STREAM_SECONDS = int(os.getenv('ATTENDANCE_EVENT_STREAM_SECONDS', '300'))
+
+# Cache: per-process memory by default; point every worker at one shared cache
+# (e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache,
+# CACHE_LOCATION=redis://127.0.0.1:6379/1) so invalidations reach all of them
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'attendance'),
+    }
+}
+
+# Faculty directory snapshot: rebuilt on faculty changes, and at least this often
+# so per-process caches of other workers cannot stay stale for long
+ATTENDANCE_DIRECTORY_CACHE_SECONDS = int(os.getenv('ATTENDANCE_DIRECTORY_CACHE_SECONDS', '300'))
+
+# Archive of closed requests from past terms (written by archive_requests,
+# read by history listings and exports that reach back past the cutoff)
+ATTENDANCE_ARCHIVE_DIR = os.getenv('ATTENDANCE_ARCHIVE_DIR', str(BASE_DIR / 'archive'))
+
+# Request instrumentation: requests running more SQL queries than this are
+# logged as warnings (0 disables the check)
+ATTENDANCE_QUERY_BUDGET = int(os.getenv('ATTENDANCE_QUERY_BUDGET', '20'))
+
+# Prometheus metrics: /metrics requires `Authorization: Bearer <token>` and is
+# closed while this is empty.
+# Under gunicorn also set PROMETHEUS_MULTIPROC_DIR (see gunicorn.conf.py)
+ATTENDANCE_METRICS_TOKEN = os.getenv('ATTENDANCE_METRICS_TOKEN', '')
+
+# Logging: one JSON line per request from attendance.instrumentation at INFO;
+# set ATTENDANCE_INSTRUMENTATION_LOG_LEVEL=WARNING to keep only budget overruns
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'attendance.instrumentation': {
+            'handlers': ['console'],
+            'level': os.getenv('ATTENDANCE_INSTRUMENTATION_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Security Settings for Production
 if not DEBUG:
     SECURE_SSL_REDIRECT = True
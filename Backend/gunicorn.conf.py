@@ -0,0 +1,45 @@
+"""
+Gunicorn configuration.
+
+Usage:
+    PROMETHEUS_MULTIPROC_DIR=/tmp/attendance-metrics gunicorn -c gunicorn.conf.py config.wsgi:application
+
+With PROMETHEUS_MULTIPROC_DIR set, each worker writes its metrics to files
+in that directory and /metrics merges them. When the server starts, the files
+of processes that are no longer running are removed so totals from an earlier
+run are not reported again; files of live processes sharing the directory
+(e.g. the deliver_notifications worker) are kept.
+"""
+import glob
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def on_starting(server):
+    metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if not metrics_dir:
+        return
+    os.makedirs(metrics_dir, exist_ok=True)
+    # prometheus_client names its files <type>_<pid>.db
+    for path in glob.glob(os.path.join(metrics_dir, '*.db')):
+        pid = os.path.basename(path)[:-3].rpartition('_')[2]
+        if pid.isdigit() and not _pid_alive(int(pid)):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)